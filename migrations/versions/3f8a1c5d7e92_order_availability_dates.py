@@ -0,0 +1,44 @@
+"""Order availability dates as a typed array.
+
+Revision ID: 3f8a1c5d7e92
+Revises: b7d2e9a4c1f3
+Create Date: 2017-09-28 14:03:51.207310
+"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+import sqlalchemy as sa
+
+
+revision = '3f8a1c5d7e92'
+down_revision = 'b7d2e9a4c1f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.add_column(
+        'orders',
+        sa.Column(
+            'availability_dates',
+            postgresql.ARRAY(sa.DateTime(timezone=True)),
+            nullable=True
+        )
+    )
+    op.execute(
+        """
+        UPDATE orders
+        SET availability_dates = ARRAY(
+            SELECT jsonb_array_elements_text(availability)::timestamptz
+        )
+        WHERE
+            jsonb_typeof(availability) = 'array'
+            AND jsonb_array_length(availability) > 0
+        """
+    )
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_column('orders', 'availability_dates')
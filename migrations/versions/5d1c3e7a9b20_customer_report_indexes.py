@@ -0,0 +1,45 @@
+"""Indexes supporting the customer report, with the Orders sort key.
+
+Revision ID: 5d1c3e7a9b20
+Revises: a45eec2a6f1e
+Create Date: 2017-09-18 10:12:44.318208
+"""
+from alembic import op
+from briefy.common.db.types.aware_datetime import AwareDateTime
+
+import sqlalchemy as sa
+
+
+revision = '5d1c3e7a9b20'
+down_revision = 'a45eec2a6f1e'
+branch_labels = None
+depends_on = None
+
+
+UPDATE_SORT_CREATED_AT = """
+UPDATE orders SET sort_created_at = coalesce(items.created_at, now())
+FROM items
+WHERE items.id = orders.id
+"""
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.add_column('orders', sa.Column('sort_created_at', AwareDateTime(), nullable=True))
+    op.execute(UPDATE_SORT_CREATED_AT)
+    op.alter_column('orders', 'sort_created_at', nullable=False)
+    op.create_index(
+        'ix_orders_project_id_sort_created_at_id', 'orders',
+        ['project_id', 'sort_created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_localroles_item_id_principal_id', 'localroles', ['item_id', 'principal_id'],
+        unique=False
+    )
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_index('ix_localroles_item_id_principal_id', table_name='localroles')
+    op.drop_index('ix_orders_project_id_sort_created_at_id', table_name='orders')
+    op.drop_column('orders', 'sort_created_at')
@@ -0,0 +1,53 @@
+"""Denormalized counters on pools.
+
+Revision ID: 5e7a9b1d3c60
+Revises: d4f0a6c2e819
+Create Date: 2017-10-09 11:05:27.340219
+"""
+from alembic import op
+
+import sqlalchemy as sa
+
+
+revision = '5e7a9b1d3c60'
+down_revision = 'd4f0a6c2e819'
+branch_labels = None
+depends_on = None
+
+
+COUNTERS = ('total_assignments', 'live_assignments', 'total_professionals')
+
+BACKFILL = """
+UPDATE pools
+SET
+    total_assignments = (
+        SELECT count(*) FROM assignments WHERE assignments.pool_id = pools.id
+    ),
+    live_assignments = (
+        SELECT count(*)
+        FROM assignments
+        JOIN items ON items.id = assignments.id
+        WHERE assignments.pool_id = pools.id AND items.state = 'published'
+    ),
+    total_professionals = (
+        SELECT count(*)
+        FROM professionals_in_pool
+        WHERE professionals_in_pool.pool_id = pools.id
+    )
+"""
+
+
+def upgrade():
+    """Upgrade database model."""
+    for name in COUNTERS:
+        op.add_column(
+            'pools',
+            sa.Column(name, sa.Integer(), nullable=False, server_default='0')
+        )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    """Downgrade database model."""
+    for name in reversed(COUNTERS):
+        op.drop_column('pools', name)
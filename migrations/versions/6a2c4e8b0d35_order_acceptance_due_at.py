@@ -0,0 +1,77 @@
+"""Order acceptance due date.
+
+Revision ID: 6a2c4e8b0d35
+Revises: 3f8a1c5d7e92
+Create Date: 2017-09-29 11:26:07.614522
+"""
+from alembic import op
+from briefy.common.db.types.aware_datetime import AwareDateTime
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+
+revision = '6a2c4e8b0d35'
+down_revision = '3f8a1c5d7e92'
+branch_labels = None
+depends_on = None
+
+
+SELECT_DELIVERED = """
+SELECT
+    orders.id,
+    orders.last_deliver_date,
+    coalesce(projects.approval_window, 0) AS approval_window
+FROM orders
+JOIN projects ON projects.id = orders.project_id
+WHERE orders.last_deliver_date IS NOT NULL
+"""
+
+UPDATE_DUE = """
+UPDATE orders SET acceptance_due_at = :acceptance_due_at WHERE id = :id
+"""
+
+
+def add_business_days(value, days: int):
+    """Add business days, skipping weekends, keeping the time of the day.
+
+    Same result as briefy.leica.utils.business_days without holidays, the default
+    configuration, copied here so the migration does not change with that module.
+    """
+    if not days:
+        return value
+    step = 1 if days > 0 else -1
+    # weekends start from the previous business day, or from the next one going back
+    while value.weekday() >= 5:
+        value -= timedelta(days=step)
+    remaining = abs(days)
+    while remaining:
+        value += timedelta(days=step)
+        if value.weekday() < 5:
+            remaining -= 1
+    return value
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.add_column('orders', sa.Column('acceptance_due_at', AwareDateTime(), nullable=True))
+    op.create_index(
+        op.f('ix_orders_acceptance_due_at'), 'orders', ['acceptance_due_at'], unique=False
+    )
+
+    connection = op.get_bind()
+    values = [
+        {
+            'id': row.id,
+            'acceptance_due_at': add_business_days(row.last_deliver_date, row.approval_window)
+        }
+        for row in connection.execute(sa.text(SELECT_DELIVERED))
+    ]
+    if values:
+        connection.execute(sa.text(UPDATE_DUE), values)
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_index(op.f('ix_orders_acceptance_due_at'), table_name='orders')
+    op.drop_column('orders', 'acceptance_due_at')
@@ -0,0 +1,106 @@
+"""Dashboard aggregates.
+
+Revision ID: 8e4f6b0c2d17
+Revises: 5d1c3e7a9b20
+Create Date: 2017-09-20 15:41:09.527114
+"""
+from alembic import op
+from sqlalchemy_utils import types
+
+import sqlalchemy as sa
+
+
+revision = '8e4f6b0c2d17'
+down_revision = '5d1c3e7a9b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.create_table(
+        'dashboard_order_stats',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('project_id', types.UUIDType(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=True),
+        sa.Column('current_type', sa.String(length=50), nullable=True),
+        sa.Column('state', sa.String(length=100), nullable=True),
+        sa.Column('accepted', sa.Boolean(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(
+        op.f('ix_dashboard_order_stats_project_id'), 'dashboard_order_stats', ['project_id'],
+        unique=False
+    )
+    op.create_table(
+        'dashboard_assignment_stats',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('project_id', types.UUIDType(), nullable=False),
+        sa.Column('current_type', sa.String(length=50), nullable=True),
+        sa.Column('country', sa.String(length=2), nullable=True),
+        sa.Column('state', sa.String(length=100), nullable=True),
+        sa.Column('set_type', sa.String(), nullable=True),
+        sa.Column('in_pool', sa.Boolean(), nullable=False),
+        sa.Column('professional_id', types.UUIDType(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(
+        op.f('ix_dashboard_assignment_stats_project_id'), 'dashboard_assignment_stats',
+        ['project_id'], unique=False
+    )
+    op.create_index(
+        op.f('ix_dashboard_assignment_stats_country'), 'dashboard_assignment_stats',
+        ['country'], unique=False
+    )
+    # backfill: keys are built as in briefy.leica.models.dashboard.stats.stats_key
+    op.execute("""
+    INSERT INTO dashboard_order_stats
+    (key, project_id, type, current_type, state, accepted, total)
+    SELECT
+    concat_ws(
+        '|', stats.project_id::text, coalesce(stats.type, ''),
+        coalesce(stats.current_type, ''), coalesce(stats.state, ''),
+        CASE WHEN stats.accepted THEN 'True' ELSE 'False' END
+    ),
+    stats.project_id, stats.type, stats.current_type, stats.state, stats.accepted, stats.total
+    FROM
+    (SELECT o.project_id, i.type, o.current_type, i.state,
+    o.accept_date IS NOT NULL as accepted, count(*) as total
+    FROM items as i JOIN orders as o on i.id = o.id
+    GROUP BY 1, 2, 3, 4, 5) as stats
+    """)
+    op.execute("""
+    INSERT INTO dashboard_assignment_stats
+    (key, project_id, current_type, country, state, set_type, in_pool, professional_id, total)
+    SELECT
+    concat_ws(
+        '|', stats.project_id::text, coalesce(stats.current_type, ''),
+        coalesce(stats.country, ''), coalesce(stats.state, ''), coalesce(stats.set_type, ''),
+        CASE WHEN stats.in_pool THEN 'True' ELSE 'False' END,
+        coalesce(stats.professional_id::text, '')
+    ),
+    stats.project_id, stats.current_type, stats.country, stats.state, stats.set_type,
+    stats.in_pool, stats.professional_id, stats.total
+    FROM
+    (SELECT o.project_id, o.current_type, ol.country, i.state, a.set_type,
+    a.pool_id IS NOT NULL as in_pool, a.professional_id, count(*) as total
+    FROM items as i JOIN assignments as a on i.id = a.id
+    JOIN orders as o on a.order_id = o.id
+    LEFT JOIN orderlocations as ol on ol.order_id = o.id
+    GROUP BY 1, 2, 3, 4, 5, 6, 7) as stats
+    """)
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_index(
+        op.f('ix_dashboard_assignment_stats_country'), table_name='dashboard_assignment_stats'
+    )
+    op.drop_index(
+        op.f('ix_dashboard_assignment_stats_project_id'), table_name='dashboard_assignment_stats'
+    )
+    op.drop_table('dashboard_assignment_stats')
+    op.drop_index(op.f('ix_dashboard_order_stats_project_id'), table_name='dashboard_order_stats')
+    op.drop_table('dashboard_order_stats')
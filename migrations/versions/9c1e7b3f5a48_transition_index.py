@@ -0,0 +1,79 @@
+"""Transition index on orders and assignments.
+
+Revision ID: 9c1e7b3f5a48
+Revises: 6a2c4e8b0d35
+Create Date: 2017-10-02 09:48:12.904173
+"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+import sqlalchemy as sa
+
+
+revision = '9c1e7b3f5a48'
+down_revision = '6a2c4e8b0d35'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+WITH entries AS (
+    SELECT
+        items.id,
+        entry.value ->> 'transition' AS name,
+        entry.value ->> 'date' AS date,
+        entry.position - 1 AS position
+    FROM {table}
+    JOIN items ON items.id = {table}.id
+    CROSS JOIN LATERAL jsonb_array_elements(items.state_history::jsonb)
+        WITH ORDINALITY AS entry(value, position)
+    WHERE jsonb_typeof(items.state_history::jsonb) = 'array'
+),
+per_transition AS (
+    SELECT
+        id,
+        name,
+        jsonb_build_object(
+            'first', (array_agg(date ORDER BY position))[1],
+            'first_position', min(position),
+            'last', (array_agg(date ORDER BY position DESC))[1],
+            'last_position', max(position),
+            'count', count(*)
+        ) AS info
+    FROM entries
+    WHERE coalesce(name, '') <> ''
+    GROUP BY id, name
+)
+UPDATE {table}
+SET transition_index = jsonb_build_object(
+    'size', jsonb_array_length(items.state_history::jsonb),
+    'tail', items.state_history::jsonb -> -1 ->> 'date',
+    'transitions', coalesce(
+        (
+            SELECT jsonb_object_agg(per_transition.name, per_transition.info)
+            FROM per_transition
+            WHERE per_transition.id = items.id
+        ),
+        '{{}}'::jsonb
+    )
+)
+FROM items
+WHERE
+    items.id = {table}.id
+    AND jsonb_typeof(items.state_history::jsonb) = 'array'
+"""
+
+
+def upgrade():
+    """Upgrade database model."""
+    for table in ('orders', 'assignments'):
+        op.add_column(
+            table, sa.Column('transition_index', postgresql.JSONB(), nullable=True)
+        )
+        op.execute(BACKFILL.format(table=table))
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_column('assignments', 'transition_index')
+    op.drop_column('orders', 'transition_index')
@@ -0,0 +1,74 @@
+"""Assignment notifications ledger.
+
+Revision ID: b7d2e9a4c1f3
+Revises: 8e4f6b0c2d17
+Create Date: 2017-09-27 10:12:44.381920
+"""
+from alembic import op
+from briefy.common.db.types.aware_datetime import AwareDateTime
+from sqlalchemy_utils import types
+
+import sqlalchemy as sa
+
+
+revision = 'b7d2e9a4c1f3'
+down_revision = '8e4f6b0c2d17'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+INSERT INTO assignment_notifications (
+    id, assignment_id, kind, sent_at, comment_id, created_at, updated_at
+)
+SELECT DISTINCT ON (comments.entity_id, kind)
+    md5(comments.entity_id::text || kind)::uuid,
+    comments.entity_id,
+    kind,
+    comments.created_at,
+    comments.id,
+    comments.created_at,
+    comments.created_at
+FROM (
+    SELECT
+        comments.*,
+        CASE comments.content
+            WHEN '** notify task **: The creative was notified about late submission.'
+            THEN 'late_submission'
+            ELSE 'before_shooting'
+        END AS kind
+    FROM comments
+    WHERE
+        comments.entity_type = 'Assignment'
+        AND comments.content IN (
+            '** notify task **: The creative was notified about late submission.',
+            '** notify task **: The creative was notified before the shooting.'
+        )
+) AS comments
+JOIN assignments ON assignments.id = comments.entity_id
+ORDER BY comments.entity_id, kind, comments.created_at
+"""
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.create_table(
+        'assignment_notifications',
+        sa.Column('created_at', AwareDateTime(), nullable=True),
+        sa.Column('updated_at', AwareDateTime(), nullable=True),
+        sa.Column('id', types.UUIDType(), nullable=False),
+        sa.Column('assignment_id', types.UUIDType(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('sent_at', AwareDateTime(), nullable=False),
+        sa.Column('comment_id', types.UUIDType(), nullable=True),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assignment_id', 'kind')
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_table('assignment_notifications')
@@ -0,0 +1,91 @@
+"""Append only workflow transitions table.
+
+Revision ID: d4f0a6c2e819
+Revises: 9c1e7b3f5a48
+Create Date: 2017-10-04 16:21:35.118406
+"""
+from alembic import op
+from briefy.common.db.types.aware_datetime import AwareDateTime
+from sqlalchemy_utils import types
+
+import sqlalchemy as sa
+
+
+revision = 'd4f0a6c2e819'
+down_revision = '9c1e7b3f5a48'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+INSERT INTO workflow_transitions (
+    id, item_id, item_type, position, transition, from_state, to_state, actor, date
+)
+SELECT
+    md5(items.id::text || '-' || (entry.position - 1)::text)::uuid,
+    items.id,
+    items.type,
+    entry.position - 1,
+    nullif(entry.value ->> 'transition', ''),
+    nullif(entry.value ->> 'from', ''),
+    nullif(entry.value ->> 'to', ''),
+    CASE
+        WHEN actor.value ~* '^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$'
+        THEN actor.value::uuid
+    END,
+    (entry.value ->> 'date')::timestamptz
+FROM items
+CROSS JOIN LATERAL jsonb_array_elements(items.state_history::jsonb)
+    WITH ORDINALITY AS entry(value, position)
+CROSS JOIN LATERAL (
+    SELECT
+        CASE jsonb_typeof(entry.value -> 'actor')
+            WHEN 'object' THEN entry.value -> 'actor' ->> 'id'
+            ELSE entry.value ->> 'actor'
+        END AS value
+) AS actor
+WHERE jsonb_typeof(items.state_history::jsonb) = 'array'
+"""
+
+
+def upgrade():
+    """Upgrade database model."""
+    op.create_table(
+        'workflow_transitions',
+        sa.Column('id', types.UUIDType(), nullable=False),
+        sa.Column('item_id', types.UUIDType(), nullable=False),
+        sa.Column('item_type', sa.String(length=50), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('transition', sa.String(length=100), nullable=True),
+        sa.Column('from_state', sa.String(length=100), nullable=True),
+        sa.Column('to_state', sa.String(length=100), nullable=True),
+        sa.Column('actor', types.UUIDType(), nullable=True),
+        sa.Column('date', AwareDateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('item_id', 'position')
+    )
+    op.execute(BACKFILL)
+    op.create_index(
+        'ix_workflow_transitions_type_transition_date',
+        'workflow_transitions',
+        ['item_type', 'transition', 'date'],
+        unique=False
+    )
+    op.create_index(
+        'ix_workflow_transitions_actor_transition_date',
+        'workflow_transitions',
+        ['actor', 'transition', 'date'],
+        unique=False
+    )
+
+
+def downgrade():
+    """Downgrade database model."""
+    op.drop_index(
+        'ix_workflow_transitions_actor_transition_date', table_name='workflow_transitions'
+    )
+    op.drop_index(
+        'ix_workflow_transitions_type_transition_date', table_name='workflow_transitions'
+    )
+    op.drop_table('workflow_transitions')
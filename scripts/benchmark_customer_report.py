@@ -0,0 +1,149 @@
+"""Benchmark the customer report query against a seeded dataset.
+
+The orders of the project are cloned from an existing order until the project has --orders
+orders, inside a transaction that is rolled back at the end, so the database is left untouched.
+The previous query, built with str.format and SELECT DISTINCT, is then compared to the keyset
+paginated one used by CustomerReports.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python scripts/benchmark_customer_report.py \
+        --project-id <uuid> --principal-id <uuid> --orders 500000
+"""
+from briefy.leica.config import DATABASE_URL
+from briefy.leica.models.reports.customer import orders_by_project
+from sqlalchemy import create_engine
+from sqlalchemy import text
+
+import argparse
+import time
+
+
+LEGACY_QUERY = """
+SELECT DISTINCT
+orders.slug, orders.customer_order_id, orders.title, projects.title, orders.state,
+orders.created_at, orders.scheduled_datetime, orders.deliver_date, orders.accept_date,
+orders.timezone
+FROM
+(SELECT i.slug, i.state, i.title, o.accept_date, o.project_id,
+o.customer_order_id, i.created_at, o.scheduled_datetime,
+o.deliver_date, o.timezone
+FROM items as i JOIN orders as o on i.id = o.id
+) as orders JOIN
+(SELECT i.id, i.state, i.title, p.customer_id, l.principal_id, l.role_name
+FROM items as i JOIN projects as p on i.id = p.id
+JOIN localroles as l on p.id = l.item_id
+WHERE l.principal_id = '{principal_id}') as projects
+on orders.project_id = projects.id
+WHERE projects.id = '{project_id}'
+ORDER BY orders.created_at
+"""
+
+SEED_QUERIES = (
+    """
+    CREATE TEMPORARY TABLE seed ON COMMIT DROP AS
+    SELECT md5(random()::text || s::text)::uuid AS id, s
+    FROM generate_series(1, :total) AS s
+    """,
+    """
+    INSERT INTO items
+    SELECT (jsonb_populate_record(
+        NULL::items,
+        to_jsonb(i) || jsonb_build_object(
+            'id', seed.id,
+            'slug', 'bench-' || seed.s,
+            'created_at', i.created_at + seed.s * interval '1 second'
+        )
+    )).*
+    FROM items AS i, seed
+    WHERE i.id = :template_id
+    """,
+    """
+    INSERT INTO orders
+    SELECT (jsonb_populate_record(
+        NULL::orders, to_jsonb(o) || jsonb_build_object('id', seed.id)
+    )).*
+    FROM orders AS o, seed
+    WHERE o.id = :template_id
+    """,
+    'ANALYZE items',
+    'ANALYZE orders',
+    'ANALYZE localroles',
+)
+
+
+def seed(connection, project_id: str, total: int) -> int:
+    """Clone an order of the project until it has total orders.
+
+    :return: Number of orders created.
+    """
+    template_id = connection.execute(
+        text('SELECT id FROM orders WHERE project_id = :project_id LIMIT 1'),
+        project_id=project_id
+    ).scalar()
+    if not template_id:
+        raise ValueError(f'Project {project_id} has no orders to be used as template.')
+    existing = connection.execute(
+        text('SELECT count(*) FROM orders WHERE project_id = :project_id'),
+        project_id=project_id
+    ).scalar()
+    missing = max(total - existing, 0)
+    for query in SEED_QUERIES:
+        connection.execute(text(query), total=missing, template_id=template_id)
+    return missing
+
+
+def run_legacy(connection, project_id: str, principal_id: str) -> int:
+    """Execute the previous query, materializing all rows."""
+    query = LEGACY_QUERY.format(principal_id=principal_id, project_id=project_id)
+    return len(connection.execute(query).fetchall())
+
+
+def run_keyset(connection, project_id: str, principal_id: str, page_size: int) -> int:
+    """Execute the keyset paginated query, page by page."""
+    total = 0
+    after = None
+    while True:
+        query = orders_by_project(project_id, principal_id, after=after, limit=page_size)
+        rows = connection.execute(query).fetchall()
+        total += len(rows)
+        if len(rows) < page_size:
+            return total
+        after = (rows[-1].created_at, rows[-1].id)
+
+
+def timed(func, *args) -> tuple:
+    """Return the result and the duration of a call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Seed the dataset, run both queries and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--project-id', required=True)
+    parser.add_argument('--principal-id', required=True)
+    parser.add_argument('--orders', type=int, default=500000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL)
+    connection = engine.connect()
+    trans = connection.begin()
+    try:
+        created, duration = timed(seed, connection, args.project_id, args.orders)
+        print(f'Seeded {created} orders in {duration:.2f}s')
+        rows, duration = timed(run_legacy, connection, args.project_id, args.principal_id)
+        print(f'legacy: {rows} rows in {duration:.2f}s')
+        rows, duration = timed(
+            run_keyset, connection, args.project_id, args.principal_id, args.page_size
+        )
+        print(f'keyset (page size {args.page_size}): {rows} rows in {duration:.2f}s')
+    finally:
+        trans.rollback()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
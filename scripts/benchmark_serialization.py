@@ -0,0 +1,68 @@
+"""Benchmark the serialization of an Orders listing page, with and without the cache.
+
+A page of orders is serialized with to_listing_dict, as the /orders listing does, first with
+the cache disabled, then with a cold and a warm cache. The number of SQL statements and the
+duration of each run are printed. Nothing is written to the database.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python scripts/benchmark_serialization.py --page-size 100
+"""
+from briefy.leica import cache
+from briefy.leica.db import db_configure
+from briefy.leica.db import Session
+from briefy.leica.models import Order
+from sqlalchemy import event
+from unittest import mock
+
+import argparse
+import time
+import transaction
+
+
+def serialize_page(page_size: int) -> int:
+    """Load a page of orders and serialize it, in a new transaction."""
+    with transaction.manager:
+        orders = Order.query().order_by(Order.created_at.desc()).limit(page_size).all()
+        return len([order.to_listing_dict() for order in orders])
+
+
+def run(session, page_size: int, enabled: bool) -> tuple:
+    """Serialize a page of orders and return the number of statements and the duration."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        with mock.patch.object(cache, 'ENABLE_CACHE', enabled):
+            start = time.perf_counter()
+            serialize_page(page_size)
+            duration = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return len(statements), duration
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    session = db_configure(Session)
+    # the first run loads mappers and warms the connection pool
+    run(session, args.page_size, enabled=False)
+    cases = (('disabled', False), ('cold', True)) + (('warm', True), ) * args.repeat
+    for name, enabled in cases:
+        if name == 'cold':
+            cache.cache_region.invalidate()
+        statements, duration = run(session, args.page_size, enabled)
+        print(f'{name}\tstatements={statements}\tms={duration * 1000:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the offline timezone resolver.
+
+Measures lookups per second, with and without the coordinates cache, and checks the agreement
+of the resolver with the GeoNames responses stored on tests/data/timezone*.json.
+
+Usage::
+
+    python scripts/benchmark_timezone.py --polygons src/briefy/leica/data/timezones.json
+"""
+from briefy.leica.utils import timezone
+from briefy.leica.utils.timezone import BUNDLED_POLYGONS_PATH
+from briefy.leica.utils.timezone import TimezoneResolver
+
+import argparse
+import glob
+import json
+import random
+import time
+
+
+FIXTURES = 'tests/data/timezone*.json'
+
+
+def random_points(total: int, seed: int = 42) -> list:
+    """Return random points over land and sea."""
+    rand = random.Random(seed)
+    return [(rand.uniform(-60, 70), rand.uniform(-180, 180)) for _ in range(total)]
+
+
+def rate(func, points: list) -> float:
+    """Return the number of lookups per second."""
+    start = time.perf_counter()
+    for lat, lng in points:
+        func(lat, lng)
+    return len(points) / (time.perf_counter() - start)
+
+
+def agreement(resolver: TimezoneResolver) -> tuple:
+    """Compare the resolver with the GeoNames fixtures.
+
+    :return: Number of fixtures checked and list of mismatches.
+    """
+    checked = 0
+    mismatches = []
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path) as fh:
+            data = json.load(fh)
+        if not isinstance(data, dict) or 'timezoneId' not in data:
+            continue
+        checked += 1
+        resolved = resolver.resolve(data['lat'], data['lng'])
+        if resolved != data['timezoneId']:
+            mismatches.append((path, data['timezoneId'], resolved))
+    return checked, mismatches
+
+
+def main():
+    """Load the polygons and print the benchmark results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--polygons', default=BUNDLED_POLYGONS_PATH)
+    parser.add_argument('--lookups', type=int, default=100000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    resolver = TimezoneResolver.from_file(args.polygons)
+    print(f'Loaded {len(resolver.polygons)} polygons in {time.perf_counter() - start:.2f}s')
+
+    points = random_points(args.lookups)
+    print(f'resolver: {rate(resolver.resolve, points):,.0f} lookups/s')
+
+    timezone.set_resolver(resolver)
+    # the same 1000 places over and over, as with orders of the same project
+    repeated = [points[i % 1000] for i in range(args.lookups)]
+    print(f'cached: {rate(timezone.timezone_from_coordinates, repeated):,.0f} lookups/s')
+    print(timezone._resolve_offline.cache_info())
+
+    checked, mismatches = agreement(resolver)
+    print(f'fixtures: {checked - len(mismatches)}/{checked} agree')
+    for path, expected, resolved in mismatches:
+        print(f'  {path}: expected {expected}, resolved {resolved}')
+
+
+if __name__ == '__main__':
+    main()
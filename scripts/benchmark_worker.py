@@ -0,0 +1,97 @@
+"""Benchmark the Leica worker throughput using the local queue.
+
+Each message is handled by a fake action sleeping for --latency seconds, emulating the chain
+of database round trips of the real actions, so no SQS queue or database is needed.
+
+Usage::
+
+    python scripts/benchmark_worker.py --messages 500 --assignments 100 --workers 1 4 8
+"""
+from briefy.leica.log import worker_logger as logger
+from briefy.leica.worker import ConcurrentWorker
+from briefy.leica.worker import Worker
+from briefy.leica.worker.local import LocalQueue
+from unittest import mock
+
+import argparse
+import time
+
+
+EVENT_NAME = 'laure.assignment.post_processing_complete'
+
+
+class FakeSession:
+    """Session factory stand in."""
+
+    def __call__(self):
+        """Return the session."""
+        return self
+
+    def remove(self):
+        """Nothing to remove."""
+
+
+def fake_action(latency: float):
+    """Return an action sleeping for latency seconds."""
+    def action(laure_data, session):
+        time.sleep(latency)
+        return True, {}
+    return action
+
+
+def fill_queue(queue: LocalQueue, messages: int, assignments: int):
+    """Write messages to the queue, spread among assignments."""
+    for number in range(messages):
+        queue.write_message({
+            'event_name': EVENT_NAME,
+            'data': {'assignment': {'id': f'assignment-{number % assignments}'}},
+        })
+
+
+def run(workers: int, messages: int, assignments: int, latency: float) -> float:
+    """Drain a queue with messages and return the throughput in messages per second."""
+    queue = LocalQueue()
+    fill_queue(queue, messages, assignments)
+    if workers > 1:
+        worker = ConcurrentWorker(logger_=logger, input_queue=queue, max_workers=workers)
+    else:
+        worker = Worker(logger_=logger, input_queue=queue)
+    worker.Session = FakeSession()
+
+    dispatch = {
+        EVENT_NAME: {
+            'name': 'benchmark',
+            'action': fake_action(latency),
+            'success_notification': None,
+            'failure_notification': None,
+        }
+    }
+    start = time.monotonic()
+    with mock.patch('briefy.leica.worker.MESSAGE_DISPATCH', dispatch):
+        while len(queue):
+            batch = queue.get_messages(num_messages=10)
+            if workers > 1:
+                worker.process_batch(batch)
+            else:
+                for message in batch:
+                    worker.process_message(message)
+                    message.delete()
+    elapsed = time.monotonic() - start
+    return messages / elapsed
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--assignments', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+    for workers in args.workers:
+        throughput = run(workers, args.messages, args.assignments, args.latency)
+        print(f'workers={workers}\tmessages/s={throughput:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Download the timezone polygons used by briefy.leica.utils.timezone.
+
+The polygons are released by https://github.com/evansiroky/timezone-boundary-builder and
+written, with the coordinates rounded to --precision decimal places, to the path read by the
+offline resolver. The image build runs it, so the download only happens there; ``make dist``
+stays offline and ``make timezones`` runs it by hand.
+
+The script does not import briefy.leica, so it runs before the application is configured.
+
+Usage::
+
+    python scripts/fetch_timezone_polygons.py --release 2020a
+"""
+import argparse
+import io
+import json
+import os
+import requests
+import sys
+import zipfile
+
+
+URL = 'https://github.com/evansiroky/timezone-boundary-builder/releases/download/{0}/{1}'
+
+ASSETS = ('timezones-with-oceans.geojson.zip', 'timezones.geojson.zip')
+"""Names of the GeoJSON asset, releases before ocean zones were added only have the second."""
+
+OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'src', 'briefy', 'leica', 'data', 'timezones.json'
+)
+"""Path of the bundled polygons, BUNDLED_POLYGONS_PATH on briefy.leica.utils.timezone."""
+
+
+def round_coordinates(value, precision: int):
+    """Round all coordinates of a GeoJSON geometry."""
+    if isinstance(value, list):
+        return [round_coordinates(item, precision) for item in value]
+    return round(value, precision)
+
+
+def download(release: str) -> dict:
+    """Download the GeoJSON polygons of a release.
+
+    :param release: Name of the release. i.e: 2020a
+    :return: GeoJSON FeatureCollection.
+    """
+    for asset in ASSETS:
+        url = URL.format(release, asset)
+        response = requests.get(url, timeout=300)
+        if response.status_code == 404:
+            continue
+        response.raise_for_status()
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            name = [name for name in archive.namelist() if name.endswith('json')][0]
+            return json.loads(archive.read(name).decode('utf-8'))
+    sys.exit(f'Release {release} has none of the assets: {", ".join(ASSETS)}')
+
+
+def main():
+    """Download, simplify and write the timezone polygons."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--release', default='2020a')
+    parser.add_argument('--precision', type=int, default=4)
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    data = download(args.release)
+    for feature in data['features']:
+        geometry = feature['geometry']
+        geometry['coordinates'] = round_coordinates(geometry['coordinates'], args.precision)
+        feature['properties'] = {'tzid': feature['properties']['tzid']}
+    if not data['features']:
+        sys.exit(f'Release {args.release} has no timezones.')
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    partial = f'{args.output}.partial'
+    with open(partial, 'w') as fh:
+        json.dump(data, fh, separators=(',', ':'))
+    os.replace(partial, args.output)
+    print(f'{len(data["features"])} timezones written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
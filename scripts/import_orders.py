@@ -1,13 +1,37 @@
-"""Import orders from tsv files to Leica."""
+"""Import orders from tsv files to Leica.
+
+Usage::
+
+    python scripts/import_orders.py [--bulk] [--chunk-size 1000]
+
+The bulk mode writes the orders with bulk inserts, committing every chunk, and can be resumed
+from the last committed chunk.
+"""
 from briefy.common.utils.data import Objectify
 from briefy.leica.db import db_configure
 from briefy.leica.db import Session
+from briefy.leica.models import LocalRole
 from briefy.leica.models import Order
+from briefy.leica.models import OrderLocation
 from briefy.leica.models import Project
+from briefy.leica.models.job.order import create_order_slug
+from briefy.leica.models.transition import transition_rows
+from briefy.leica.models.transition import WorkflowTransition
+from briefy.leica.tasks.dashboard import refresh_dashboard_stats
+from briefy.leica.utils.transitions import update_transition_index
+from datetime import datetime
 from pytz import country_timezones
+from pytz import utc
+from sqlalchemy.orm import ColumnProperty
+from zope.sqlalchemy import mark_changed
 
+import argparse
+import copy
 import csv
+import json
+import os
 import pycountry
+import time
 import transaction
 import uuid
 
@@ -262,18 +286,246 @@ class OrderImporter:
             self.add(record)
 
 
+IMPORT_NAMESPACE = uuid.UUID('6b9a4bb3-4d0e-4b8e-9d6c-2f3f7f1c5e21')
+"""Namespace of the ids of imported orders, derived from project, file and row number."""
+
+TEMPLATE_COLUMNS = ('type', 'state', 'state_history')
+"""Columns, without a default, copied from the template order: the initial workflow state."""
+
+
+class BulkOrderImporter(OrderImporter):
+    """Import orders in chunks, using bulk inserts.
+
+    The first order is created with the ORM, as in OrderImporter, and its rows are used as a
+    template for the other ones. Only the columns that are the same for every order of the
+    project are copied from it: the initial workflow state, the columns with defaults computed
+    from the project and the local roles. Every other column comes from the file or from its
+    default, and path, slug, transition index and workflow transitions are computed per order.
+    Bulk inserts do not fire ORM observers and do not create versions, so this mode is meant
+    for historical data that is already valid.
+
+    Each chunk is committed on its own and the last committed row is stored in a checkpoint
+    file, so an interrupted import continues from there. Order ids are derived from the row
+    number, so rows committed after the last checkpoint are skipped as well.
+    """
+
+    def __init__(self, file_name: str, project: Objectify, session: Session,
+                 chunk_size: int = 1000):
+        """Initialize bulk order importer.
+
+        :param file_name: file name with order records to be imported
+        :param project: existing project ID to add the orders
+        :param session: database session instance
+        :param chunk_size: number of orders committed at once
+        """
+        super().__init__(file_name, project, session)
+        self.chunk_size = chunk_size
+        self.checkpoint_path = f'{BASE_PATH}/{file_name}.checkpoint'
+        self.project_path = list(session.query(Project).get(project.id).path)
+        self.template = None
+        self.unmapped = set()
+
+    def read_checkpoint(self) -> int:
+        """Return the number of the last committed row, -1 if none."""
+        if not os.path.exists(self.checkpoint_path):
+            return -1
+        with open(self.checkpoint_path) as fin:
+            return json.load(fin)['row']
+
+    def write_checkpoint(self, row: int):
+        """Store the number of the last committed row."""
+        with open(self.checkpoint_path, 'w') as fout:
+            json.dump({'row': row}, fout)
+
+    def order_id(self, row: int) -> uuid.UUID:
+        """Return the id of the order imported from a row."""
+        return uuid.uuid5(IMPORT_NAMESPACE, f'{self.project.id}:{self.file_name}:{row}')
+
+    def transform_row(self, row: int, record: dict) -> dict:
+        """Transform a record, using the order id of its row."""
+        data = self.transform(record)
+        order_id = self.order_id(row)
+        data['id'] = order_id
+        data['location']['order_id'] = order_id
+        return data
+
+    def _fetch(self, table, column, value) -> list:
+        """Return the rows of table where column is value, as dictionaries keyed by column."""
+        rows = self.session.execute(table.select().where(column == value))
+        return [{column.key: row[column] for column in table.columns} for row in rows]
+
+    def create_template(self, data: dict):
+        """Create one order with the ORM and keep its rows as template."""
+        order = Order.create(copy.deepcopy(data))
+        self.session.add(order)
+        self.session.flush()
+        order_id = order.id
+        self.template = {
+            'order': {
+                table: self._fetch(table, table.c.id, order_id)[0]
+                for table in Order.__mapper__.tables
+            },
+            'location': {
+                table: self._fetch(table, table.c.order_id, order_id)[0]
+                for table in OrderLocation.__mapper__.tables
+            },
+            'local_roles': self._fetch(
+                LocalRole.__table__, LocalRole.__table__.c.item_id, order_id
+            ),
+        }
+
+    @staticmethod
+    def _base_row(table, template: dict) -> dict:
+        """Return the values of the columns of table not coming from the file.
+
+        :param table: Table of the row.
+        :param template: Row of the template order on this table.
+        :return: Row with the template values for TEMPLATE_COLUMNS and for columns with
+                 defaults computed from the project, the default value for columns with a
+                 scalar default and None for the other ones.
+        """
+        row = {}
+        for column in table.columns:
+            default = column.default
+            if column.key in TEMPLATE_COLUMNS or (default is not None and default.is_callable):
+                row[column.key] = template[column.key]
+            elif default is not None and default.is_scalar:
+                row[column.key] = default.arg
+            elif column.server_default is None:
+                row[column.key] = None
+        return row
+
+    def _apply(self, mapper, payload: dict, templates: dict) -> dict:
+        """Return the rows of each table of mapper, with payload applied on the base rows."""
+        rows = {table: self._base_row(table, row) for table, row in templates.items()}
+        for key, value in payload.items():
+            prop = mapper.attrs.get(key) or mapper.attrs.get(f'_{key}')
+            if not isinstance(prop, ColumnProperty):
+                self.unmapped.add(f'{mapper.class_.__name__}.{key}')
+                continue
+            for column in prop.columns:
+                if column.table in rows:
+                    rows[column.table][column.key] = value
+        return rows
+
+    def rows(self, data: dict) -> dict:
+        """Return the rows, per table, of one order."""
+        now = datetime.now(tz=utc)
+        order_id = data['id']
+        location = data.pop('location')
+        rows = self._apply(Order.__mapper__, data, self.template['order'])
+        rows.update(self._apply(OrderLocation.__mapper__, location, self.template['location']))
+        for table, row in rows.items():
+            if 'created_at' in row:
+                row['created_at'] = row['updated_at'] = now
+        items = Order.__mapper__.base_mapper.local_table
+        state_history = copy.deepcopy(rows[items]['state_history'])
+        rows[items].update(
+            slug=create_order_slug(),
+            path=self.project_path + [order_id],
+            state_history=state_history,
+        )
+        order = rows[Order.__table__]
+        order['timezone'] = location['timezone']
+        order['sort_created_at'] = now
+        order['transition_index'] = update_transition_index(None, state_history)
+        rows[WorkflowTransition.__table__] = transition_rows(
+            Objectify({'id': order_id, 'type': rows[items]['type']}), state_history
+        )
+        rows[LocalRole.__table__] = [
+            dict(role, id=uuid.uuid4(), item_id=order_id, created_at=now, updated_at=now)
+            for role in self.template['local_roles']
+        ]
+        return rows
+
+    def existing(self, ids: list) -> set:
+        """Return the ids already imported."""
+        items = Order.__mapper__.base_mapper.local_table
+        query = items.select().with_only_columns([items.c.id]).where(items.c.id.in_(ids))
+        return {row.id for row in self.session.execute(query)}
+
+    def insert(self, chunk: list) -> int:
+        """Insert one chunk of (row, record) and commit it.
+
+        :return: number of orders inserted
+        """
+        with transaction.manager:
+            data = [self.transform_row(row, record) for row, record in chunk]
+            existing = self.existing([item['id'] for item in data])
+            data = [item for item in data if item['id'] not in existing]
+            inserted = len(data)
+            if data and self.template is None:
+                self.create_template(data.pop(0))
+            tables = {}
+            for item in data:
+                for table, rows in self.rows(item).items():
+                    rows = rows if isinstance(rows, list) else [rows]
+                    tables.setdefault(table, []).extend(rows)
+            # sorted_tables respects the foreign keys: items, orders, orderlocations...
+            for table in Order.metadata.sorted_tables:
+                if tables.get(table):
+                    self.session.execute(table.insert(), tables[table])
+            mark_changed(self.session)
+        return inserted
+
+    def __call__(self):
+        """Start the import process, from the last checkpoint."""
+        last_row = self.read_checkpoint()
+        start = time.monotonic()
+        total = 0
+        chunk = []
+        for row, record in enumerate(self.records):
+            if row <= last_row:
+                continue
+            chunk.append((row, record))
+            if len(chunk) == self.chunk_size:
+                total += self._commit(chunk, start, total)
+                chunk = []
+        if chunk:
+            total += self._commit(chunk, start, total)
+        if self.unmapped:
+            print(f'Fields not imported in bulk mode: {", ".join(sorted(self.unmapped))}')
+        duration = time.monotonic() - start
+        print(f'{self.file_name}: {total} orders in {duration:.1f}s '
+              f'({total / duration if duration else 0:.0f} rows/s)')
+        return total
+
+    def _commit(self, chunk: list, start: float, total: int) -> int:
+        """Insert a chunk, store the checkpoint and report progress."""
+        inserted = self.insert(chunk)
+        self.write_checkpoint(chunk[-1][0])
+        total += inserted
+        duration = time.monotonic() - start
+        print(f'{self.file_name}: row {chunk[-1][0]}, {total} orders '
+              f'({total / duration if duration else 0:.0f} rows/s)')
+        return inserted
+
+
 def main():
     """Execute import script."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bulk', action='store_true', help='Use bulk inserts.')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
     for item in PROJECTS_TO_IMPORT:
         if not item.get('imported', False):
             session = db_configure(Session)
-            importer = OrderImporter(
-                item.get('file_name'),
-                Objectify(item.get('project')),
-                session
-            )
-            with transaction.manager:
+            project = Objectify(item.get('project'))
+            if args.bulk:
+                importer = BulkOrderImporter(
+                    item.get('file_name'), project, session, chunk_size=args.chunk_size
+                )
                 importer()
+            else:
+                importer = OrderImporter(item.get('file_name'), project, session)
+                with transaction.manager:
+                    importer()
+
+    if args.bulk:
+        # bulk inserts do not fire the hooks keeping the dashboard aggregates
+        with transaction.manager:
+            refresh_dashboard_stats()
 
 
 if __name__ == '__main__':
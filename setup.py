@@ -31,7 +31,6 @@ requires = [
     'sqlalchemy_continuum',
     'waitress',
     'wheel',
-    'workdays',
     'zope.component',
     'zope.configuration',
     'zope.event',
@@ -28,6 +28,8 @@ XMLConfig('configure.zcml', leica)()
 
 def includeme(config):
     """Configuration to be included by other services."""
+    from briefy.leica.utils.timezone import load_resolver
+    load_resolver()
     config.registry['db_session_factory'] = Session
     config.add_request_method(get_db, 'db', reify=True)
     config.include('briefy.ws')
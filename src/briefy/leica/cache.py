@@ -1,8 +1,22 @@
 """Initial briefy.leica cache configuration."""
 from briefy.common.cache import ICacheManager
 from briefy.leica.config import ENABLE_CACHE
+from briefy.leica.db import Session
+from functools import wraps
+from inspect import signature
+from itertools import chain
+from sqlalchemy import event
+from threading import Lock
 from zope.component import getUtility
 
+import hashlib
+import json
+import pickle
+import sqlalchemy as sa
+import transaction
+import typing as t
+import uuid
+
 
 def enable_cache(*args, **kwargs) -> bool:
     """Return True if cache enable, else False."""
@@ -11,3 +25,267 @@ def enable_cache(*args, **kwargs) -> bool:
 
 cache_manager = getUtility(ICacheManager)
 cache_region = cache_manager.region()
+
+
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        """Record a cache lookup."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _ratio(hits: int, misses: int) -> float:
+        """Return the ratio of hits on the lookups."""
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Ratio of lookups served from the cache."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return self._ratio(hits, misses)
+
+    def snapshot(self) -> dict:
+        """Return the current value of the counters."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {'hits': hits, 'misses': misses, 'hit_ratio': self._ratio(hits, misses)}
+
+    def reset(self):
+        """Reset the counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+serialization_stats = CacheStats()
+"""Counters for the cache of serialized objects."""
+
+
+def version_token(obj) -> str:
+    """Return a token identifying the current version of an object.
+
+    :param obj: Instance of a versioned model.
+    :return: String combining the id, version and last update of the object.
+    """
+    updated_at = getattr(obj, 'updated_at', None)
+    return '{0}:{1}:{2}:{3}'.format(
+        obj.__class__.__name__,
+        obj.id,
+        getattr(obj, 'version', ''),
+        updated_at.isoformat() if updated_at else ''
+    )
+
+
+GENERATION_KEY = 'leica.generation:{0}'
+"""Key, on the cache region, of the generation token of an item."""
+
+CHILDREN_GENERATION = '{0}:children'
+"""Generation of the children of an item, changed whenever one of them is written."""
+
+USERS_GENERATION = 'users'
+"""Generation changed whenever the public information of any user changes."""
+
+
+def _as_uuid(value) -> t.Optional[uuid.UUID]:
+    """Return value as an UUID, None if it is not a valid one."""
+    if isinstance(value, dict):
+        value = value.get('id')
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def generation_tokens(names: t.Sequence) -> t.List[str]:
+    """Return the generation tokens of many items, reading them with one cache lookup.
+
+    Missing tokens, never set or evicted, get a new random value, so entries cached under a
+    previous token are never reached again.
+
+    :param names: Item ids or USERS_GENERATION.
+    :return: List of tokens, in the same order.
+    """
+    keys = [GENERATION_KEY.format(name) for name in names]
+    values = cache_region.get_multi(keys)
+    tokens = []
+    missing = {}
+    for key, value in zip(keys, values):
+        if not isinstance(value, str):
+            value = missing.setdefault(key, uuid.uuid4().hex)
+        tokens.append(value)
+    if missing:
+        cache_region.set_multi(missing)
+    return tokens
+
+
+def bump_generations(names: t.Iterable):
+    """Change the generation tokens of many items, invalidating their cached serializations.
+
+    :param names: Item ids or USERS_GENERATION.
+    """
+    if not enable_cache():
+        return
+    mapping = {GENERATION_KEY.format(name): uuid.uuid4().hex for name in set(names)}
+    if mapping:
+        cache_region.set_multi(mapping)
+
+
+def changed_generations(obj) -> t.Set[str]:
+    """Return the generations changed when obj is inserted, updated or deleted.
+
+    An item changes its own generation and the children generation of its parent, so parents
+    embedding or counting their children are invalidated, but not their siblings. Local roles
+    and order locations change the generation of the item they belong to.
+    """
+    names = set()
+    item_id = _as_uuid(getattr(obj, 'id', None))
+    parent_attr = getattr(obj, '__parent_attr__', None)
+    if parent_attr:
+        parent_id = _as_uuid(getattr(obj, parent_attr, None))
+        if parent_id:
+            names.add(CHILDREN_GENERATION.format(parent_id))
+    else:
+        owner_id = _as_uuid(getattr(obj, 'item_id', None) or getattr(obj, 'order_id', None))
+        item_id = owner_id or item_id
+    if item_id:
+        names.add(str(item_id))
+    return names
+
+
+def dependencies_token(obj, related: t.Sequence[str] = (), children: bool = False) -> str:
+    """Return a token changing every time something embedded on the serialization changes.
+
+    The token combines the generations of the object, its ancestors, the related items, the
+    children of the object if they are embedded, and of the users. They are read from the
+    cache region, with one lookup, without querying the database.
+
+    :param obj: Object being serialized.
+    :param related: Names of columns of obj with ids of embedded items, i.e.: pool_id.
+    :param children: Children of the object are embedded or counted.
+    :return: String with the generation tokens.
+    """
+    values = [obj.id] + list(getattr(obj, 'path', None) or ())
+    values.extend(getattr(obj, name, None) for name in related)
+    names = {str(item_id) for item_id in (_as_uuid(value) for value in values) if item_id}
+    names = sorted(names) + [USERS_GENERATION]
+    if children:
+        names.append(CHILDREN_GENERATION.format(obj.id))
+    return ':'.join(generation_tokens(names))
+
+
+@event.listens_for(Session, 'after_flush')
+def generations_after_flush(session, flush_context):
+    """Change the generations of the items written by the flush, now and after the commit.
+
+    Changing them after the commit too drops serializations cached by other requests from
+    data read before the commit.
+    """
+    names = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        names.update(changed_generations(obj))
+    if names:
+        bump_generations_on_commit(names)
+
+
+def bump_generations_on_commit(names: t.Iterable):
+    """Change the generation tokens of many items now and after the current transaction commits.
+
+    :param names: Item ids or USERS_GENERATION.
+    """
+    names = set(names)
+    bump_generations(names)
+    txn = transaction.get()
+    pending = getattr(txn, '_leica_generations', None)
+    if pending is None:
+        pending = txn._leica_generations = set()
+        txn.addAfterCommitHook(_bump_after_commit, args=(pending, ))
+    pending.update(names)
+
+
+def _bump_after_commit(status: bool, names: set):
+    """After commit hook changing the generations written by the transaction."""
+    if status:
+        bump_generations(names)
+
+
+def serialization_key(obj, method_name: str, arguments: dict, dependencies: str = '') -> str:
+    """Build the cache key of a serialization of an object.
+
+    The key changes every time the object, or one of its dependencies, gets a new version,
+    so stale entries are never reached again and expire by themselves.
+
+    :param obj: Object being serialized.
+    :param method_name: Name of the serialization method.
+    :param arguments: Arguments passed to the serialization method (i.e. includes, excludes).
+    :param dependencies: Token of the dependencies, see :func:`dependencies_token`.
+    :return: Cache key.
+    """
+    tokens = [version_token(obj), dependencies]
+    normalized = {
+        key: sorted(value) if isinstance(value, (list, tuple, set)) else value
+        for key, value in arguments.items()
+    }
+    tokens.append(json.dumps(normalized, sort_keys=True, default=str))
+    digest = hashlib.sha1('|'.join(tokens).encode('utf-8')).hexdigest()
+    return 'leica.serialization:{0}:{1}:{2}:{3}'.format(
+        obj.__class__.__name__, obj.id, method_name, digest
+    )
+
+
+def is_clean(obj) -> bool:
+    """Check if the object is persisted and has no pending changes."""
+    state = sa.inspect(obj)
+    return state.persistent and not state.modified
+
+
+def cache_serialization(related: t.Sequence[str] = (), children: bool = False) -> t.Callable:
+    """Cache the result of a serialization method per object version.
+
+    The key also covers the generations of the ancestors, of the related items declared here
+    and of the users, changed when any of them, or their local roles and locations, are
+    flushed. Objects with changes not yet flushed are never cached. Values are stored pickled,
+    so each call gets its own copy and callers are free to change it.
+
+    :param related: Names of columns with ids of other embedded items, i.e.: pool_id.
+    :param children: Children of the object are embedded or counted on the serialization.
+    :return: Decorator.
+    """
+    def decorator(method: t.Callable) -> t.Callable:
+        method_signature = signature(method)
+        method_name = method.__name__
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not (enable_cache() and is_clean(self)):
+                return method(self, *args, **kwargs)
+            bound = method_signature.bind(self, *args, **kwargs)
+            arguments = {k: v for k, v in bound.arguments.items() if k != 'self'}
+            token = dependencies_token(self, related=related, children=children)
+            key = serialization_key(self, method_name, arguments, token)
+            hit = True
+
+            def creator():
+                nonlocal hit
+                hit = False
+                return pickle.dumps(method(self, *args, **kwargs), pickle.HIGHEST_PROTOCOL)
+
+            value = cache_region.get_or_create(key, creator)
+            serialization_stats.record(hit)
+            return pickle.loads(value)
+
+        return wrapper
+
+    return decorator
@@ -26,6 +26,40 @@ IMAGE_BUCKET = config(
 
 DATABASE_URL = config('DATABASE_URL',)
 
+# Assets: maximum number of assets accepted at once by the bulk ingestion endpoint
+ASSETS_BULK_MAX_ITEMS = config('ASSETS_BULK_MAX_ITEMS', default='500')
+# Assets: number of ingested assets moved, and updated, by each worker message
+ASSETS_BULK_MESSAGE_SIZE = config('ASSETS_BULK_MESSAGE_SIZE', default='25')
+
+# S3 transfers: number of moves between buckets running at the same time
+S3_TRANSFER_MAX_WORKERS = config('S3_TRANSFER_MAX_WORKERS', default='4')
+# S3 transfers: number of retries of a failed move
+S3_TRANSFER_RETRIES = config('S3_TRANSFER_RETRIES', default='3')
+# S3 transfers: delay, in seconds, before the first retry (doubled on each retry)
+S3_TRANSFER_RETRY_DELAY = config('S3_TRANSFER_RETRY_DELAY', default='0.5')
+# S3 transfers: local directory replacing S3, buckets are subdirectories (tests and benchmarks)
+S3_TRANSFER_LOCAL_PATH = config('S3_TRANSFER_LOCAL_PATH', default='')
+
+# Worker: number of messages processed concurrently (1 means serial processing)
+WORKER_MAX_WORKERS = config('WORKER_MAX_WORKERS', default='1')
+# Worker: maximum number of messages received at once
+WORKER_BATCH_SIZE = config('WORKER_BATCH_SIZE', default='10')
+
+# Timezones: GeoJSON file with the timezone polygons (empty to use the bundled one)
+TIMEZONE_POLYGONS_PATH = config('TIMEZONE_POLYGONS_PATH', default='')
+# Timezones: fail on startup if the polygons are not available, instead of using GeoNames
+TIMEZONE_POLYGONS_REQUIRED = config('TIMEZONE_POLYGONS_REQUIRED', casts.Boolean(), default=False)
+# Timezones: number of resolved coordinates kept in memory
+TIMEZONE_CACHE_SIZE = config('TIMEZONE_CACHE_SIZE', default='65536')
+# Timezones: decimal places of the cached coordinates (3 is roughly 100 meters)
+TIMEZONE_CACHE_PRECISION = config('TIMEZONE_CACHE_PRECISION', default='3')
+# Timezones: timeout, in seconds, of the GeoNames fallback
+TIMEZONE_REQUEST_TIMEOUT = config('TIMEZONE_REQUEST_TIMEOUT', default='5')
+
+# Business days: JSON file mapping country codes to lists of holidays (ISO dates),
+# none is shipped, without it only weekends are skipped
+BUSINESS_DAYS_HOLIDAYS_PATH = config('BUSINESS_DAYS_HOLIDAYS_PATH', default='')
+
 # Agoda custom config
 AGODA_DELIVERY_GDRIVE = config('AGODA_DELIVERY_GDRIVE', default='')
 
@@ -56,11 +90,33 @@ FILES_BASE = 'https://files.briefy.co' if _queue_suffix == 'live' else 'https://
 CRON_HOUR_JOB_TASKS = config('CRON_HOUR_JOB_TASKS', default='*')
 CRON_MINUTE_JOB_TASKS = config('CRON_MINUTE_JOB_TASKS', default='*/1')
 
+# dashboard aggregates reconciliation: cron hour and minute setting
+CRON_HOUR_DASHBOARD_STATS = config('CRON_HOUR_DASHBOARD_STATS', default='*')
+CRON_MINUTE_DASHBOARD_STATS = config('CRON_MINUTE_DASHBOARD_STATS', default='0')
+
+# pool counters reconciliation: cron hour and minute setting
+CRON_HOUR_POOL_COUNTERS = config('CRON_HOUR_POOL_COUNTERS', default='*')
+CRON_MINUTE_POOL_COUNTERS = config('CRON_MINUTE_POOL_COUNTERS', default='30')
+
+# job tasks: number of objects processed, and flushed, at once
+TASKS_CHUNK_SIZE = config('TASKS_CHUNK_SIZE', default='100')
+
+# job tasks: number of tasks executed at the same time
+TASKS_MAX_WORKERS = config('TASKS_MAX_WORKERS', default='5')
+
 # number of days before scheduled date to schedule
 SCHEDULE_DAYS_LIMIT = config('SCHEDULE_DAYS_LIMIT', default=1)
 
 # Cache
 ENABLE_CACHE = config('ENABLE_CACHE', casts.Boolean(), default=False)
+# Cache: number of project settings snapshots kept in memory
+PROJECT_SETTINGS_CACHE_SIZE = config('PROJECT_SETTINGS_CACHE_SIZE', default='1024')
+# Cache: number of users with public information kept in memory
+USER_INFO_CACHE_SIZE = config('USER_INFO_CACHE_SIZE', default='2048')
+# Cache: seconds the public information of a user is kept in memory
+USER_INFO_CACHE_TTL = config('USER_INFO_CACHE_TTL', default='600')
+# Cache: seconds between checks for users updated by other processes (0 disables it)
+USER_INFO_CACHE_SYNC_INTERVAL = config('USER_INFO_CACHE_SYNC_INTERVAL', default='15')
 
 # default 48 hs
 LATE_SUBMISSION_SECONDS = config('LATE_SUBMISSION_SECONDS', default='172800')
@@ -18,6 +18,7 @@ from briefy.leica.models.job.assignment import Assignment
 from briefy.leica.models.job.assignment import IAssignment  # noQA
 from briefy.leica.models.job.leadorder import LeadOrder
 from briefy.leica.models.job.location import OrderLocation
+from briefy.leica.models.job.notification import AssignmentNotification
 from briefy.leica.models.job.order import Order
 from briefy.leica.models.job.pool import Pool
 from briefy.leica.models.job.pool import ProfessionalsInPool
@@ -39,6 +40,7 @@ from briefy.leica.models.professional.location import AdditionalWorkingLocation
 from briefy.leica.models.professional.location import MainWorkingLocation
 from briefy.leica.models.professional.location import WorkingLocation  # noQA
 from briefy.leica.models.project import Project
+from briefy.leica.models.transition import WorkflowTransition
 from briefy.leica.models.user import CustomerUserProfile
 from briefy.leica.models.user import InternalUserProfile
 from briefy.leica.models.user import UserProfile
@@ -56,6 +58,7 @@ ALL_MODELS = [
     AdditionalWorkingLocation,
     Asset,
     Assignment,
+    AssignmentNotification,
     BillingInfo,
     Comment,
     Customer,
@@ -90,6 +93,7 @@ ALL_MODELS = [
     UserProfile,
     Video,
     Videographer,
+    WorkflowTransition,
     Youtube,
 ]
 
@@ -3,7 +3,7 @@ from briefy.common.db.mixins import asset
 from briefy.common.db.models import Item
 from briefy.leica.models import mixins
 from briefy.leica.models.asset import workflows
-from briefy.leica.models.mixins import get_public_user_info
+from briefy.leica.models.mixins import get_public_users_info
 from briefy.leica.utils import imaging
 from briefy.leica.utils.user import add_user_info_to_state_history
 from sqlalchemy import orm
@@ -14,6 +14,7 @@ from sqlalchemy_utils import UUIDType
 import colander
 import sqlalchemy as sa
 import sqlalchemy_utils as sautils
+import typing as t
 
 
 __summary_attributes__ = [
@@ -191,12 +192,14 @@ class Asset(asset.Asset, mixins.LeicaSubVersionedMixin, Item):
         data['image'] = self.image
         data['metadata'] = self.metadata_
         add_user_info_to_state_history(self.state_history)
-        data['professional'] = get_public_user_info(self.professional_id)
-        data['uploaded_by'] = get_public_user_info(self.uploaded_by)
-        data['is_valid'] = self.is_valid
+        users = get_public_users_info([self.professional_id, self.uploaded_by])
+        data['professional'] = users[str(self.professional_id)]
+        data['uploaded_by'] = users[str(self.uploaded_by)]
+        checks = self.check_requirements
+        data['is_valid'] = not checks
         data['invalid_checks'] = [
-            c['check'] for c in self.check_requirements
-        ]
+            c['check'] for c in checks
+        ] if isinstance(checks, list) else []
         return data
 
 
@@ -231,7 +234,7 @@ class Image(asset.ImageMixin, Asset):
         tech_requirements = self.tech_requirements
         asset_requirements = tech_requirements.get('asset') if tech_requirements else {}
         if asset_requirements:
-            response = imaging.check_image_constraints(metadata, asset_requirements)
+            response = imaging.get_validator(asset_requirements).validate(metadata)
         return response
 
 
@@ -293,3 +296,27 @@ class Video(asset.VideoMixin, Asset):
         """
         # TODO: Check requirements
         return True
+
+
+def check_images_requirements(images: t.Sequence[Image]) -> t.Dict[t.Any, list]:
+    """Compare the metadata of many images with their tech requirements.
+
+    Images are grouped by tech requirements, each group is checked by one compiled validator
+    and images with the same metadata are checked only once.
+
+    :param images: Images to be checked, usually all images of an Assignment.
+    :return: Dictionary mapping the image id to its validation failures, if any.
+    """
+    groups = {}
+    for image in images:
+        tech_requirements = image.tech_requirements
+        asset_requirements = tech_requirements.get('asset') if tech_requirements else {}
+        validator = imaging.get_validator(asset_requirements or {})
+        groups.setdefault(id(validator), (validator, []))[1].append(image)
+
+    response = {}
+    for validator, group in groups.values():
+        results = validator.validate_many([image.metadata_ for image in group])
+        for image, result in zip(group, results):
+            response[image.id] = result
+    return response
@@ -0,0 +1,221 @@
+"""Dashboard aggregates.
+
+Counters of Orders and Assignments grouped by every dimension used by the dashboards, so the
+dashboard queries read a few rows per project instead of aggregating all Orders and
+Assignments on each request.
+
+The counters are updated incrementally by the after_insert, after_update and after_delete
+hooks of Order and Assignment, in the same transaction as the change. The changes of a flush
+are merged and written at its end, in key order. Changes the hooks can not follow (i.e. a new
+OrderLocation country) are reconciled by
+:func:`briefy.leica.tasks.dashboard.refresh_dashboard_stats`.
+"""
+from briefy.leica.db import Base
+from briefy.leica.db import Session
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+
+import sqlalchemy as sa
+import sqlalchemy_utils as sautils
+import typing as t
+
+
+ORDER_DIMENSIONS = ('project_id', 'type', 'current_type', 'state', 'accepted')
+"""Dimensions of the order counters."""
+
+ASSIGNMENT_DIMENSIONS = (
+    'project_id', 'current_type', 'country', 'state', 'set_type', 'in_pool', 'professional_id'
+)
+"""Dimensions of the assignment counters."""
+
+
+order_stats = sa.Table(
+    'dashboard_order_stats',
+    Base.metadata,
+    sa.Column('key', sa.String(), primary_key=True),
+    sa.Column('project_id', sautils.UUIDType, nullable=False, index=True),
+    sa.Column('type', sa.String(50), nullable=True),
+    sa.Column('current_type', sa.String(50), nullable=True),
+    sa.Column('state', sa.String(100), nullable=True),
+    sa.Column('accepted', sa.Boolean(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False, default=0),
+)
+"""Number of Orders per project, type, current_type, state and accepted (accept_date is set)."""
+
+assignment_stats = sa.Table(
+    'dashboard_assignment_stats',
+    Base.metadata,
+    sa.Column('key', sa.String(), primary_key=True),
+    sa.Column('project_id', sautils.UUIDType, nullable=False, index=True),
+    sa.Column('current_type', sa.String(50), nullable=True),
+    sa.Column('country', sa.String(2), nullable=True, index=True),
+    sa.Column('state', sa.String(100), nullable=True),
+    sa.Column('set_type', sa.String(), nullable=True),
+    sa.Column('in_pool', sa.Boolean(), nullable=False),
+    sa.Column('professional_id', sautils.UUIDType, nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False, default=0),
+)
+"""Number of Assignments per project, order current_type, country, state, set_type, pool and
+professional."""
+
+
+def normalize_value(value: t.Any) -> t.Any:
+    """Return the plain value of choices and enums."""
+    value = getattr(value, 'code', value)
+    return getattr(value, 'value', value)
+
+
+def stats_key(dimensions: dict, names: t.Sequence[str]) -> str:
+    """Return the primary key of the counter of the given dimensions.
+
+    :param dimensions: Values of the dimensions.
+    :param names: Names of the dimensions, in order.
+    :return: Key of the counter.
+    """
+    values = [dimensions[name] for name in names]
+    return '|'.join('' if value is None else str(value) for value in values)
+
+
+def previous_value(target: Base, name: str) -> t.Any:
+    """Return the value of an attribute before the current flush.
+
+    :param target: Instance being flushed.
+    :param name: Name of the attribute, or of a property backed by the _name column.
+    :return: Value before the change, or the current value if it did not change.
+    """
+    attrs = sa.inspect(target).attrs
+    for attr_name in (name, f'_{name}'):
+        if attr_name in attrs.keys():
+            history = attrs[attr_name].history
+            if history.deleted:
+                return history.deleted[0]
+            break
+    return getattr(target, name)
+
+
+def order_dimensions(order: Base, previous: bool = False) -> dict:
+    """Return the dimensions of an Order.
+
+    :param order: Order instance.
+    :param previous: Use the values before the current flush.
+    :return: Dictionary with the values of ORDER_DIMENSIONS.
+    """
+    value = previous_value if previous else getattr
+    return {
+        'project_id': value(order, 'project_id'),
+        'type': order.type,
+        'current_type': value(order, 'current_type'),
+        'state': value(order, 'state'),
+        'accepted': value(order, 'accept_date') is not None,
+    }
+
+
+def assignment_dimensions(assignment: Base, previous: bool = False, **overrides) -> dict:
+    """Return the dimensions of an Assignment.
+
+    Values coming from the Order (project_id, current_type, country) are always the current
+    ones, unless passed on overrides.
+
+    :param assignment: Assignment instance.
+    :param previous: Use the values of the Assignment before the current flush.
+    :param overrides: Values replacing the computed dimensions.
+    :return: Dictionary with the values of ASSIGNMENT_DIMENSIONS.
+    """
+    value = previous_value if previous else getattr
+    order = assignment.order
+    location = order.location
+    dimensions = {
+        'project_id': order.project_id,
+        'current_type': order.current_type,
+        'country': normalize_value(location.country) if location else None,
+        'state': value(assignment, 'state'),
+        'set_type': normalize_value(value(assignment, 'set_type')),
+        'in_pool': value(assignment, 'pool_id') is not None,
+        'professional_id': value(assignment, 'professional_id'),
+    }
+    dimensions.update(overrides)
+    return dimensions
+
+
+DELTAS_KEY = 'leica.dashboard_deltas'
+"""Key, on Session.info, of the counter changes of the current flush."""
+
+
+def apply_delta(
+        session: sa.orm.Session,
+        table: sa.Table,
+        dimensions: dict,
+        delta: int
+):
+    """Add delta to the counter of the given dimensions on the current flush.
+
+    Changes are merged per counter and written by :func:`write_deltas` after the flush.
+
+    :param session: Session being flushed.
+    :param table: order_stats or assignment_stats.
+    :param dimensions: Values of the dimensions.
+    :param delta: Value to be added to the counter.
+    """
+    names = ORDER_DIMENSIONS if table is order_stats else ASSIGNMENT_DIMENSIONS
+    values = {name: dimensions[name] for name in names}
+    key = stats_key(values, names)
+    deltas = session.info.setdefault(DELTAS_KEY, {})
+    _, _, total = deltas.get((table.name, key), (table, values, 0))
+    deltas[(table.name, key)] = (table, values, total + delta)
+
+
+def move(
+        session: sa.orm.Session,
+        table: sa.Table,
+        old: t.Optional[dict],
+        new: t.Optional[dict]
+):
+    """Move one item from the counter of the old dimensions to the one of new dimensions.
+
+    :param session: Session being flushed.
+    :param table: order_stats or assignment_stats.
+    :param old: Previous dimensions, None for new items.
+    :param new: Current dimensions, None for deleted items.
+    """
+    if old == new:
+        return
+    if old is not None:
+        apply_delta(session, table, old, -1)
+    if new is not None:
+        apply_delta(session, table, new, 1)
+
+
+def write_deltas(session: sa.orm.Session) -> int:
+    """Write the counter changes of the last flush.
+
+    Counters are written sorted by table and key, so concurrent transactions always lock the
+    rows in the same order, and counters with no net change are not written at all.
+
+    :param session: Session that was flushed.
+    :return: Number of counters written.
+    """
+    deltas = session.info.pop(DELTAS_KEY, None) or {}
+    written = 0
+    for (_, key), (table, values, delta) in sorted(deltas.items(), key=lambda item: item[0]):
+        if not delta:
+            continue
+        statement = insert(table).values(key=key, total=delta, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={'total': table.c.total + statement.excluded.total}
+        )
+        session.execute(statement)
+        written += 1
+    return written
+
+
+@event.listens_for(Session, 'after_flush')
+def dashboard_stats_after_flush(session, flush_context):
+    """Write the counter changes collected by the Order and Assignment hooks."""
+    write_deltas(session)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def dashboard_stats_after_rollback(session, previous_transaction):
+    """Drop the counter changes of a failed flush."""
+    session.info.pop(DELTAS_KEY, None)
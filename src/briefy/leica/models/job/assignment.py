@@ -4,13 +4,17 @@ from briefy.common.db.models import Item
 from briefy.common.db.types import AwareDateTime
 from briefy.common.utils import schema
 from briefy.leica.cache import cache_manager
-from briefy.leica.cache import cache_region
-from briefy.leica.cache import enable_cache
+from briefy.leica.cache import cache_serialization
+from briefy.leica.db import Session
 from briefy.leica.models import mixins
+from briefy.leica.models.dashboard.stats import assignment_dimensions
+from briefy.leica.models.dashboard.stats import assignment_stats
+from briefy.leica.models.dashboard.stats import move
 from briefy.leica.models.job import workflows
 from briefy.leica.models.job.order import Order
 from briefy.leica.models.types import TimezoneType
-from briefy.leica.utils.transitions import get_transition_date_from_history
+from briefy.leica.utils.transitions import get_transition_count_from_index
+from briefy.leica.utils.transitions import get_transition_date_from_index
 from briefy.leica.utils.user import add_user_info_to_state_history
 from briefy.leica.vocabularies import AssetTypes
 from briefy.leica.vocabularies import TypesOfSetChoices
@@ -173,14 +177,28 @@ class AssignmentTitleComparator(BaseComparator):
         return transform
 
 
+ASSIGNMENT_RELATED = ('professional_id', 'pool_id')
+"""Columns with the ids of items embedded on the serialization of an Assignment."""
+
+
 @implementer(IAssignment)
 class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.AssignmentFinancialInfo,
-                 mixins.LeicaSubVersionedMixin, Item):
+                 mixins.TransitionIndexMixin, mixins.LeicaSubVersionedMixin, Item):
     """An Assignment within an Order."""
 
     _workflow = workflows.AssignmentWorkflow
 
-    __exclude_attributes__ = ['assets', 'comments', 'approvable_assets', 'active_order']
+    __versioned__ = {
+        'exclude': ['state_history', '_state_history', 'transition_index']
+    }
+    """SQLAlchemy Continuum settings.
+
+    The transition index changes on every transition, as state_history, so it is not versioned.
+    """
+
+    __exclude_attributes__ = [
+        'assets', 'comments', 'approvable_assets', 'active_order', 'transition_index'
+    ]
 
     __summary_attributes__ = __summary_attributes__
 
@@ -208,7 +226,7 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
         'excludes': [
             'state_history', 'state', 'order', 'comments',
             'professional', 'assets', 'project', 'location',
-            'pool', 'active_order'
+            'pool', 'active_order', 'transition_index'
         ],
         'overrides': __colander_alchemy_config_overrides__
     }
@@ -563,22 +581,15 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
     def _update_dates_from_history(self, keep_updated_at: bool = False):
         """Update dates from history."""
         updated_at = self.updated_at
-        state_history = self.state_history
-
-        def number_of_transitions(transition_name):
-            """Return the number of times one transition happened."""
-            total = [t for t in state_history if t['transition'] == transition_name]
-            return len(total)
+        index = self.update_transition_index()
 
         # updated refused times
-        self.refused_times = number_of_transitions('refuse')
+        self.refused_times = get_transition_count_from_index('refuse', index)
 
         def updated_if_changed(attr, t_list, first=False):
             """Update only if changed."""
             existing = getattr(self, attr)
-            new = get_transition_date_from_history(
-                t_list, state_history, first=first
-            )
+            new = get_transition_date_from_index(t_list, index, first=first)
             if new != existing:
                 setattr(self, attr, new)
 
@@ -615,9 +626,8 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
     @property
     def closed_on_date(self) -> datetime:
         """Return the date of the closing info for this assignment."""
-        state_history = self.state_history
         transitions = ('approve', 'perm_reject', 'cancel')
-        return get_transition_date_from_history(transitions, state_history)
+        return self.transition_date(transitions)
 
     @property
     def external_state(self) -> str:
@@ -655,7 +665,7 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
         """Return if this Assignment is assigned or not."""
         return True if (self.assignment_date and self.professional_id) else False
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=ASSIGNMENT_RELATED)
     def to_summary_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -666,7 +676,7 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
         data['category'] = self.category
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=ASSIGNMENT_RELATED)
     def to_listing_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -680,7 +690,7 @@ class Assignment(AssignmentDates, mixins.AssignmentRolesMixin, mixins.Assignment
         data = self._apply_actors_info(data)
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=ASSIGNMENT_RELATED)
     def to_dict(self, excludes: list=None, includes: list=None):
         """Return a dict representation of this object."""
         data = super().to_dict(excludes=excludes, includes=includes)
@@ -706,3 +716,49 @@ def assignment_after_update(mapper, connection, target):
     """Invalidate Assignment cache after instance update."""
     cache_manager.refresh(target)
     cache_manager.refresh(target.order)
+
+
+DELETED_DIMENSIONS_KEY = 'leica.deleted_assignment_dimensions'
+"""Key, on Session.info, of the dimensions of the Assignments deleted on the next flush."""
+
+
+@event.listens_for(Assignment, 'after_insert', propagate=True)
+def assignment_stats_after_insert(mapper, connection, target):
+    """Count a new Assignment on the dashboard aggregates."""
+    move(orm.object_session(target), assignment_stats, None, assignment_dimensions(target))
+
+
+@event.listens_for(Assignment, 'after_update', propagate=True)
+def assignment_stats_after_update(mapper, connection, target):
+    """Update the dashboard aggregates after an Assignment change."""
+    move(
+        orm.object_session(target),
+        assignment_stats,
+        assignment_dimensions(target, previous=True),
+        assignment_dimensions(target)
+    )
+
+
+@event.listens_for(Session, 'before_flush')
+def assignment_stats_before_flush(session, flush_context, instances):
+    """Read the dimensions of the Assignments to be deleted before the flush starts.
+
+    The dimensions depend on the Order and its location, which should not be loaded from
+    inside the flush.
+    """
+    deleted = {
+        obj.id: assignment_dimensions(obj, previous=True)
+        for obj in session.deleted if isinstance(obj, Assignment)
+    }
+    if deleted:
+        session.info[DELETED_DIMENSIONS_KEY] = deleted
+
+
+@event.listens_for(Assignment, 'after_delete', propagate=True)
+def assignment_stats_after_delete(mapper, connection, target):
+    """Remove a deleted Assignment from the dashboard aggregates."""
+    session = orm.object_session(target)
+    dimensions = session.info.get(DELETED_DIMENSIONS_KEY, {}).pop(target.id, None)
+    if dimensions is None:
+        dimensions = assignment_dimensions(target, previous=True)
+    move(session, assignment_stats, dimensions, None)
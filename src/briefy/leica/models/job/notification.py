@@ -0,0 +1,120 @@
+"""Notifications sent about an Assignment."""
+from briefy.common.db import datetime_utcnow
+from briefy.common.db.mixins import Timestamp
+from briefy.common.db.types import AwareDateTime
+from briefy.leica.db import Base
+from briefy.leica.db import Session
+from briefy.leica.vocabularies import NotificationKindChoices
+from sqlalchemy import and_
+from sqlalchemy import exists
+from sqlalchemy import orm
+from sqlalchemy.exc import IntegrityError
+
+import colander
+import sqlalchemy as sa
+import sqlalchemy_utils as sautils
+import uuid
+
+
+class AssignmentNotification(Timestamp, Base):
+    """Ledger of the notifications sent about an Assignment.
+
+    There is at most one notification of each kind per Assignment, enforced by a unique index,
+    so tasks can claim a notification before sending it.
+    """
+
+    __session__ = Session
+    __tablename__ = 'assignment_notifications'
+    __table_args__ = (
+        sa.UniqueConstraint('assignment_id', 'kind'),
+    )
+
+    __summary_attributes__ = ['id', 'assignment_id', 'kind', 'sent_at', 'comment_id']
+    __listing_attributes__ = __summary_attributes__
+
+    workflow = None  # this model do not have workflow instance
+
+    id = sa.Column(
+        sautils.UUIDType,
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    """Notification ID."""
+
+    assignment_id = sa.Column(
+        sautils.UUIDType,
+        sa.ForeignKey('assignments.id', ondelete='CASCADE'),
+        nullable=False,
+        info={
+            'colanderalchemy': {
+                'title': 'Assignment ID',
+                'validator': colander.uuid,
+                'typ': colander.String
+            }
+        }
+    )
+    """Assignment ID.
+
+    Foreignkey to :class:`briefy.leica.models.job.assignment.Assignment`.
+    """
+
+    kind = sa.Column(
+        sautils.ChoiceType(NotificationKindChoices, impl=sa.String()),
+        nullable=False,
+    )
+    """Kind of notification, i.e.: late_submission."""
+
+    sent_at = sa.Column(
+        AwareDateTime(),
+        nullable=False,
+        default=datetime_utcnow,
+    )
+    """Date and time the notification was sent."""
+
+    comment_id = sa.Column(
+        sautils.UUIDType,
+        sa.ForeignKey('comments.id', ondelete='SET NULL'),
+        nullable=True,
+    )
+    """ID of the Comment registering the notification on the Assignment."""
+
+    assignment = orm.relationship(
+        'Assignment',
+        backref=orm.backref('notifications', cascade='all, delete-orphan')
+    )
+    """Assignment.
+
+    Relationship with :class:`briefy.leica.models.job.assignment.Assignment`.
+    """
+
+    @classmethod
+    def sent(cls, assignment_id, kind: str) -> sa.sql.ClauseElement:
+        """Return a clause checking if a notification was already sent.
+
+        :param assignment_id: Assignment ID or column, i.e.: Assignment.id.
+        :param kind: Kind of notification.
+        :return: EXISTS clause, negate it to select Assignments not notified yet.
+        """
+        return exists().where(
+            and_(cls.assignment_id == assignment_id, cls.kind == kind)
+        )
+
+    @classmethod
+    def claim(cls, assignment_id, kind: str) -> 'AssignmentNotification':
+        """Register a notification, unless another one of the same kind exists.
+
+        The insert runs on a savepoint: concurrent claims wait for each other on the unique
+        index and only the first one succeeds.
+
+        :param assignment_id: Assignment ID.
+        :param kind: Kind of notification.
+        :return: New notification or None if it was already claimed.
+        """
+        session = cls.__session__
+        notification = cls(assignment_id=assignment_id, kind=kind)
+        try:
+            with session.begin_nested():
+                session.add(notification)
+        except IntegrityError:
+            return None
+        return notification
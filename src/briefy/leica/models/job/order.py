@@ -6,27 +6,36 @@ from briefy.common.utils import schema
 from briefy.common.vocabularies.categories import CategoryChoices
 from briefy.leica import logger
 from briefy.leica.cache import cache_manager
-from briefy.leica.cache import cache_region
-from briefy.leica.cache import enable_cache
+from briefy.leica.cache import cache_serialization
 from briefy.leica.models import mixins
+from briefy.leica.models.dashboard.stats import assignment_dimensions
+from briefy.leica.models.dashboard.stats import assignment_stats
+from briefy.leica.models.dashboard.stats import move
+from briefy.leica.models.dashboard.stats import order_dimensions
+from briefy.leica.models.dashboard.stats import order_stats
 from briefy.leica.models.descriptors import UnaryRelationshipWrapper
 from briefy.leica.models.job import workflows
 from briefy.leica.models.job.location import OrderLocation
 from briefy.leica.models.project import Project
+from briefy.leica.models.project.settings import get_project_settings
+from briefy.leica.models.project.settings import project_settings_for
 from briefy.leica.models.types import TimezoneType
+from briefy.leica.utils.business_days import get_calendar
 from briefy.leica.utils.charges import order_charges_update
-from briefy.leica.utils.transitions import get_transition_date_from_history
+from briefy.leica.utils.transitions import get_transition_count_from_index
+from briefy.leica.utils.transitions import get_transition_date_from_index
 from briefy.leica.utils.user import add_user_info_to_state_history
 from briefy.leica.vocabularies import AssetTypes
 from briefy.leica.vocabularies import OrderChargesChoices
 from briefy.leica.vocabularies import OrderInputSource
 from briefy.ws.errors import ValidationError
+from collections import defaultdict
 from datetime import datetime
 from dateutil.parser import parse
 from sqlalchemy import event
 from sqlalchemy import orm
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm.attributes import flag_modified
 
@@ -104,15 +113,13 @@ def create_order_slug():
 def get_customer_id_from_project(context):
     """Get customer_id for Order from the Project.customer_id."""
     project_id = context.current_parameters.get('project_id')
-    project = Project.get(project_id)
-    return project.customer_id
+    return project_settings_for(project_id).customer_id
 
 
 def get_category_from_project(context):
     """Get category for Order from the Project.category."""
     project_id = context.current_parameters.get('project_id')
-    project = Project.get(project_id)
-    return project.category
+    return project_settings_for(project_id).category
 
 
 def default_actual_order_price(context):
@@ -123,8 +130,8 @@ def default_actual_order_price(context):
     if current_type == 'order':
         project_id = context.current_parameters.get('project_id', None)
         if project_id:
-            project = Project.get(project_id)
-            default_price = project.price if project else default_price
+            settings = project_settings_for(project_id)
+            default_price = settings.price if settings else default_price
         actual_order_price = context.current_parameters.get('price', default_price)
     return actual_order_price
 
@@ -180,7 +187,8 @@ class RequirementItems(colander.SequenceSchema):
     items = RequirementItem()
 
 
-class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.OrderRolesMixin, Item):
+class Order(mixins.OrderFinancialInfo, mixins.TransitionIndexMixin, mixins.LeicaSubVersionedMixin,
+            mixins.OrderRolesMixin, Item):
     """An Order from the customer."""
 
     _workflow = workflows.OrderWorkflow
@@ -191,7 +199,9 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
     ]
     __listing_attributes__ = __listing_attributes__
 
-    __exclude_attributes__ = ['comments']
+    __exclude_attributes__ = [
+        'comments', 'availability_dates', 'transition_index', 'sort_created_at'
+    ]
 
     __to_dict_additional_attributes__ = [
         'availability', 'delivery', 'tech_requirements', 'price'
@@ -212,14 +222,18 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
             'state_history', 'state', 'project', 'comments', 'customer', 'type',
             '_project_manager', '_scout_manager', '_customer_user',
             'assignment', 'assignments', '_project_managers', '_scout_managers',
-            '_customer_users', 'total_order_price'
+            '_customer_users', 'total_order_price', 'availability_dates',
+            'acceptance_due_at', 'transition_index', 'sort_created_at'
         ],
         'overrides': __colander_alchemy_config_overrides__
 
     }
 
     __versioned__ = {
-        'exclude': ['state_history', '_state_history', 'scheduled_datetime', 'timezone']
+        'exclude': [
+            'state_history', '_state_history', 'scheduled_datetime', 'timezone',
+            'availability_dates', 'transition_index', 'acceptance_due_at', 'sort_created_at'
+        ]
     }
     """SQLAlchemy Continuum settings.
 
@@ -331,6 +345,13 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
     Relationship with :class:`briefy.leica.models.project.Project`.
     """
 
+    sort_created_at = sa.Column(AwareDateTime(), nullable=False)
+    """Copy of created_at, to sort the Orders of a Project.
+
+    created_at lives on the items table, so it is copied here to be indexed together with
+    project_id. Kept in sync by the before_insert and before_update listeners.
+    """
+
     project = orm.relationship(
         'Project',
         foreign_keys='Order.project_id'
@@ -668,6 +689,15 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
     Access to it should be done using the hybrid_property availability.
     """
 
+    availability_dates = sa.Column(
+        ARRAY(sa.DateTime(timezone=True)),
+        nullable=True,
+    )
+    """Availability dates, as a typed array.
+
+    Kept in sync by the availability setter, so availability can be checked in SQL.
+    """
+
     asset_types = sa.Column(
         JSONB,
         info={
@@ -749,6 +779,17 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
     )
     """Last delivery date of this Order."""
 
+    acceptance_due_at = sa.Column(
+        AwareDateTime(),
+        nullable=True,
+        index=True,
+    )
+    """Date this Order is automatically accepted, if still delivered.
+
+    The last delivery date plus the approval window of the Project, in business days of the
+    Order country. Updated when last_deliver_date changes.
+    """
+
     accept_date = sa.Column(
         AwareDateTime(),
         nullable=True,
@@ -797,7 +838,7 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
 
         if value and timezone and project:
             if not_pm:
-                availability_window = project.availability_window
+                availability_window = get_project_settings(project).availability_window
             else:
                 # allow less than 24hs for PMs but not in the past
                 availability_window = 0
@@ -816,7 +857,11 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
         elif value:
             logger.warn('Could not check availability dates. Order {id}'.format(id=self.id))
 
-        self._availability = validated_value if validated_value else value
+        availability = validated_value if validated_value else value
+        self._availability = availability
+        self.availability_dates = [
+            parse(date) if isinstance(date, str) else date for date in availability
+        ] if availability else None
 
     _delivery = sa.Column(
         'delivery',
@@ -876,8 +921,11 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
         )
         return query
 
-    tech_requirements = association_proxy('project', 'tech_requirements')
-    """Project tech requirements."""
+    @property
+    def tech_requirements(self) -> t.Optional[dict]:
+        """Project tech requirements, from the settings snapshot of the Project."""
+        project = self.project
+        return get_project_settings(project).tech_requirements if project else None
 
     timezone = sa.Column(TimezoneType(backend='pytz'), default='UTC')
     """Timezone in which this address is located.
@@ -903,22 +951,15 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
     def _update_dates_from_history(self, keep_updated_at: bool = False):
         """Update dates from history."""
         updated_at = self.updated_at
-        state_history = self.state_history
-
-        def number_of_transitions(transition_name):
-            """Return the number of times one transition happened."""
-            total = [t for t in state_history if t['transition'] == transition_name]
-            return len(total)
+        index = self.update_transition_index()
 
         # updated refused times
-        self.refused_times = number_of_transitions('refuse')
+        self.refused_times = get_transition_count_from_index('refuse', index)
 
         def updated_if_changed(attr, t_list, first=False):
             """Update only if changed."""
             existing = getattr(self, attr)
-            new = get_transition_date_from_history(
-                t_list, state_history, first=first
-            )
+            new = get_transition_date_from_index(t_list, index, first=first)
             if new != existing:
                 setattr(self, attr, new)
 
@@ -945,6 +986,33 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
         if scheduled_datetime and scheduled_datetime != existing:
             self.scheduled_datetime = scheduled_datetime
 
+    def compute_acceptance_due_at(
+            self,
+            last_deliver_date: datetime = None
+    ) -> t.Optional[datetime]:
+        """Compute the date this Order is automatically accepted.
+
+        Stored on acceptance_due_at on each delivery, and recomputed by
+        :func:`refresh_acceptance_due_at` when the approval window of the Project or the
+        country of the location change.
+
+        :param last_deliver_date: Last delivery date, defaults to the one of this Order.
+        :return: Acceptance due date, or None if the Order was not delivered.
+        """
+        last_deliver_date = last_deliver_date or self.last_deliver_date
+        if not last_deliver_date:
+            return None
+        location = self.location
+        calendar = get_calendar(location.country if location else None)
+        return calendar.offset(last_deliver_date, self.project.approval_window or 0)
+
+    @sautils.observes('last_deliver_date')
+    def _last_deliver_date_observer(self, last_deliver_date):
+        """Update acceptance_due_at on a new delivery."""
+        acceptance_due_at = self.compute_acceptance_due_at(last_deliver_date)
+        if acceptance_due_at != self.acceptance_due_at:
+            self.acceptance_due_at = acceptance_due_at
+
     # Relevant dates
     @sautils.observes('state')
     def _dates_observer(self, state):
@@ -963,7 +1031,7 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
             self.requirement_items = values.pop('requirement_items')
         super().update(values)
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(children=True)
     def to_summary_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -973,7 +1041,7 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
         data = super().to_summary_dict()
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(children=True)
     def to_listing_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -983,11 +1051,12 @@ class Order(mixins.OrderFinancialInfo, mixins.LeicaSubVersionedMixin, mixins.Ord
         data = super().to_listing_dict()
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(children=True)
     def to_dict(self, excludes: list=None, includes: list=None):
         """Return a dict representation of this object."""
         data = super().to_dict(excludes=excludes, includes=includes)
         data['assignments'] = []
+        self._prefetch_actors([self] + list(self.assignments))
         for assignment in self.assignments:
             assignment_data = assignment.to_summary_dict()
             assignment_data = assignment._apply_actors_info(assignment_data)
@@ -1020,3 +1089,130 @@ def order_after_update(mapper, connection, target):
     cache_manager.refresh(target)
     for assignment in target.assignments:
         cache_manager.refresh(assignment)
+
+
+@event.listens_for(Order, 'before_insert', propagate=True)
+def order_sort_created_at_before_insert(mapper, connection, target):
+    """Copy created_at of a new Order to sort_created_at."""
+    if target.created_at is None:
+        target.created_at = datetime_utcnow()
+    target.sort_created_at = target.created_at
+
+
+@event.listens_for(Order, 'before_update', propagate=True)
+def order_sort_created_at_before_update(mapper, connection, target):
+    """Copy a changed created_at to sort_created_at."""
+    if sa.inspect(target).attrs.created_at.history.has_changes():
+        target.sort_created_at = target.created_at
+
+
+@event.listens_for(Order, 'after_insert', propagate=True)
+def order_stats_after_insert(mapper, connection, target):
+    """Count a new Order on the dashboard aggregates."""
+    move(orm.object_session(target), order_stats, None, order_dimensions(target))
+
+
+@event.listens_for(Order, 'after_update', propagate=True)
+def order_stats_after_update(mapper, connection, target):
+    """Update the dashboard aggregates after an Order change.
+
+    Assignments are counted by the project and current_type of their Order, so they are
+    moved as well when one of those changes.
+    """
+    session = orm.object_session(target)
+    old = order_dimensions(target, previous=True)
+    new = order_dimensions(target)
+    move(session, order_stats, old, new)
+    order_keys = ('project_id', 'current_type')
+    if any(old[key] != new[key] for key in order_keys):
+        overrides = {key: old[key] for key in order_keys}
+        for assignment in target.assignments:
+            move(
+                session,
+                assignment_stats,
+                assignment_dimensions(assignment, **overrides),
+                assignment_dimensions(assignment)
+            )
+
+
+@event.listens_for(Order, 'after_delete', propagate=True)
+def order_stats_after_delete(mapper, connection, target):
+    """Remove a deleted Order from the dashboard aggregates."""
+    move(
+        orm.object_session(target), order_stats, order_dimensions(target, previous=True), None
+    )
+
+
+def refresh_acceptance_due_at(
+        connection: sa.engine.Connection,
+        clause: sa.sql.ClauseElement
+) -> int:
+    """Recompute acceptance_due_at of the delivered Orders matching clause.
+
+    :param connection: Connection of the current flush.
+    :param clause: Filter of the Orders, i.e.: orders.c.project_id == project_id.
+    :return: Number of Orders updated.
+    """
+    orders = Order.__table__
+    items = Item.__table__
+    projects = Project.__table__
+    locations = OrderLocation.__table__
+    query = sa.select([
+        orders.c.id,
+        orders.c.last_deliver_date,
+        orders.c.acceptance_due_at,
+        projects.c.approval_window,
+        locations.c.country,
+    ]).select_from(
+        orders.join(
+            items, items.c.id == orders.c.id
+        ).join(
+            projects, projects.c.id == orders.c.project_id
+        ).outerjoin(
+            locations, locations.c.order_id == orders.c.id
+        )
+    ).where(
+        sa.and_(
+            items.c.state == 'delivered',
+            orders.c.last_deliver_date.isnot(None),
+            clause,
+        )
+    )
+    by_country = defaultdict(list)
+    for row in connection.execute(query):
+        by_country[getattr(row.country, 'code', row.country)].append(row)
+
+    values = []
+    for country, rows in by_country.items():
+        dates = get_calendar(country).offsets(
+            [row.last_deliver_date for row in rows],
+            [row.approval_window or 0 for row in rows]
+        )
+        values.extend(
+            {'order_id': row.id, 'due': due}
+            for row, due in zip(rows, dates) if due != row.acceptance_due_at
+        )
+    if values:
+        connection.execute(
+            orders.update().where(
+                orders.c.id == sa.bindparam('order_id')
+            ).values(
+                acceptance_due_at=sa.bindparam('due')
+            ),
+            values
+        )
+    return len(values)
+
+
+@event.listens_for(Project, 'after_update', propagate=True)
+def project_acceptance_due_after_update(mapper, connection, target):
+    """Recompute the acceptance due date of delivered Orders on a new approval window."""
+    if sa.inspect(target).attrs.approval_window.history.has_changes():
+        refresh_acceptance_due_at(connection, Order.__table__.c.project_id == target.id)
+
+
+@event.listens_for(OrderLocation, 'after_update', propagate=True)
+def location_acceptance_due_after_update(mapper, connection, target):
+    """Recompute the acceptance due date of a delivered Order on a new country."""
+    if sa.inspect(target).attrs.country.history.has_changes():
+        refresh_acceptance_due_at(connection, Order.__table__.c.id == target.order_id)
@@ -6,17 +6,18 @@ from briefy.leica.db import Base
 from briefy.leica.db import Session
 from briefy.leica.models import Assignment
 from briefy.leica.models import mixins
+from briefy.leica.models.dashboard.stats import previous_value
 from briefy.leica.models.job import workflows
 from briefy.leica.models.professional import Professional
+from sqlalchemy import event
 from sqlalchemy import func
 from sqlalchemy import orm
 from sqlalchemy import select
-from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.sql import and_
 
 import colander
 import sqlalchemy as sa
 import sqlalchemy_utils as sautils
+import typing as t
 
 
 class ProfessionalsInPool(VersionMixin, Timestamp, Base):
@@ -94,9 +95,17 @@ class Pool(mixins.LeicaSubVersionedMixin, Item):
     __exclude_attributes__ = ['professionals', 'assignments', 'projects']
 
     __colanderalchemy_config__ = {'excludes': [
-        'state_history', 'state'
+        'state_history', 'state', 'total_assignments', 'live_assignments', 'total_professionals'
     ]}
 
+    __versioned__ = {
+        'exclude': ['total_assignments', 'live_assignments', 'total_professionals']
+    }
+    """SQLAlchemy Continuum settings.
+
+    Counters are not versioned, they change with the Assignments and Professionals.
+    """
+
     __raw_acl__ = (
         ('create', ('g:briefy_pm', 'g:briefy_finance', 'g:system')),
         ('list', ('g:briefy', 'g:system')),
@@ -127,8 +136,12 @@ class Pool(mixins.LeicaSubVersionedMixin, Item):
         'Professional',
         secondary='professionals_in_pool',
         back_populates='pools',
-        lazy='subquery',
+        lazy='select',
     )
+    """Professionals.
+
+    Loaded only when accessed, use :meth:`professionals_page` to read them in pages.
+    """
 
     # Projects
     projects = orm.relationship(
@@ -141,37 +154,153 @@ class Pool(mixins.LeicaSubVersionedMixin, Item):
     Relationship with :class:`briefy.leica.models.project.Project`.
     """
 
-    @declared_attr
-    def total_assignments(cls) -> int:
-        """Return the total number of Assignments in the Pool."""
-        stmt = select([func.count(Assignment.id)]).where(
-            and_(
-                Assignment.pool_id == cls.id,
-                Assignment.professional_id is not None,
-            )
-        ).as_scalar()
-        return orm.column_property(stmt)
-
-    @declared_attr
-    def live_assignments(cls) -> int:
-        """Return the number of 'active' Assignments in the Pool."""
-        stmt = select([func.count(Assignment.id)]).where(
-            and_(
-                Assignment.pool_id == cls.id,
-                # TODO: return this if necessary
-                # Assignment.professional_id is None,
-                Assignment.state == 'published'
+    total_assignments = sa.Column(
+        sa.Integer(), nullable=False, default=0, server_default='0'
+    )
+    """Number of Assignments in the Pool.
+
+    Kept up to date by the Assignment hooks, see :func:`pool_counters_after_update`.
+    """
+
+    live_assignments = sa.Column(
+        sa.Integer(), nullable=False, default=0, server_default='0'
+    )
+    """Number of published Assignments in the Pool.
+
+    Kept up to date by the Assignment hooks, see :func:`pool_counters_after_update`.
+    """
+
+    total_professionals = sa.Column(
+        sa.Integer(), nullable=False, default=0, server_default='0'
+    )
+    """Number of Professionals in the Pool.
+
+    Kept up to date after each flush, see :func:`pool_professionals_after_flush`.
+    """
+
+    def professionals_page(self, offset: int = 0, limit: int = 50) -> t.List[Professional]:
+        """Return one page of the Professionals in the Pool, ordered by title.
+
+        :param offset: Number of Professionals to skip.
+        :param limit: Maximum number of Professionals returned.
+        :return: List of Professionals.
+        """
+        return Professional.query().join(
+            ProfessionalsInPool, ProfessionalsInPool.professional_id == Professional.id
+        ).filter(
+            ProfessionalsInPool.pool_id == self.id
+        ).order_by(
+            Professional.title, Professional.id
+        ).offset(offset).limit(limit).all()
+
+
+def assignment_counters(pool_id, state: str) -> t.Optional[tuple]:
+    """Return the pool and the counters deltas of an Assignment.
+
+    :param pool_id: Pool of the Assignment.
+    :param state: State of the Assignment.
+    :return: Tuple with pool_id, total_assignments and live_assignments deltas, or None.
+    """
+    if pool_id is None:
+        return None
+    return pool_id, 1, 1 if state == 'published' else 0
+
+
+def apply_assignment_counters(
+        connection: sa.engine.Connection,
+        old: t.Optional[tuple],
+        new: t.Optional[tuple]
+):
+    """Move one Assignment from the counters of the old Pool to the ones of the new Pool.
+
+    :param connection: Connection of the current flush.
+    :param old: Result of assignment_counters before the change, None for new Assignments.
+    :param new: Result of assignment_counters after the change, None for deleted Assignments.
+    """
+    if old == new:
+        return
+    table = Pool.__table__
+    for counters, sign in ((old, -1), (new, 1)):
+        if counters is None:
+            continue
+        pool_id, total, live = counters
+        connection.execute(
+            table.update().where(table.c.id == pool_id).values(
+                total_assignments=table.c.total_assignments + sign * total,
+                live_assignments=table.c.live_assignments + sign * live,
             )
-        ).as_scalar()
-        return orm.column_property(stmt)
-
-    @declared_attr
-    def total_professionals(cls) -> int:
-        """Return the total number of Professionals in the Pool."""
-        stmt = select([func.count(Professional.id)]).where(
-            and_(
-                ProfessionalsInPool.professional_id == Professional.id,
-                ProfessionalsInPool.pool_id == cls.id
+        )
+
+
+@event.listens_for(Assignment, 'after_insert', propagate=True)
+def pool_counters_after_insert(mapper, connection, target):
+    """Count a new Assignment on its Pool."""
+    apply_assignment_counters(
+        connection, None, assignment_counters(target.pool_id, target.state)
+    )
+
+
+@event.listens_for(Assignment, 'after_update', propagate=True)
+def pool_counters_after_update(mapper, connection, target):
+    """Update the Pool counters after an Assignment changes Pool or state."""
+    apply_assignment_counters(
+        connection,
+        assignment_counters(
+            previous_value(target, 'pool_id'), previous_value(target, 'state')
+        ),
+        assignment_counters(target.pool_id, target.state)
+    )
+
+
+@event.listens_for(Assignment, 'after_delete', propagate=True)
+def pool_counters_after_delete(mapper, connection, target):
+    """Remove a deleted Assignment from the counters of its Pool."""
+    apply_assignment_counters(
+        connection,
+        assignment_counters(previous_value(target, 'pool_id'), previous_value(target, 'state')),
+        None
+    )
+
+
+def _changed_pools(session: orm.Session) -> set:
+    """Return the ids of Pools with Professionals added or removed on the current flush."""
+    pool_ids = set()
+    for obj in session.new | session.deleted:
+        if isinstance(obj, ProfessionalsInPool):
+            pool_ids.add(obj.pool_id)
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Pool):
+            history = sa.inspect(obj).attrs.professionals.history
+            if history.added or history.deleted:
+                pool_ids.add(obj.id)
+        elif isinstance(obj, Professional):
+            history = sa.inspect(obj).attrs.pools.history
+            pool_ids.update(pool.id for pool in history.added + history.deleted)
+    pool_ids.discard(None)
+    return pool_ids
+
+
+def professionals_count() -> sa.sql.ClauseElement:
+    """Return the number of Professionals of each Pool, correlated to the pools table."""
+    table = Pool.__table__
+    return select([func.count()]).where(
+        ProfessionalsInPool.__table__.c.pool_id == table.c.id
+    ).as_scalar()
+
+
+@event.listens_for(Session, 'after_flush')
+def pool_professionals_after_flush(session, flush_context):
+    """Recount the Professionals of Pools changed on the flush.
+
+    Professionals are usually added through the professionals and pools relationships, which
+    write the professionals_in_pool rows without mapper events, so the changed Pools are
+    recounted after the flush using the pool_id index.
+    """
+    pool_ids = _changed_pools(session)
+    if pool_ids:
+        table = Pool.__table__
+        session.execute(
+            table.update().where(table.c.id.in_(pool_ids)).values(
+                total_professionals=professionals_count()
             )
-        ).as_scalar()
-        return orm.column_property(stmt)
+        )
@@ -9,7 +9,6 @@ from briefy.leica.events.leadorder import LeadOrderUpdatedEvent
 from briefy.leica.models.job.workflows.base import BaseOrderWorkflow
 from briefy.leica.models.job.workflows.base import REQUIREMENTS_REQUIRED_FIELDS
 from briefy.leica.subscribers.utils import create_new_assignment_from_order
-from briefy.leica.utils.transitions import get_transition_date_from_history
 from briefy.ws.errors import ValidationError
 
 
@@ -130,11 +129,7 @@ class LeadOrderWorkflow(BaseOrderWorkflow):
         permission = True
         for assignment in leadorder.assignments:
             transitions = ('assign', 'self_assign', 'assign_pool', )
-            date = get_transition_date_from_history(
-                transitions,
-                assignment.state_history,
-                first=True
-            )
+            date = assignment.transition_date(transitions, first=True)
             if date:
                 permission = False
                 break
@@ -10,8 +10,12 @@ from briefy.common.db.mixins import SubItemMixin
 from briefy.common.db.mixins import VersionMixin
 from briefy.common.utilities.interfaces import IUserProfileQuery
 from briefy.common.utils import schema
-from briefy.common.utils.cache import timeout_cache
 from briefy.leica.db import Session
+from briefy.leica.utils.profile_cache import user_info_cache
+from briefy.leica.utils.transitions import get_transition_count_from_index
+from briefy.leica.utils.transitions import get_transition_date_from_index
+from briefy.leica.utils.transitions import update_transition_index
+from datetime import datetime
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -20,17 +24,25 @@ from zope.component import getUtility
 import colander
 import sqlalchemy as sa
 import sqlalchemy_utils as sautils
+import typing as t
 
 
-@timeout_cache(600, renew=False)
 def get_public_user_info(user_id: str) -> dict:
     """Retrieve user information from briefy.rolleiflex.
 
     :param user_id: Id for the user we want to query.
     :return: Dictionary with public user information.
     """
-    profile_service = getUtility(IUserProfileQuery)
-    return profile_service.get_data(user_id)
+    return user_info_cache.get(user_id)
+
+
+def get_public_users_info(user_ids: t.Iterable[str]) -> t.Dict[str, dict]:
+    """Retrieve the information of many users, querying the ones not cached at once.
+
+    :param user_ids: Ids for the users we want to query.
+    :return: Dictionary mapping each user id, as a string, to its public information.
+    """
+    return user_info_cache.get_many(user_ids)
 
 
 _ID_COLANDER = {
@@ -315,11 +327,66 @@ class OrderFinancialInfo:
         self._price = value
 
 
+class TransitionIndexMixin:
+    """Mixin keeping a compact index of the workflow transitions next to state_history."""
+
+    transition_index = sa.Column(JSONB, nullable=True)
+    """Index of the workflow transitions.
+
+    First and last dates and number of occurrences of each transition, see
+    :func:`briefy.leica.utils.transitions.update_transition_index`.
+    """
+
+    def update_transition_index(self) -> dict:
+        """Index the transitions appended to state_history since the last update.
+
+        :return: Updated transition index.
+        """
+        current = self.transition_index
+        index = update_transition_index(current, self.state_history)
+        if index != current:
+            self.transition_index = index
+        return index
+
+    def _current_transition_index(self) -> dict:
+        """Return the transition index, including transitions not indexed yet."""
+        index = self.transition_index
+        history = self.state_history
+        if not index or index.get('size') != len(history or []):
+            index = update_transition_index(index, history)
+        return index
+
+    def transition_date(self, transitions: t.Sequence[str], first: bool = False) -> datetime:
+        """Return the date of the first or last occurrence of the transitions.
+
+        :param transitions: Transition names.
+        :param first: Return the first occurrence instead of the last one.
+        :return: Date of the transition, or None if it never happened.
+        """
+        index = self._current_transition_index()
+        return get_transition_date_from_index(transitions, index, first=first)
+
+    def transition_count(self, transition: str) -> int:
+        """Return the number of times one transition happened."""
+        return get_transition_count_from_index(transition, self._current_transition_index())
+
+
 class BaseLeicaMixin:
     """Base mixin for all leica models."""
 
     __session__ = Session
 
+    @staticmethod
+    def _prefetch_actors(items: t.Iterable) -> None:
+        """Fetch the actors of a collection of items with the next missing user.
+
+        :param items: Items about to be serialized.
+        """
+        profile_service = getUtility(IUserProfileQuery)
+        prefetch = getattr(profile_service, 'prefetch_actors', None)
+        if prefetch:
+            prefetch([item.id for item in items])
+
     def _apply_actors_info(self, data: dict, additional_actors: list=None) -> dict:
         """Add actors info to data payload.
 
@@ -4,10 +4,11 @@ from briefy.common.utils import schema
 from briefy.common.utils.data import Objectify
 from briefy.common.vocabularies.categories import CategoryChoices
 from briefy.common.vocabularies.roles import Groups
-from briefy.leica.cache import cache_region
-from briefy.leica.cache import enable_cache
+from briefy.leica.cache import cache_serialization
 from briefy.leica.models import mixins
 from briefy.leica.models.project import workflows
+from briefy.leica.models.project.settings import get_project_settings
+from briefy.leica.models.project.settings import invalidate_project_settings
 from briefy.leica.utils.user import add_user_info_to_state_history
 from briefy.leica.vocabularies import AssetTypes
 from briefy.leica.vocabularies import OrderTypeChoices
@@ -56,6 +57,10 @@ DEFAULT_ADD_ORDER_ROLES = [
 ]
 
 
+PROJECT_RELATED = ('pool_id', )
+"""Columns with the ids of items embedded on the serialization of a Project."""
+
+
 class IProject(Interface):
     """Marker interface for Project."""
 
@@ -442,21 +447,7 @@ class Project(CommercialInfoMixin, mixins.ProjectRolesMixin,
 
         # (NB. Even with Objectify, there is no provision
         # for write-back any of the "dates" subfields yet)
-
-        return Objectify({
-            'tech_requirements': self.tech_requirements,
-            'delivery_config': self.delivery,
-            'dates': {
-                'cancellation_window': self.cancellation_window,
-                'availability_window': self.availability_window,
-                'approval_window': self.approval_window,
-            },
-            'permissions': {
-                'add_order': self.add_order_roles
-            },
-            'order_type': self.order_type,
-            'project_type': self.project_type
-        })
+        return get_project_settings(self).as_objectify()
 
     @settings.setter
     def settings(self, value: t.Union[Objectify, t.Mapping]):
@@ -583,7 +574,7 @@ class Project(CommercialInfoMixin, mixins.ProjectRolesMixin,
             customer = Item.get(customer_id)
             self.path = customer.path + [self.id]
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=PROJECT_RELATED, children=True)
     def to_summary_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -593,7 +584,7 @@ class Project(CommercialInfoMixin, mixins.ProjectRolesMixin,
         data = super().to_summary_dict()
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=PROJECT_RELATED, children=True)
     def to_listing_dict(self) -> dict:
         """Return a summarized version of the dict representation of this Class.
 
@@ -604,7 +595,7 @@ class Project(CommercialInfoMixin, mixins.ProjectRolesMixin,
         data = self._apply_actors_info(data)
         return data
 
-    @cache_region.cache_on_arguments(should_cache_fn=enable_cache)
+    @cache_serialization(related=PROJECT_RELATED, children=True)
     def to_dict(self, excludes: list=None, includes: list=None):
         """Return a dict representation of this object."""
         data = super().to_dict(excludes=excludes, includes=includes)
@@ -619,6 +610,8 @@ class Project(CommercialInfoMixin, mixins.ProjectRolesMixin,
 
 @event.listens_for(Project, 'after_update')
 def project_after_update(mapper, connection, target):
-    """Invalidate Project cache after instance update."""
-    project = target
-    cache_region.invalidate(project)
+    """Invalidate the Project settings snapshot after instance update.
+
+    Serializations are cached per version, a new version is never served an old entry.
+    """
+    invalidate_project_settings(target.id)
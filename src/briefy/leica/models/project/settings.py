@@ -0,0 +1,171 @@
+"""Snapshots of the configuration of a Project.
+
+Creating an Order, or validating an Asset, reads the configuration of the Project many times
+in the same request. :func:`get_project_settings` returns an immutable snapshot of it, kept in
+an in process LRU cache and keyed by the version of the Project, so a new version of the
+Project is never served an old snapshot.
+"""
+from briefy.common.utils.data import Objectify
+from briefy.leica.cache import CacheStats
+from briefy.leica.cache import is_clean
+from briefy.leica.cache import version_token
+from briefy.leica.config import PROJECT_SETTINGS_CACHE_SIZE
+from collections import OrderedDict
+from threading import Lock
+
+import typing as t
+
+
+class FrozenDict(dict):
+    """Dictionary that can not be changed.
+
+    Copies, including pickled ones, are plain dictionaries.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Project settings can not be changed.')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        """Copy and pickle as a plain dictionary."""
+        return dict, (dict(self), )
+
+
+def freeze(value):
+    """Return an immutable copy of a JSON like value."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Return a mutable copy of a value returned by freeze."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ProjectSettings:
+    """Immutable snapshot of the configuration of a Project."""
+
+    __slots__ = (
+        'project_id', 'version', 'customer_id', 'category', 'order_type', 'project_type',
+        'asset_types', 'price', 'price_currency', 'tech_requirements', 'delivery_config',
+        'cancellation_window', 'availability_window', 'approval_window', 'add_order_roles',
+    )
+
+    def __init__(self, project):
+        """Take the snapshot of a project.
+
+        :param project: Project instance.
+        """
+        values = {
+            'project_id': project.id,
+            'version': version_token(project),
+            'customer_id': project.customer_id,
+            'category': project.category,
+            'order_type': project.order_type,
+            'project_type': project.project_type,
+            'asset_types': freeze(project.asset_types or []),
+            'price': project.price,
+            'price_currency': project.price_currency,
+            'tech_requirements': freeze(project.tech_requirements),
+            'delivery_config': freeze(project.delivery),
+            'cancellation_window': project.cancellation_window,
+            'availability_window': project.availability_window,
+            'approval_window': project.approval_window,
+            'add_order_roles': freeze(project.add_order_roles or []),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        """Snapshots can not be changed."""
+        raise AttributeError('Project settings can not be changed.')
+
+    @property
+    def asset_requirements(self) -> dict:
+        """Tech requirements checked on each asset."""
+        tech_requirements = self.tech_requirements
+        return (tech_requirements.get('asset') if tech_requirements else None) or {}
+
+    def as_objectify(self) -> Objectify:
+        """Return the settings, as exposed by Project.settings.
+
+        :return: Objectify with a mutable copy of the settings.
+        """
+        return Objectify(thaw({
+            'tech_requirements': self.tech_requirements,
+            'delivery_config': self.delivery_config,
+            'dates': {
+                'cancellation_window': self.cancellation_window,
+                'availability_window': self.availability_window,
+                'approval_window': self.approval_window,
+            },
+            'permissions': {
+                'add_order': self.add_order_roles
+            },
+            'order_type': self.order_type,
+            'project_type': self.project_type
+        }))
+
+
+_snapshots = OrderedDict()
+_snapshots_lock = Lock()
+
+settings_stats = CacheStats()
+"""Counters for the cache of project settings."""
+
+
+def get_project_settings(project) -> ProjectSettings:
+    """Return the settings snapshot of a Project.
+
+    Projects with changes not yet flushed get a new snapshot, which is not cached.
+
+    :param project: Project instance.
+    :return: Settings snapshot.
+    """
+    if not is_clean(project):
+        return ProjectSettings(project)
+    key = str(project.id)
+    version = version_token(project)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            _snapshots.move_to_end(key)
+            settings_stats.record(True)
+            return snapshot
+    settings_stats.record(False)
+    snapshot = ProjectSettings(project)
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > int(PROJECT_SETTINGS_CACHE_SIZE):
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def invalidate_project_settings(project_id=None):
+    """Drop the snapshot of a Project, or all snapshots if project_id is None."""
+    with _snapshots_lock:
+        if project_id is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(str(project_id), None)
+
+
+def project_settings_for(project_id) -> t.Optional[ProjectSettings]:
+    """Return the settings snapshot of a Project given its id.
+
+    :param project_id: Project ID.
+    :return: Settings snapshot or None if the Project does not exist.
+    """
+    from briefy.leica.models import Project
+    project = Project.get(project_id) if project_id else None
+    return get_project_settings(project) if project else None
@@ -1,10 +1,19 @@
 """Customer Report models."""
 from briefy.leica.db import Base
 from briefy.leica.db import Session
+from briefy.leica.models import Item
+from briefy.leica.models import LocalRole
 from briefy.leica.models import Order
 from briefy.leica.models import Project
+from datetime import datetime
 from sqlalchemy import and_
+from sqlalchemy import exists
 from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+import sqlalchemy as sa
+import typing as t
 
 
 orders_project = select([
@@ -38,3 +47,67 @@ class OrdersByProjectReport(Base):
         'primary_key': [orders_project.c.order_id]
     }
     __session__ = Session
+
+
+items = Item.__table__
+orders = Order.__table__
+localroles = LocalRole.__table__
+
+# Indexes supporting orders_by_project: the project filter with the keyset ordering, and the
+# local role lookup.
+sa.Index(
+    'ix_orders_project_id_sort_created_at_id',
+    orders.c.project_id, orders.c.sort_created_at, orders.c.id
+)
+sa.Index('ix_localroles_item_id_principal_id', localroles.c.item_id, localroles.c.principal_id)
+
+
+def orders_by_project(
+        project_id: str,
+        principal_id: str,
+        after: t.Optional[t.Tuple[datetime, str]] = None,
+        limit: t.Optional[int] = None
+) -> Select:
+    """Select the orders of a project, if the principal has a local role on it.
+
+    Results are ordered by (created_at, id), so they can be paginated by keyset. Both come
+    from the orders table, with the copy of created_at in sort_created_at, so the project
+    filter and the ordering are served by the same index.
+
+    :param project_id: ID of the project.
+    :param principal_id: ID of the user requesting the report.
+    :param after: (created_at, id) of the last row of the previous page.
+    :param limit: Maximum number of rows to be returned.
+    :return: Select statement, with bound parameters.
+    """
+    project = items.alias('project')
+    has_role = exists().where(
+        and_(
+            localroles.c.item_id == orders.c.project_id,
+            localroles.c.principal_id == principal_id,
+        )
+    )
+    query = select([
+        items.c.slug,
+        orders.c.customer_order_id,
+        items.c.title,
+        project.c.title.label('project_title'),
+        items.c.state,
+        orders.c.sort_created_at.label('created_at'),
+        orders.c.scheduled_datetime,
+        orders.c.deliver_date,
+        orders.c.accept_date,
+        orders.c.timezone,
+        orders.c.id,
+    ]).select_from(
+        orders.join(
+            items, items.c.id == orders.c.id
+        ).join(
+            project, project.c.id == orders.c.project_id
+        )
+    ).where(
+        and_(orders.c.project_id == project_id, has_role)
+    )
+    if after:
+        query = query.where(tuple_(orders.c.sort_created_at, orders.c.id) > tuple_(*after))
+    return query.order_by(orders.c.sort_created_at, orders.c.id).limit(limit)
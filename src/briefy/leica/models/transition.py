@@ -0,0 +1,197 @@
+"""Append only log of the workflow transitions of all Items.
+
+Each entry appended to the state_history of an Item is also written as one row of
+workflow_transitions, in the same flush, so transitions can be queried with indexes instead
+of loading and parsing the state_history of every Item.
+"""
+from briefy.common.db.models import Item
+from briefy.common.db.types import AwareDateTime
+from briefy.leica.db import Base
+from briefy.leica.db import Session
+from datetime import datetime
+from dateutil.parser import parse
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy.orm.query import Query
+
+import sqlalchemy as sa
+import sqlalchemy_utils as sautils
+import typing as t
+import uuid
+
+
+class WorkflowTransition(Base):
+    """One workflow transition of an Item."""
+
+    __session__ = Session
+    __tablename__ = 'workflow_transitions'
+    __table_args__ = (
+        sa.UniqueConstraint('item_id', 'position'),
+        sa.Index('ix_workflow_transitions_type_transition_date', 'item_type', 'transition', 'date'),
+        sa.Index('ix_workflow_transitions_actor_transition_date', 'actor', 'transition', 'date'),
+    )
+
+    workflow = None  # this model do not have workflow instance
+
+    id = sa.Column(sautils.UUIDType, primary_key=True, default=uuid.uuid4)
+    """Transition ID."""
+
+    item_id = sa.Column(
+        sautils.UUIDType,
+        sa.ForeignKey('items.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    """ID of the Item."""
+
+    item_type = sa.Column(sa.String(50), nullable=False)
+    """Type of the Item, i.e.: order."""
+
+    position = sa.Column(sa.Integer(), nullable=False)
+    """Position of this transition in the state_history of the Item."""
+
+    transition = sa.Column(sa.String(100), nullable=True)
+    """Transition name, i.e.: refuse."""
+
+    from_state = sa.Column(sa.String(100), nullable=True)
+    """State before the transition."""
+
+    to_state = sa.Column(sa.String(100), nullable=True)
+    """State after the transition."""
+
+    actor = sa.Column(sautils.UUIDType, nullable=True)
+    """ID of the user executing the transition."""
+
+    date = sa.Column(AwareDateTime(), nullable=True)
+    """Date of the transition."""
+
+    @classmethod
+    def filter(
+            cls,
+            item_type: t.Optional[str] = None,
+            transitions: t.Sequence[str] = (),
+            since: t.Optional[datetime] = None,
+            until: t.Optional[datetime] = None,
+            actor: t.Optional[str] = None,
+            query: t.Optional[Query] = None,
+    ) -> Query:
+        """Return a query of transitions filtered by type, name, date and actor.
+
+        :param item_type: Type of the Items, i.e.: order.
+        :param transitions: Transition names.
+        :param since: Only transitions on or after this date.
+        :param until: Only transitions before this date.
+        :param actor: Only transitions executed by this user.
+        :param query: Base query, defaults to a query of WorkflowTransition.
+        :return: Query.
+        """
+        query = query if query is not None else cls.__session__.query(cls)
+        if item_type:
+            query = query.filter(cls.item_type == item_type)
+        if transitions:
+            query = query.filter(cls.transition.in_(transitions))
+        if since:
+            query = query.filter(cls.date >= since)
+        if until:
+            query = query.filter(cls.date < until)
+        if actor:
+            query = query.filter(cls.actor == actor)
+        return query
+
+
+def transition_rows(item: Item, history: t.Sequence[dict], start: int = 0) -> t.List[dict]:
+    """Return the workflow_transitions rows of the history entries from start.
+
+    :param item: Item the history belongs to.
+    :param history: Workflow history.
+    :param start: Position of the first entry.
+    :return: List of rows to be inserted.
+    """
+    rows = []
+    for position in range(start, len(history)):
+        entry = history[position]
+        actor = entry.get('actor')
+        actor = actor.get('id') if isinstance(actor, dict) else actor
+        date = entry.get('date')
+        rows.append({
+            'id': uuid.uuid4(),
+            'item_id': item.id,
+            'item_type': item.type,
+            'position': position,
+            'transition': entry.get('transition') or None,
+            'from_state': entry.get('from') or None,
+            'to_state': entry.get('to') or None,
+            'actor': actor or None,
+            'date': parse(date) if isinstance(date, str) else date,
+        })
+    return rows
+
+
+def _history_change(target: Item) -> t.Tuple[t.Optional[list], list]:
+    """Return the state_history before the current flush, or None if unknown, and the current.
+
+    :return: Tuple with the previous and the current history.
+    """
+    attr = sa.inspect(target).attrs['_state_history']
+    history = attr.history
+    current = attr.value or []
+    if not history.has_changes():
+        return current, current
+    previous = history.deleted[0] if history.deleted else None
+    if previous is current:
+        # changed in place, the previous value is lost
+        previous = None
+    return previous, current
+
+
+def _logged_count(connection: sa.engine.Connection, item_id) -> int:
+    """Return the number of transitions already logged for an Item."""
+    table = WorkflowTransition.__table__
+    query = sa.select([func.max(table.c.position)]).where(table.c.item_id == item_id)
+    position = connection.execute(query).scalar()
+    return 0 if position is None else position + 1
+
+
+def log_transitions(connection: sa.engine.Connection, target: Item, inserted: bool = False):
+    """Write the transitions appended to the state_history of target.
+
+    When the state_history was changed in place the previous value is lost, so only the
+    entries after the last logged position are written.
+
+    :param connection: Connection of the current flush.
+    :param target: Item being flushed.
+    :param inserted: Target is a new Item.
+    """
+    table = WorkflowTransition.__table__
+    previous, current = _history_change(target)
+    rewritten = False
+    if inserted:
+        start = 0
+    elif previous is current:
+        return
+    elif previous is None:
+        start = _logged_count(connection, target.id)
+        rewritten = start > len(current)
+    else:
+        start = len(previous)
+        rewritten = list(current[:start]) != list(previous)
+
+    if rewritten:
+        # history rewritten or truncated: log it again
+        connection.execute(table.delete().where(table.c.item_id == target.id))
+        start = 0
+
+    rows = transition_rows(target, current, start=start)
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(Item, 'after_insert', propagate=True)
+def workflow_transitions_after_insert(mapper, connection, target):
+    """Log the transitions of a new Item."""
+    log_transitions(connection, target, inserted=True)
+
+
+@event.listens_for(Item, 'after_update', propagate=True)
+def workflow_transitions_after_update(mapper, connection, target):
+    """Log the transitions appended to the state_history of an Item."""
+    log_transitions(connection, target)
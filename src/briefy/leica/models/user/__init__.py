@@ -3,13 +3,15 @@ from briefy.common.db.mixins.local_roles import add_local_role
 from briefy.common.db.mixins.local_roles import del_local_role
 from briefy.common.db.mixins.local_roles import set_local_roles_by_principal
 from briefy.common.db.models import Item
-from briefy.common.db.models.local_role import LocalRole
 from briefy.common.utils import schema
 from briefy.leica.models import Customer
 from briefy.leica.models import mixins
 from briefy.leica.models.user import workflows
+from briefy.leica.utils.local_roles import get_principal_roles
+from briefy.leica.utils.profile_cache import invalidate_user_info
 from briefy.leica.utils.user import add_user_info_to_state_history
 from copy import deepcopy
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy_utils import UUIDType
@@ -196,27 +198,13 @@ class CustomerUserProfile(UserProfile):
     @hybrid_property
     def project_ids(self):
         """Return a list of project ids related to the customer the user belongs."""
-        roles = LocalRole.query().filter(
-            LocalRole.item_type == 'project',
-            LocalRole.principal_id == self.id
-        )
-        return [lr.item_id for lr in roles]
+        return get_principal_roles(self.id).item_ids('project')
 
     @hybrid_property
     def _project_roles(self):
         """Local roles of this user in the Customer context as project_user."""
-        roles = LocalRole.query().filter(
-            LocalRole.item_type == 'project',
-            LocalRole.principal_id == self.id
-        )
-        role_map = {lr.item_id: lr.role_name for lr in roles}
-        result = {}
-        for project_id, role_name in role_map.items():
-            if not result.get(str(project_id)):
-                result[str(project_id)] = [role_name]
-            else:
-                result[str(project_id)].append(role_name)
-        return result
+        roles = get_principal_roles(self.id).roles('project')
+        return {str(project_id): role_names for project_id, role_names in roles.items()}
 
     @hybrid_property
     def project_roles(self):
@@ -233,12 +221,8 @@ class CustomerUserProfile(UserProfile):
 
     def _project_ids_by_role(self, role_name: str) -> list:
         """Return the list of projects ids the user has a local role."""
-        roles = LocalRole.query().filter(
-            LocalRole.item_type == 'project',
-            LocalRole.principal_id == self.id,
-            LocalRole.role_name == role_name
-        )
-        return [str(lr.item_id) for lr in roles]
+        project_ids = get_principal_roles(self.id).item_ids('project', role_name)
+        return [str(project_id) for project_id in project_ids]
 
     def _update_projects_by_role(self, role_name: str, new_project_ids: list) -> list:
         """Update the list of projects the user has a local role."""
@@ -329,3 +313,9 @@ class InternalUserProfile(UserProfile):
               'missing': colander.drop,
               'typ': colander.String}}
     )
+
+
+@event.listens_for(UserProfile, 'after_update', propagate=True)
+def user_profile_after_update(mapper, connection, target):
+    """Invalidate the cached public information of the user after instance update."""
+    invalidate_user_info(target.id)
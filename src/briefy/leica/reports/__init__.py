@@ -1,10 +1,11 @@
 """Leica Reports package."""
-from briefy.leica.utils.transitions import get_transition_date_from_history
 from briefy.leica.vocabularies import AssetTypes
 from datetime import datetime
 from dateutil import parser
 from decimal import Decimal
 from io import StringIO
+from typing import Iterable
+from typing import Iterator
 from typing import Sequence
 
 import csv
@@ -14,14 +15,22 @@ DATETIME_EXPORT = '%Y-%m-%d %H:%M:%S'
 DATETIME_TRANSFORM01 = '%Y-%m-%dT%H:%M:%S'
 DATETIME_TRANSFORM02 = '%Y-%m-%dT%H:%M:%S.%f'
 
+CSV_CHUNK_SIZE = 64 * 1024
 
-def export_date_from_history(
-        state_history: list,
+
+def export_transition_date(
+        record: object,
         transitions: tuple = (),
         first: bool = False
 ) -> datetime:
-    """Convert workflow dates in str format to datetime."""
-    date = get_transition_date_from_history(transitions, state_history, first=first)
+    """Convert the date of a transition, read from the transition index, to datetime.
+
+    :param record: Object with the TransitionIndexMixin.
+    :param transitions: Transition names.
+    :param first: Use the first occurrence of the transitions.
+    :return: Date of the transition, or None if it never happened.
+    """
+    date = record.transition_date(transitions, first=first)
     date = parser.parse(date) if date else None
     return date
 
@@ -68,6 +77,40 @@ def records_to_csv(records: Sequence, fieldnames: Sequence) -> StringIO:
     return fout
 
 
+def iter_csv(
+        records: Iterable,
+        fieldnames: Sequence,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        **fmtparams
+) -> Iterator[str]:
+    """Yield a CSV document in chunks of, roughly, chunk_size characters.
+
+    The header is yielded as soon as the generator is consumed, before the first record is
+    requested, and only the current chunk is kept in memory.
+
+    :param records: Iterable of dictionaries, keys not in fieldnames are ignored.
+    :param fieldnames: Columns of the CSV document.
+    :param chunk_size: Number of characters to buffer before yielding a chunk.
+    :param fmtparams: Formatting parameters passed to the csv writer.
+    :return: Iterator of strings.
+    """
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore', **fmtparams)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for data in records:
+        writer.writerow(data)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
 def export_asset_types(asset_types: Sequence) -> str:
     """Process the asset types list and return its user friendly labels.
 
@@ -1,10 +1,10 @@
 """Order reports."""
 from briefy.common.utilities.interfaces import IUserProfileQuery
 from briefy.leica.models import Assignment
-from briefy.leica.reports import export_date_from_history
 from briefy.leica.reports import export_datetime
 from briefy.leica.reports import export_location
 from briefy.leica.reports import export_money_to_fixed_point
+from briefy.leica.reports import export_transition_date
 from briefy.leica.reports.base import BaseReport
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.query import Query
@@ -62,11 +62,10 @@ class AllAssignments(BaseReport):
         :return: Dictionary with data already transformed.
         """
         project = record.order.project
-        history = record.state_history
         street, locality, country = export_location(record.location)
-        last_approval_date = export_date_from_history(history, ('approve',), first=False)
-        last_refusal_date = export_date_from_history(history, ('refuse',), first=False)
-        complete_date = export_date_from_history(history, ('complete',), first=True)
+        last_approval_date = export_transition_date(record, ('approve',), first=False)
+        last_refusal_date = export_transition_date(record, ('refuse',), first=False)
+        complete_date = export_transition_date(record, ('complete',), first=True)
         asset_types = ','.join(record.asset_types)
 
         payload = {
@@ -227,7 +226,6 @@ class AssignmentsQAFollowUP(ActiveAssignments):
         profile_service = getUtility(IUserProfileQuery)
 
         p = ActiveAssignments.transform(record)
-        history = record.state_history
         customer = record.project.customer
         p['customer_name'] = customer.title
         p['briefy_assignment_id'] = p['briefy_id']
@@ -235,9 +233,9 @@ class AssignmentsQAFollowUP(ActiveAssignments):
         if record.assignment_internal_qa:
             data = profile_service.get_data(str(record.assignment_internal_qa[0]))
             p['responsible_qa_manager'] = data['fullname']
-        p['first_rejection_date'] = export_date_from_history(history, ('reject',), first=True)
-        p['last_rejection_date'] = export_date_from_history(history, ('reject',), first=False)
-        p['first_approval_date'] = export_date_from_history(history, ('approve',), first=True)
-        p['first_refusal_date'] = export_date_from_history(history, ('refuse',), first=True)
+        p['first_rejection_date'] = export_transition_date(record, ('reject',), first=True)
+        p['last_rejection_date'] = export_transition_date(record, ('reject',), first=False)
+        p['first_approval_date'] = export_transition_date(record, ('approve',), first=True)
+        p['first_refusal_date'] = export_transition_date(record, ('refuse',), first=True)
 
         return p
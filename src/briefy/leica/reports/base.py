@@ -1,15 +1,21 @@
 """Base report class."""
 from briefy.common.db import Base
+from briefy.leica.reports import iter_csv
 from briefy.leica.reports import records_to_csv
 from io import StringIO
 from sqlalchemy.orm.query import Query
 
+import typing as t
+
 
 class BaseReport:
     """Base report."""
 
     fieldnames = ()
 
+    batch_size = 500
+    """Number of rows fetched from the server side cursor at a time when streaming."""
+
     @property
     def _query_(self) -> Query:
         """Return the query for this report.
@@ -25,6 +31,24 @@ class BaseReport:
         results = query.all()
         return results
 
+    def iter_records(self) -> t.Iterator:
+        """Iterate over the records using a server side cursor.
+
+        Rows are fetched in batches of batch_size, so the whole result set is never held
+        in memory.
+        """
+        query = self._query_
+        return query.yield_per(self.batch_size)
+
+    def check(self):
+        """Read and transform the first batch of records.
+
+        Views streaming the report call it inside the request transaction, so errors are
+        raised before the response status is sent.
+        """
+        for record in self._query_.limit(self.batch_size):
+            self.transform(record)
+
     @staticmethod
     def transform(record: Base) -> dict:
         """Transform a record and result a record.
@@ -46,3 +70,11 @@ class BaseReport:
         for record in raw_records:
             records.append(self.transform(record))
         return records_to_csv(records, self.fieldnames)
+
+    def stream(self) -> t.Iterator[str]:
+        """Execute this report, yielding the CSV content in chunks.
+
+        :return: An iterator of strings with the result.
+        """
+        records = (self.transform(record) for record in self.iter_records())
+        return iter_csv(records, self.fieldnames, delimiter='\t')
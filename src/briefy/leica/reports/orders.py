@@ -1,10 +1,10 @@
 """Order reports."""
 from briefy.leica.models import Order
 from briefy.leica.reports import export_asset_types
-from briefy.leica.reports import export_date_from_history
 from briefy.leica.reports import export_datetime
 from briefy.leica.reports import export_location
 from briefy.leica.reports import export_money_to_fixed_point
+from briefy.leica.reports import export_transition_date
 from briefy.leica.reports.base import BaseReport
 from sqlalchemy.orm.query import Query
 
@@ -60,9 +60,8 @@ class AllOrders(BaseReport):
         :param record: Order to be transformed.
         :return: Dictionary with data already transformed.
         """
-        state_history = record.state_history
-        last_refusal_date = export_date_from_history(state_history, ('refuse',), first=False)
-        accept_date = export_date_from_history(state_history, ('accept',), first=True)
+        last_refusal_date = export_transition_date(record, ('refuse',), first=False)
+        accept_date = export_transition_date(record, ('accept',), first=True)
         street, locality, country = export_location(record.location)
         asset_types = export_asset_types(record.asset_types)
 
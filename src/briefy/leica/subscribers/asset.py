@@ -4,7 +4,7 @@ from briefy.leica.events.asset import AssetCreatedEvent
 from briefy.leica.events.asset import AssetUpdatedEvent
 from briefy.leica.subscribers import safe_update_metadata
 from briefy.leica.subscribers import safe_workflow_trigger_transitions
-from briefy.leica.utils import s3
+from briefy.leica.utils.ingestion import queue_source_change
 from pyramid.events import subscriber
 
 
@@ -12,8 +12,7 @@ from pyramid.events import subscriber
 def asset_created_handler(event):
     """Handle asset created event."""
     obj = event.obj
-    source_path = obj.source_path
-    s3.move_asset_source_file(source_path)
+    queue_source_change(obj)
     transitions = [('submit', ''), ]
     safe_workflow_trigger_transitions(event, transitions=transitions)
 
@@ -25,9 +24,10 @@ def asset_updated_handler(event):
     last_version = obj.versions[-1]
     changeset = last_version.changeset
     if 'source_path' in changeset:
-        source_path = obj.source_path
-        s3.move_asset_source_file(source_path)
-    safe_update_metadata(obj)
+        # metadata is fetched by the worker, once the new file is on the image bucket
+        queue_source_change(obj, update_metadata=True)
+    else:
+        safe_update_metadata(obj)
 
 
 def asset_submit(event):
@@ -36,12 +36,13 @@ def asset_submit(event):
     transitions = []
     # Impersonate the System here
     event.user = SystemUser
-    if obj.is_valid:
+    checks = obj.check_requirements
+    if not checks:
         transitions.append(
             ('validate', 'Machine check approved')
         )
     else:
-        error_message = '\n'.join([c['text'] for c in obj.check_requirements])
+        error_message = '\n'.join([c['text'] for c in checks])
         transitions.append(
             ('invalidate', error_message)
         )
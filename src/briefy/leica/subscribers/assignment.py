@@ -6,7 +6,6 @@ from briefy.leica.events.assignment import AssignmentCreatedEvent
 from briefy.leica.events.assignment import AssignmentUpdatedEvent
 from briefy.leica.models import Professional
 from briefy.leica.subscribers import safe_workflow_trigger_transitions
-from briefy.leica.subscribers.utils import apply_local_roles_from_parent
 from briefy.leica.subscribers.utils import create_comment_from_wf_transition
 from pyramid.events import subscriber
 
@@ -22,10 +21,6 @@ def assignment_updated_handler(event):
 @subscriber(AssignmentCreatedEvent)
 def assignment_created_handler(event):
     """Handle Assignment created event."""
-    assignment = event.obj
-    order = assignment.order
-    add_roles = ('project_managers', )
-    apply_local_roles_from_parent(assignment, order, add_roles)
     transitions = [('submit', ''), ]
     safe_workflow_trigger_transitions(event, transitions=transitions)
 
@@ -2,8 +2,8 @@
 from briefy.leica.cache import cache_manager
 from briefy.leica.events.leadorder import LeadOrderCreatedEvent
 from briefy.leica.events.leadorder import LeadOrderUpdatedEvent
+from briefy.leica.models.project.settings import get_project_settings
 from briefy.leica.subscribers import order as order_subscribers
-from briefy.leica.subscribers.utils import apply_local_roles_from_parent
 from pyramid.events import subscriber
 
 
@@ -20,17 +20,16 @@ def leadorder_created_handler(event):
     leadorder = event.obj
     request = event.request
     project = leadorder.project
+    settings = get_project_settings(project)
     # First set price and price_currency based on the project
-    price = request.validated.get('price') or project.price
+    price = request.validated.get('price') or settings.price
     leadorder.price = price
     leadorder.actual_order_price = 0
-    price_currency = project.price_currency
+    price_currency = settings.price_currency
     leadorder.price_currency = price_currency
     if not leadorder.asset_types:
-        leadorder.asset_types = project.asset_types[:1]
+        leadorder.asset_types = list(settings.asset_types[:1])
 
-    add_roles = ('customer_users', 'project_managers')
-    apply_local_roles_from_parent(leadorder, project, add_roles)
     location = request.validated.get('location', None)
     if not leadorder.location and location:
         # force this because sometimes the obj.id is not available before the flush
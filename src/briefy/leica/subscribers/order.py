@@ -3,7 +3,7 @@ from briefy.common.vocabularies.roles import Groups as G
 from briefy.leica.cache import cache_manager
 from briefy.leica.events.order import OrderCreatedEvent
 from briefy.leica.events.order import OrderUpdatedEvent
-from briefy.leica.subscribers.utils import apply_local_roles_from_parent
+from briefy.leica.models.project.settings import get_project_settings
 from briefy.leica.subscribers.utils import create_comment_from_wf_transition
 from briefy.leica.subscribers.utils import create_new_assignment_from_order
 from pyramid.events import subscriber
@@ -22,17 +22,16 @@ def order_created_handler(event):
     order = event.obj
     request = event.request
     project = order.project
+    settings = get_project_settings(project)
     # First set price and price_currency based on the project
-    price = request.validated.get('price') or project.price
+    price = request.validated.get('price') or settings.price
     order.price = price
     order.actual_order_price = price
-    price_currency = project.price_currency
+    price_currency = settings.price_currency
     order.price_currency = price_currency
     if not order.asset_types:
-        order.asset_types = project.asset_types[:1]
+        order.asset_types = list(settings.asset_types[:1])
 
-    add_roles = ('customer_users', 'project_managers')
-    apply_local_roles_from_parent(order, project, add_roles)
     location = request.validated.get('location', None)
     if not order.location and location:
         # force this because sometimes the obj.id is not available before the flush
@@ -2,29 +2,12 @@
 from briefy.common.db.models.item import Item
 from briefy.leica.events.assignment import AssignmentCreatedEvent
 from briefy.leica.models import Comment
-from sqlalchemy.ext.associationproxy import _AssociationList
 from sqlalchemy.orm.session import object_session
 from zope.event import notify
 
 import uuid
 
 
-def apply_local_roles_from_parent(obj, parent, add_roles=()):
-    """Copy local roles from parent."""
-    parent_actors = parent.__actors__
-    obj_actors = obj.__actors__
-
-    for role in parent_actors:
-        if role in obj_actors and role in add_roles:
-            parent_role_value = getattr(parent, role)
-            obj_role_value = getattr(obj, role)
-            if isinstance(parent_role_value, _AssociationList):
-                for item in parent_role_value:
-                    obj_role_value.append(item)
-            else:
-                obj_role_value = parent_role_value
-
-
 def create_comment_from_wf_transition(
         obj: Item,
         author_role: str,
@@ -86,11 +69,6 @@ def create_new_assignment_from_order(order, request, copy_payout=False, old_assi
             payload[key] = getattr(old_assignment, key)
 
     assignment = Assignment.create(payload)
-    apply_local_roles_from_parent(
-        assignment,
-        order,
-        add_roles=('project_managers',)
-    )
     session.add(assignment)
     session.flush()
     order.assignments.append(assignment)
@@ -1,61 +1,83 @@
 """Package handling tasks on Leica."""
-from apscheduler.schedulers.blocking import BlockingScheduler
 from briefy.leica.config import BEFORE_SHOOTING_SECONDS
+from briefy.leica.config import CRON_HOUR_DASHBOARD_STATS
 from briefy.leica.config import CRON_HOUR_JOB_TASKS
+from briefy.leica.config import CRON_HOUR_POOL_COUNTERS
+from briefy.leica.config import CRON_MINUTE_DASHBOARD_STATS
 from briefy.leica.config import CRON_MINUTE_JOB_TASKS
+from briefy.leica.config import CRON_MINUTE_POOL_COUNTERS
 from briefy.leica.config import ENABLE_BEFORE_SHOOTING_NOTIFY
 from briefy.leica.config import ENABLE_LATE_SUBMISSION_NOTIFY
 from briefy.leica.config import LATE_SUBMISSION_SECONDS
+from briefy.leica.config import TASKS_MAX_WORKERS
 from briefy.leica.db import db_configure
 from briefy.leica.db import Session
 from briefy.leica.log import tasks_logger as logger
 from briefy.leica.tasks.assignment import move_assignments_awaiting_assets
 from briefy.leica.tasks.assignment import notify_before_shooting
 from briefy.leica.tasks.assignment import notify_late_submissions
+from briefy.leica.tasks.dashboard import refresh_dashboard_stats
 from briefy.leica.tasks.order import move_orders_accepted
 from briefy.leica.tasks.pool import move_assignments_to_pool
+from briefy.leica.tasks.pool import refresh_pool_counters
+from briefy.leica.tasks.runner import create_scheduler
+from briefy.leica.tasks.runner import TaskJob
 
-import transaction
+
+TASKS = (
+    TaskJob(
+        'move_assignments_to_pool',
+        move_assignments_to_pool,
+        'moving assignments to Pool',
+    ),
+    TaskJob(
+        'move_assignments_awaiting_assets',
+        move_assignments_awaiting_assets,
+        'moving assignments to Awaiting Assets',
+    ),
+    TaskJob(
+        'notify_before_shooting',
+        notify_before_shooting,
+        f'notifying assignments {BEFORE_SHOOTING_SECONDS} seconds before shooting',
+        enabled=ENABLE_BEFORE_SHOOTING_NOTIFY,
+    ),
+    TaskJob(
+        'notify_late_submissions',
+        notify_late_submissions,
+        f'notifying assignments not submitted {LATE_SUBMISSION_SECONDS} seconds after shooting',
+        enabled=ENABLE_LATE_SUBMISSION_NOTIFY,
+    ),
+    TaskJob(
+        'move_orders_accepted',
+        move_orders_accepted,
+        'moving orders to accepted',
+    ),
+    TaskJob(
+        'refresh_dashboard_stats',
+        refresh_dashboard_stats,
+        'rebuilding dashboard aggregates',
+        trigger_args={
+            'hour': CRON_HOUR_DASHBOARD_STATS,
+            'minute': CRON_MINUTE_DASHBOARD_STATS
+        },
+    ),
+    TaskJob(
+        'refresh_pool_counters',
+        refresh_pool_counters,
+        'reconciling pool counters',
+        trigger_args={
+            'hour': CRON_HOUR_POOL_COUNTERS,
+            'minute': CRON_MINUTE_POOL_COUNTERS
+        },
+    ),
+)
+"""Tasks executed by the Leica Task Manager."""
 
 
 def main():
     """Initialize and execute the Leica Task Manager."""
-    sched = BlockingScheduler()
     db_configure(Session)
-
-    @sched.scheduled_job('cron', hour=CRON_HOUR_JOB_TASKS, minute=CRON_MINUTE_JOB_TASKS)
-    def run_tasks():
-        """Run all tasks."""
-        with transaction.manager:
-            logger.info('Start: moving assignments to Pool.')
-            move_assignments_to_pool()
-            logger.info('End: moving assignments to Pool.')
-
-        with transaction.manager:
-            logger.info('Start: moving assignments to Awaiting Assets.')
-            move_assignments_awaiting_assets()
-            logger.info('End: moving assignments to Awaiting Assets.')
-
-        with transaction.manager:
-            if ENABLE_BEFORE_SHOOTING_NOTIFY:
-                seconds = BEFORE_SHOOTING_SECONDS
-                logger.info(f'Start: notifying assignments {seconds} seconds before shooting.')
-                notify_before_shooting()
-                logger.info(f'End: notifying assignments {seconds} seconds before shooting.')
-
-        with transaction.manager:
-            if ENABLE_LATE_SUBMISSION_NOTIFY:
-                seconds = LATE_SUBMISSION_SECONDS
-                logger.info(f'Start: notifying assignments not submitted '
-                            f'{seconds} seconds after shooting.')
-                notify_late_submissions()
-                logger.info(f'End: notifying assignments not submitted '
-                            f'{seconds} seconds after shooting.')
-
-        with transaction.manager:
-            logger.info('Start: moving orders to accepted.')
-            move_orders_accepted()
-            logger.info('End: moving orders to accepted.')
-
+    trigger_args = {'hour': CRON_HOUR_JOB_TASKS, 'minute': CRON_MINUTE_JOB_TASKS}
+    sched = create_scheduler(TASKS, int(TASKS_MAX_WORKERS), trigger_args)
     logger.info('Starting Leica Task Manager.')
     sched.start()
@@ -1,31 +1,34 @@
 """Move Assignments to awaiting assets."""
 from briefy.common.users import SystemUser
 from briefy.common.workflow.exceptions import WorkflowTransitionException
-from briefy.leica.cache import cache_region
 from briefy.leica.config import BEFORE_SHOOTING_SECONDS
 from briefy.leica.config import LATE_SUBMISSION_MAX_DAYS
 from briefy.leica.config import LATE_SUBMISSION_SECONDS
+from briefy.leica.config import TASKS_CHUNK_SIZE
 from briefy.leica.events.task import LeicaTaskEvent
 from briefy.leica.log import tasks_logger as logger
 from briefy.leica.models import Assignment
+from briefy.leica.models import AssignmentNotification
 from briefy.leica.models import Comment
+from briefy.leica.utils import chunked
 from datetime import datetime
 from datetime import timedelta
 from pytz import timezone
-from sqlalchemy import and_
-from sqlalchemy import not_
 
 
 LATE_SUBMISSION_MSG = '** notify task **: The creative was notified about late submission.'
 BEFORE_SHOOTING_MSG = '** notify task **: The creative was notified before the shooting.'
 
+LATE_SUBMISSION = 'late_submission'
+BEFORE_SHOOTING = 'before_shooting'
+
 
 def timezone_now(tz: (str, timezone)):
     """Return datetime.now with timezone information."""
     return datetime.now(tz=timezone(str(tz)))
 
 
-def _move_assignment_awaiting_assets(assignment: Assignment) -> bool:
+def _move_assignment_awaiting_assets(assignment: Assignment, now: datetime = None) -> bool:
     """Move Assignments from scheduled to awaiting_assets.
 
     Task name: leica.task.assignment_awaiting_assets
@@ -35,10 +38,11 @@ def _move_assignment_awaiting_assets(assignment: Assignment) -> bool:
         * leica.task.assignment_awaiting_assets.failure
 
     :param assignment: Assignment to be processed
+    :param now: Reference datetime, defaults to the current time.
     :return: Status of the transition
     """
     task_name = 'leica.task.assignment_awaiting_assets'
-    now = timezone_now('UTC')
+    now = now or timezone_now('UTC')
     status = False
     if assignment.state == 'scheduled' and assignment.scheduled_datetime < now:
         wf = assignment.workflow
@@ -58,108 +62,139 @@ def _move_assignment_awaiting_assets(assignment: Assignment) -> bool:
                 )
             )
 
-        cache_region.invalidate(assignment)
-
         event = LeicaTaskEvent(task_name=task_name, success=status, obj=assignment)
         event()
 
     return status
 
 
-def move_assignments_awaiting_assets():
-    """Move Assignments from scheduled to awaiting_assets."""
-    query = Assignment.query().filter(
-        Assignment.state == 'scheduled'
-    ).all()
+def move_assignments_awaiting_assets(chunk_size: int = int(TASKS_CHUNK_SIZE)) -> int:
+    """Move Assignments from scheduled to awaiting_assets.
 
-    assignments = []
-    for item in query:
-        now = timezone_now('UTC')
-        if item.scheduled_datetime and item.scheduled_datetime < now:
-            assignments.append(item)
+    Only the ids of the due Assignments are selected, using the scheduled_datetime index,
+    and they are processed in chunks, with one flush per chunk.
 
-    logger.info('Total assignments to be moved: {size}'.format(size=len(assignments)))
+    :param chunk_size: Number of assignments processed per flush.
+    :return: Number of assignments moved to awaiting_assets.
+    """
+    now = timezone_now('UTC')
+    session = Assignment.__session__
+    query = session.query(Assignment.id).filter(
+        Assignment.state == 'scheduled',
+        Assignment.scheduled_datetime < now,
+    ).order_by(Assignment.scheduled_datetime)
+    assignment_ids = [row.id for row in query]
+
+    logger.info('Total assignments to be moved: {size}'.format(size=len(assignment_ids)))
     total_moved = 0
 
-    for assignment in assignments:
-        status = _move_assignment_awaiting_assets(assignment)
-        total_moved += 1 if status else 0
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
+    for ids in chunked(assignment_ids, chunk_size):
+        assignments = Assignment.query().filter(Assignment.id.in_(ids)).all()
+        for assignment in assignments:
+            status = _move_assignment_awaiting_assets(assignment, now=now)
+            total_moved += 1 if status else 0
+        session.flush()
 
     logger.info('Total assignments moved to awaiting assets: {total}'.format(total=total_moved))
+    return total_moved
 
 
-def _notify_late_submissions(assignment: Assignment) -> bool:
-    """Create a new comment to let professionals know that 48hs passed after the shoot.
+def _register_notification(
+        assignment: Assignment,
+        kind: str,
+        content: str,
+        task_name: str
+) -> bool:
+    """Claim a notification on the ledger and register it as a comment on the Assignment.
 
-    Task name: leica.task.notify_late_submission
-    Task events:
+    Claim and comment are written on the same savepoint, so if the comment fails the claim is
+    rolled back as well and the notification is tried again on the next run.
 
-        * leica.task.notify_late_submission.success
-        * leica.task.notify_late_submission.failure
-
-    :param assignment: Assignment to be processed
-    :return: True if a new notify comment was registered in the Assignment.
+    :param assignment: Assignment to be notified.
+    :param kind: Kind of notification, from NotificationKindChoices.
+    :param content: Content of the comment.
+    :param task_name: Name of the task, used on the task event.
+    :return: True if the notification was registered, False if it was already sent.
     """
-    status = False
-    has_notify_comment = assignment.comments.filter(
-        Comment.content == LATE_SUBMISSION_MSG,
-        Comment.internal.is_(True),
-    ).all()
-
-    now = timezone_now('UTC')
-    delta = now - assignment.scheduled_datetime
-    config_delta = timedelta(seconds=int(LATE_SUBMISSION_SECONDS))
-    should_notify = delta > config_delta and delta.days <= int(LATE_SUBMISSION_MAX_DAYS)
-    if assignment.state != 'awaiting_assets' or has_notify_comment or not should_notify:
-        return status
+    session = assignment.__session__
+    savepoint = session.begin_nested()
+    notification = AssignmentNotification.claim(assignment.id, kind)
+    if notification is None:
+        savepoint.rollback()
+        return False
 
+    status = False
     payload = dict(
         entity_id=assignment.id,
         entity_type=assignment.__class__.__name__,
         author_id=SystemUser.id,
-        content=LATE_SUBMISSION_MSG,
+        content=content,
         author_role='project_manager',
         to_role='professional_user',
         internal=True,
     )
     try:
         comment = Comment(**payload)
-        session = assignment.__session__
         session.add(comment)
         assignment.comments.append(comment)
         session.flush()
+        notification.comment_id = comment.id
+        session.flush()
     except Exception as exc:
+        savepoint.rollback()
         msg = 'Failure to add comment to assignment: {id}. Error: {exc}'
         logger.error(msg.format(id=assignment.id, exc=str(exc)))
     else:
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
+        savepoint.commit()
         status = True
 
-    task_name = 'leica.task.notify_late_submission'
     event = LeicaTaskEvent(task_name=task_name, success=status, obj=assignment)
     event()
     return status
 
 
-def notify_late_submissions():
-    """Search for assignments with late submissions to be notified."""
+def _notify_late_submissions(assignment: Assignment) -> bool:
+    """Create a new comment to let professionals know that 48hs passed after the shoot.
+
+    Task name: leica.task.notify_late_submission
+    Task events:
+
+        * leica.task.notify_late_submission.success
+        * leica.task.notify_late_submission.failure
+
+    :param assignment: Assignment to be processed
+    :return: True if a new notify comment was registered in the Assignment.
+    """
+    now = timezone_now('UTC')
+    delta = now - assignment.scheduled_datetime
+    config_delta = timedelta(seconds=int(LATE_SUBMISSION_SECONDS))
+    should_notify = delta > config_delta and delta.days <= int(LATE_SUBMISSION_MAX_DAYS)
+    if assignment.state != 'awaiting_assets' or not should_notify:
+        return False
+
+    return _register_notification(
+        assignment,
+        LATE_SUBMISSION,
+        LATE_SUBMISSION_MSG,
+        'leica.task.notify_late_submission'
+    )
+
+
+def notify_late_submissions() -> int:
+    """Search for assignments with late submissions to be notified.
+
+    :return: Number of assignments notified.
+    """
+    now = timezone_now('UTC')
+    config_delta = timedelta(seconds=int(LATE_SUBMISSION_SECONDS))
+    max_delta = timedelta(days=int(LATE_SUBMISSION_MAX_DAYS) + 1)
     query = Assignment.query().filter(
-        and_(
-            Assignment.state == 'awaiting_assets',
-            not_(Assignment.comments.any(Comment.content == LATE_SUBMISSION_MSG))
-        )
+        Assignment.state == 'awaiting_assets',
+        Assignment.scheduled_datetime < now - config_delta,
+        Assignment.scheduled_datetime > now - max_delta,
+        ~AssignmentNotification.sent(Assignment.id, LATE_SUBMISSION),
     )
-    assignments = []
-    for item in query:
-        now = timezone_now('UTC')
-        delta = now - item.scheduled_datetime
-        config_delta = timedelta(seconds=int(LATE_SUBMISSION_SECONDS))
-        should_notify = delta > config_delta and delta.days <= int(LATE_SUBMISSION_MAX_DAYS)
-        if should_notify:
-            assignments.append(item)
+    assignments = query.all()
 
     msg = 'Total assignments professionals will be notified for late submissions: {size}'
     logger.info(msg.format(size=len(assignments)))
@@ -171,6 +206,7 @@ def notify_late_submissions():
 
     msg = 'Total of assignments professionals were notified for late submission: {total}'
     logger.info(msg.format(total=total_notified))
+    return total_notified
 
 
 def _notify_before_shooting(assignment: Assignment) -> bool:
@@ -185,63 +221,35 @@ def _notify_before_shooting(assignment: Assignment) -> bool:
     :param assignment: Assignment to be processed
     :return: True if a new notify comment was registered in the Assignment.
     """
-    status = False
     now = timezone_now('UTC')
-    has_notify_comment = assignment.comments.filter(
-        Comment.content == BEFORE_SHOOTING_MSG,
-        Comment.internal.is_(True),
-    ).all()
     delta = assignment.scheduled_datetime - now
     config_delta = timedelta(seconds=int(BEFORE_SHOOTING_SECONDS))
     should_notify = delta.days >= 0 and delta <= config_delta
-    if assignment.state != 'scheduled' or not should_notify or has_notify_comment:
-        return status
-
-    payload = dict(
-        entity_id=assignment.id,
-        entity_type=assignment.__class__.__name__,
-        author_id=SystemUser.id,
-        content=BEFORE_SHOOTING_MSG,
-        author_role='project_manager',
-        to_role='professional_user',
-        internal=True,
+    if assignment.state != 'scheduled' or not should_notify:
+        return False
+
+    return _register_notification(
+        assignment,
+        BEFORE_SHOOTING,
+        BEFORE_SHOOTING_MSG,
+        'leica.task.notify_before_shooting'
     )
-    try:
-        comment = Comment(**payload)
-        session = assignment.__session__
-        session.add(comment)
-        assignment.comments.append(comment)
-        session.flush()
-    except Exception as exc:
-        msg = 'Failure to add comment to assignment: {id}. Error: {exc}'
-        logger.error(msg.format(id=assignment.id, exc=str(exc)))
-    else:
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
-        status = True
 
-    task_name = 'leica.task.notify_before_shooting'
-    event = LeicaTaskEvent(task_name=task_name, success=status, obj=assignment)
-    event()
-    return status
 
+def notify_before_shooting() -> int:
+    """Search for assignments scheduled and notify professional before shooting.
 
-def notify_before_shooting():
-    """Search for assignments scheduled and notify professional before shooting."""
+    :return: Number of assignments notified.
+    """
+    now = timezone_now('UTC')
+    config_delta = timedelta(seconds=int(BEFORE_SHOOTING_SECONDS))
     query = Assignment.query().filter(
-        and_(
-            Assignment.state == 'scheduled',
-            not_(Assignment.comments.any(Comment.content == BEFORE_SHOOTING_MSG))
-        )
+        Assignment.state == 'scheduled',
+        Assignment.scheduled_datetime >= now,
+        Assignment.scheduled_datetime <= now + config_delta,
+        ~AssignmentNotification.sent(Assignment.id, BEFORE_SHOOTING),
     )
-    assignments = []
-    for item in query:
-        now = timezone_now('UTC')
-        delta = item.scheduled_datetime - now
-        config_delta = timedelta(seconds=int(BEFORE_SHOOTING_SECONDS))
-        should_notify = delta.days >= 0 and delta <= config_delta
-        if should_notify:
-            assignments.append(item)
+    assignments = query.all()
 
     msg = 'Total assignments professionals will be notified before shooting: {size}'
     logger.info(msg.format(size=len(assignments)))
@@ -253,3 +261,4 @@ def notify_before_shooting():
 
     msg = 'Total of assignments professionals were notified before shooting: {total}'
     logger.info(msg.format(total=total_notified))
+    return total_notified
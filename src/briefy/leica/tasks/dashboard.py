@@ -0,0 +1,124 @@
+"""Rebuild the dashboard aggregates."""
+from briefy.leica.db import Session
+from briefy.leica.log import tasks_logger as logger
+from briefy.leica.models import Assignment
+from briefy.leica.models import Item
+from briefy.leica.models import Order
+from briefy.leica.models import OrderLocation
+from briefy.leica.models.dashboard.stats import ASSIGNMENT_DIMENSIONS
+from briefy.leica.models.dashboard.stats import assignment_stats
+from briefy.leica.models.dashboard.stats import normalize_value
+from briefy.leica.models.dashboard.stats import ORDER_DIMENSIONS
+from briefy.leica.models.dashboard.stats import order_stats
+from briefy.leica.models.dashboard.stats import stats_key
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from zope.sqlalchemy import mark_changed
+
+import sqlalchemy as sa
+import typing as t
+
+
+def order_stats_query() -> sa.sql.Select:
+    """Aggregate all Orders by ORDER_DIMENSIONS."""
+    items = Item.__table__
+    orders = Order.__table__
+    dimensions = [
+        orders.c.project_id,
+        items.c.type,
+        orders.c.current_type,
+        items.c.state,
+        orders.c.accept_date.isnot(None),
+    ]
+    columns = [column.label(name) for column, name in zip(dimensions, ORDER_DIMENSIONS)]
+    return select(
+        columns + [func.count().label('total')]
+    ).select_from(
+        orders.join(items, items.c.id == orders.c.id)
+    ).group_by(*dimensions)
+
+
+def assignment_stats_query() -> sa.sql.Select:
+    """Aggregate all Assignments by ASSIGNMENT_DIMENSIONS."""
+    items = Item.__table__
+    orders = Order.__table__
+    assignments = Assignment.__table__
+    locations = OrderLocation.__table__
+    dimensions = [
+        orders.c.project_id,
+        orders.c.current_type,
+        locations.c.country,
+        items.c.state,
+        assignments.c.set_type,
+        assignments.c.pool_id.isnot(None),
+        assignments.c.professional_id,
+    ]
+    columns = [column.label(name) for column, name in zip(dimensions, ASSIGNMENT_DIMENSIONS)]
+    return select(
+        columns + [func.count().label('total')]
+    ).select_from(
+        assignments.join(
+            items, items.c.id == assignments.c.id
+        ).join(
+            orders, orders.c.id == assignments.c.order_id
+        ).outerjoin(
+            locations, locations.c.order_id == orders.c.id
+        )
+    ).group_by(*dimensions)
+
+
+def _reconcile(session, table: sa.Table, query: sa.sql.Select, names: t.Sequence[str]) -> int:
+    """Reconcile an aggregates table with the result of query.
+
+    Only the counters that differ are written: existing counters are updated from the
+    aggregate in a single UPDATE ... FROM, missing ones are inserted and counters not found
+    on the aggregate, or zeroed, are removed. Other counters are never locked, so the hooks
+    keep writing while this runs.
+
+    :return: Number of counters changed.
+    """
+    aggregate = query.alias('aggregate')
+    same_dimensions = sa.and_(
+        *[table.c[name].isnot_distinct_from(aggregate.c[name]) for name in names]
+    )
+    changed = session.execute(
+        table.update().values(total=aggregate.c.total).where(
+            sa.and_(same_dimensions, table.c.total != aggregate.c.total)
+        )
+    ).rowcount
+
+    missing = session.execute(
+        select([aggregate]).where(~sa.exists().where(same_dimensions))
+    )
+    for row in missing:
+        record = {name: normalize_value(row[name]) for name in names}
+        statement = insert(table).values(
+            key=stats_key(record, names), total=row['total'], **record
+        ).on_conflict_do_nothing(index_elements=[table.c.key])
+        changed += session.execute(statement).rowcount
+
+    changed += session.execute(
+        table.delete().where(
+            sa.or_(table.c.total == 0, ~sa.exists().where(same_dimensions))
+        )
+    ).rowcount
+    return changed
+
+
+def refresh_dashboard_stats() -> int:
+    """Reconcile the dashboard aggregates with Orders and Assignments.
+
+    The aggregates are kept up to date by the Order and Assignment hooks, this task reconciles
+    them with changes the hooks can not follow, like a new country on an OrderLocation.
+
+    :return: Number of counters changed.
+    """
+    session = Session()
+    total = _reconcile(session, order_stats, order_stats_query(), ORDER_DIMENSIONS)
+    total += _reconcile(
+        session, assignment_stats, assignment_stats_query(), ASSIGNMENT_DIMENSIONS
+    )
+    mark_changed(session)
+    logger.info(f'Dashboard aggregates reconciled: {total} counters changed.')
+    return total
@@ -1,11 +1,11 @@
 """Order tasks."""
 from briefy.common.db import datetime_utcnow
 from briefy.common.users import SystemUser
-from briefy.leica.cache import cache_region
+from briefy.leica.config import TASKS_CHUNK_SIZE
 from briefy.leica.events.task import LeicaTaskEvent
 from briefy.leica.log import tasks_logger as logger
 from briefy.leica.models import Order
-from workdays import workday
+from briefy.leica.utils import chunked
 
 
 def _move_order_accepted(order: Order) -> bool:
@@ -26,9 +26,7 @@ def _move_order_accepted(order: Order) -> bool:
     last_deliver_date = order.last_deliver_date
     if state == 'delivered' and last_deliver_date:
         now = datetime_utcnow()
-        project = order.project
-        approval_window = project.approval_window
-        allowed_accept_date = workday(last_deliver_date, approval_window)
+        allowed_accept_date = order.acceptance_due_at or order.compute_acceptance_due_at()
         wf = order.workflow
         wf.context = SystemUser
 
@@ -45,24 +43,38 @@ def _move_order_accepted(order: Order) -> bool:
                 status = True
 
             # Trigger task event
-            cache_region.invalidate(order)
-            for assignment in order.assignments:
-                cache_region.invalidate(assignment)
             event = LeicaTaskEvent(task_name=task_name, success=status, obj=order)
             event()
             logger.info(msg)
     return status
 
 
-def move_orders_accepted():
-    """Move Orders from delivered to accepted."""
-    orders = Order.query().filter(Order.state == 'delivered').all()
+def move_orders_accepted(chunk_size: int = int(TASKS_CHUNK_SIZE)) -> int:
+    """Move Orders from delivered to accepted.
 
-    logger.info('Total orders in delivered state: {total}'.format(total=len(orders)))
+    Only Orders with acceptance_due_at in the past are selected, and they are processed in
+    chunks, with one flush per chunk.
+
+    :param chunk_size: Number of orders processed per flush.
+    :return: Number of orders moved to accepted.
+    """
+    now = datetime_utcnow()
+    session = Order.__session__
+    query = session.query(Order.id).filter(
+        Order.state == 'delivered',
+        Order.acceptance_due_at <= now,
+    ).order_by(Order.acceptance_due_at)
+    order_ids = [row.id for row in query]
+
+    logger.info('Total orders due for acceptance: {total}'.format(total=len(order_ids)))
 
     total_moved = 0
-    for order in orders:
-        status = _move_order_accepted(order)
-        total_moved += 1 if status else 0
+    for ids in chunked(order_ids, chunk_size):
+        orders = Order.query().filter(Order.id.in_(ids)).all()
+        for order in orders:
+            status = _move_order_accepted(order)
+            total_moved += 1 if status else 0
+        session.flush()
 
     logger.info('Total orders moved to accepted state: {total}'.format(total=total_moved))
+    return total_moved
@@ -1,14 +1,29 @@
 """Move Assignment to Pool."""
 from briefy.common.db import datetime_utcnow
 from briefy.common.users import SystemUser
-from briefy.leica.cache import cache_region
+from briefy.leica.config import TASKS_CHUNK_SIZE
 from briefy.leica.events.task import LeicaTaskEvent
 from briefy.leica.log import tasks_logger as logger
 from briefy.leica.models import Assignment
+from briefy.leica.models import Item
 from briefy.leica.models import Order
 from briefy.leica.models import Pool
 from briefy.leica.models import Project
-from dateutil.parser import parse
+from briefy.leica.models.job.pool import professionals_count
+from briefy.leica.utils import chunked
+from datetime import datetime
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import orm
+from sqlalchemy import select
+from sqlalchemy.orm.query import Query
+from sqlalchemy.sql import operators
+from zope.sqlalchemy import mark_changed
+
+
+AVAILABILITY_DAYS = 2
+"""Minimum number of days, from now, of one of the availability dates of a published Order."""
 
 
 def _move_assignment_to_pool(assignment: Assignment, pool: Pool, has_availability: bool) -> bool:
@@ -54,9 +69,6 @@ def _move_assignment_to_pool(assignment: Assignment, pool: Pool, has_availabilit
             status = True
             msg = 'Assignment {id} moved to published.'
 
-            cache_region.invalidate(assignment)
-            cache_region.invalidate(assignment.order)
-
         # Trigger task event
         event = LeicaTaskEvent(task_name=task_name, success=status, obj=assignment)
         if suffix:
@@ -68,23 +80,122 @@ def _move_assignment_to_pool(assignment: Assignment, pool: Pool, has_availabilit
     return status
 
 
-def move_assignments_to_pool():
-    """Move Assignments from pending to published and set the pool_id."""
-    pool_projects = Project.query().filter(Project.pool_id.isnot(None)).all()
-    now = datetime_utcnow()
+def pool_assignments_query(now: datetime = None) -> Query:
+    """Return the pending current Assignments of received Orders of Projects with a Pool.
+
+    The current Assignment of an Order is the last one not cancelled or permanently rejected,
+    as Order.assignment. Orders, Projects and Assignments are joined in one query, and the
+    availability is checked against the typed availability_dates array of the Order. Orders
+    without availability dates are skipped.
+
+    :param now: Reference datetime, defaults to the current time.
+    :return: Query returning (id, pool_id, has_availability) rows.
+    """
+    now = now or datetime_utcnow()
+    threshold = now + timedelta(days=AVAILABILITY_DAYS)
+    order = orm.aliased(Order)
+    project = orm.aliased(Project)
+    session = Assignment.__session__
+    current = session.query(
+        Assignment.id.label('id'),
+        Assignment.state.label('state'),
+        Assignment.created_at.label('created_at'),
+        project.pool_id.label('pool_id'),
+        order.availability_dates.any(threshold, operator=operators.le).label('has_availability'),
+    ).join(
+        order, order.id == Assignment.order_id
+    ).join(
+        project, project.id == order.project_id
+    ).filter(
+        project.pool_id.isnot(None),
+        order.state == 'received',
+        func.array_length(order.availability_dates, 1) > 0,
+        Assignment.state.notin_(('cancelled', 'perm_reject')),
+    ).distinct(
+        Assignment.order_id
+    ).order_by(
+        Assignment.order_id, Assignment.created_at.desc()
+    ).subquery()
+    return session.query(
+        current.c.id, current.c.pool_id, current.c.has_availability
+    ).filter(
+        current.c.state == 'pending'
+    ).order_by(current.c.created_at)
+
+
+def move_assignments_to_pool(chunk_size: int = int(TASKS_CHUNK_SIZE)) -> int:
+    """Move Assignments from pending to published and set the pool_id.
+
+    The pending current Assignments of the received Orders are loaded in chunks, with one
+    flush per chunk, and each one is published or gets a failure event, as before.
 
-    for project in pool_projects:
-        pool = project.pool
-        orders = Order.query().filter(Order.state == 'received', Order.project == project).all()
-        for order in orders:
-            availability = order.availability
-            if not availability:
-                continue
+    :param chunk_size: Number of assignments processed per flush.
+    :return: Number of assignments published.
+    """
+    session = Assignment.__session__
+    rows = pool_assignments_query().all()
+    logger.info('Total assignments to be published: {size}'.format(size=len(rows)))
+
+    pool_ids = {row.pool_id for row in rows}
+    pools = {}
+    if pool_ids:
+        pools = {pool.id: pool for pool in Pool.query().filter(Pool.id.in_(pool_ids))}
+
+    total_published = 0
+    for chunk in chunked(rows, chunk_size):
+        rows_by_assignment = {row.id: row for row in chunk}
+        assignments = Assignment.query().filter(
+            Assignment.id.in_(list(rows_by_assignment))
+        ).all()
+        for assignment in assignments:
+            row = rows_by_assignment[assignment.id]
+            status = _move_assignment_to_pool(
+                assignment, pools[row.pool_id], has_availability=row.has_availability
+            )
+            total_published += 1 if status else 0
+        session.flush()
+
+    logger.info('Total assignments published: {total}'.format(total=total_published))
+    return total_published
 
-            has_availability = False
-            for date in availability:
-                date_diff = parse(date) - now
-                has_availability = has_availability or (date_diff.days >= 2)
 
-            assignment = order.assignment
-            _move_assignment_to_pool(assignment, pool, has_availability)
+def refresh_pool_counters() -> int:
+    """Recount the Assignments and Professionals of all Pools.
+
+    The counters are kept up to date by the Assignment and flush hooks, this task reconciles
+    them with changes the hooks can not follow, like bulk updates and manual fixes.
+
+    :return: Number of Pools with counters fixed.
+    """
+    session = Pool.__session__
+    pools = Pool.__table__
+    assignments = Assignment.__table__
+    items = Item.__table__
+    total_assignments = select([func.count()]).where(
+        assignments.c.pool_id == pools.c.id
+    ).as_scalar()
+    live_assignments = select([func.count()]).select_from(
+        assignments.join(items, items.c.id == assignments.c.id)
+    ).where(
+        assignments.c.pool_id == pools.c.id
+    ).where(
+        items.c.state == 'published'
+    ).as_scalar()
+    total_professionals = professionals_count()
+    result = session.execute(
+        pools.update().where(
+            or_(
+                pools.c.total_assignments != total_assignments,
+                pools.c.live_assignments != live_assignments,
+                pools.c.total_professionals != total_professionals,
+            )
+        ).values(
+            total_assignments=total_assignments,
+            live_assignments=live_assignments,
+            total_professionals=total_professionals,
+        )
+    )
+    mark_changed(session)
+    total = result.rowcount
+    logger.info(f'Pool counters fixed: {total} pools.')
+    return total
@@ -0,0 +1,150 @@
+"""Run Leica tasks in parallel, each one isolated in its own session and transaction."""
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.blocking import BlockingScheduler
+from briefy.leica.db import Session
+from briefy.leica.log import tasks_logger as logger
+from threading import Lock
+from time import monotonic
+
+import newrelic.agent
+import transaction
+import typing as t
+
+
+class TaskJob:
+    """A task to be executed by the runner."""
+
+    def __init__(
+            self,
+            name: str,
+            func: t.Callable,
+            description: str,
+            enabled: bool = True,
+            trigger_args: t.Optional[dict] = None
+    ):
+        """Initialize the task job.
+
+        :param name: Unique name of the job, also used as the scheduler job id.
+        :param func: Task function, called without arguments.
+        :param description: Description used on the log messages.
+        :param enabled: Should this job be scheduled.
+        :param trigger_args: Arguments of the cron trigger, replacing the scheduler defaults.
+        """
+        self.name = name
+        self.func = func
+        self.description = description
+        self.enabled = enabled
+        self.trigger_args = trigger_args
+
+    def __repr__(self) -> str:
+        """Representation of this job."""
+        return f'<TaskJob {self.name}>'
+
+
+class TaskMetrics:
+    """Thread safe storage of execution metrics per task job."""
+
+    def __init__(self):
+        """Initialize the metrics storage."""
+        self._lock = Lock()
+        self._data = {}
+
+    def record(self, name: str, duration: float, rows: t.Optional[int], success: bool):
+        """Record the execution of a task job.
+
+        :param name: Name of the job.
+        :param duration: Duration of the execution, in seconds.
+        :param rows: Number of rows processed, if reported by the task.
+        :param success: Did the execution finish without errors.
+        """
+        with self._lock:
+            data = self._data.setdefault(
+                name,
+                {'runs': 0, 'failures': 0, 'total_duration': 0.0, 'total_rows': 0}
+            )
+            data['runs'] += 1
+            data['failures'] += 0 if success else 1
+            data['total_duration'] += duration
+            data['total_rows'] += rows or 0
+            data['last_duration'] = duration
+            data['last_rows'] = rows
+        newrelic.agent.record_custom_metric(f'Custom/Tasks/{name}/duration', duration)
+        if rows is not None:
+            newrelic.agent.record_custom_metric(f'Custom/Tasks/{name}/rows', rows)
+
+    def get(self, name: str) -> dict:
+        """Return a copy of the metrics of one task job."""
+        with self._lock:
+            return dict(self._data.get(name, {}))
+
+    def snapshot(self) -> dict:
+        """Return a copy of the metrics of all task jobs."""
+        with self._lock:
+            return {name: dict(data) for name, data in self._data.items()}
+
+
+metrics = TaskMetrics()
+
+
+def run_job(job: TaskJob, task_metrics: TaskMetrics = metrics) -> t.Any:
+    """Execute one task job in its own transaction and database session.
+
+    Sessions are scoped per thread, so removing it after the execution makes sure the next
+    job using this worker thread starts with a clean session.
+
+    :param job: Task job to be executed.
+    :param task_metrics: Metrics storage.
+    :return: Value returned by the task function.
+    """
+    result = None
+    success = False
+    start = monotonic()
+    logger.info(f'Start: {job.description}.')
+    try:
+        with transaction.manager:
+            result = job.func()
+    except Exception:
+        logger.exception(f'Failure: {job.description}.')
+    else:
+        success = True
+    finally:
+        Session.remove()
+        duration = monotonic() - start
+        rows = result if isinstance(result, int) and not isinstance(result, bool) else None
+        task_metrics.record(job.name, duration, rows, success)
+    logger.info(f'End: {job.description}. Duration: {duration:.3f}s. Rows: {rows}')
+    return result
+
+
+def create_scheduler(
+        jobs: t.Sequence[TaskJob],
+        max_workers: int,
+        trigger_args: dict
+) -> BlockingScheduler:
+    """Create a scheduler running the enabled jobs concurrently.
+
+    Each job is scheduled independently with max_instances=1 and coalesce=True: a slow job
+    never delays the others and missed runs of the same job are merged instead of overlapping.
+
+    :param jobs: Task jobs to be scheduled.
+    :param max_workers: Size of the thread pool executing the jobs.
+    :param trigger_args: Default arguments of the cron trigger,
+                         i.e.: {'hour': '*', 'minute': '*/1'}.
+    :return: Scheduler instance, not started.
+    """
+    scheduler = BlockingScheduler(executors={'default': ThreadPoolExecutor(max_workers)})
+    for job in jobs:
+        if not job.enabled:
+            logger.info(f'Task {job.name} is disabled.')
+            continue
+        scheduler.add_job(
+            run_job,
+            'cron',
+            args=(job, ),
+            id=job.name,
+            name=job.name,
+            coalesce=True,
+            max_instances=1,
+            **(job.trigger_args or trigger_args)
+        )
+    return scheduler
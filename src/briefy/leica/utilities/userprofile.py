@@ -1,4 +1,5 @@
 """UserProfileData service."""
+from briefy.common.db.models.local_role import LocalRole
 from briefy.common.log import logger
 from briefy.common.users import SystemUser
 from briefy.common.utilities.interfaces import IUserProfileQuery
@@ -6,9 +7,11 @@ from briefy.leica.models import UserProfile
 from octopus.lens import AnyUUID
 from octopus.lens import EasyUUID
 from octopus.lens import map_from_object
+from pyramid.threadlocal import get_current_request
 from zope.interface import implementer
 
 import sqlalchemy as sa
+import typing as t
 
 
 user_schema = {
@@ -20,6 +23,58 @@ user_schema = {
     'internal': False,
 }
 
+MAX_PENDING_ITEMS = 500
+"""Maximum number of items of a serialized collection used to prefetch actors."""
+
+
+class ActorsMap:
+    """Identity map of user data resolved during a request."""
+
+    def __init__(self):
+        """Initialize the map."""
+        self.users = {}
+        self.pending_items = set()
+        """Ids of items of the collection being serialized, whose actors were not fetched yet."""
+
+    def add_pending_items(self, item_ids: t.Iterable):
+        """Register the items of a collection about to be serialized."""
+        for item_id in item_ids:
+            if len(self.pending_items) >= MAX_PENDING_ITEMS:
+                break
+            self.pending_items.add(item_id)
+
+    def pop_pending_items(self) -> list:
+        """Return and clear the ids of pending items."""
+        item_ids = list(self.pending_items)
+        self.pending_items = set()
+        return item_ids
+
+
+def get_actors_map(create: bool = True) -> t.Optional[ActorsMap]:
+    """Return the ActorsMap of the current request.
+
+    Outside a request (tasks, worker) a new, short lived, ActorsMap is returned.
+
+    :param create: Create a new map if the request does not have one yet.
+    :return: ActorsMap instance or None.
+    """
+    request = get_current_request()
+    if request is None:
+        return ActorsMap() if create else None
+    actors_map = getattr(request, '_leica_actors_map', None)
+    if actors_map is None and create:
+        actors_map = ActorsMap()
+        request._leica_actors_map = actors_map
+    return actors_map
+
+
+def _normalize_id(user_id: AnyUUID) -> t.Optional[str]:
+    """Return the canonical string representation of an user id, None if invalid."""
+    try:
+        return str(EasyUUID(user_id))
+    except (TypeError, ValueError):
+        return None
+
 
 @implementer(IUserProfileQuery)
 class LeicaUserProfileQuery:
@@ -27,39 +82,96 @@ class LeicaUserProfileQuery:
 
     def get_data(self, user_id: AnyUUID) -> dict:
         """Get a map with user data."""
-        try:
-            user_id = EasyUUID(user_id)
-        except ValueError:
-            logger.warn(f'Invalid ACTOR UUID f{user_id}')
-            data = user_schema.copy()
-            data['id'] = str(user_id)
-            data['fullname'] = ''
-            return data
-
-        if user_id == SystemUser.id:
-            user = SystemUser
-        else:
-            user = UserProfile.get(user_id)
-
-        return map_from_object(user_schema, user, default='') if user else {}
+        return self.resolve([user_id]).get(user_id, {})
 
-    def get_all_data(self, principal_ids: list) -> list:
-        """Get all user data from a list of principals."""
-        users = UserProfile.query().filter(UserProfile.id == sa.any_(principal_ids)).all()
-        result = []
-        for user in users:
-            data = map_from_object(user_schema, user, default='')
-            result.append(data)
+    def _fetch(self, user_ids: t.Iterable[str]) -> dict:
+        """Query the data of many users at once.
+
+        :param user_ids: Normalized user ids.
+        :return: Dictionary mapping every user id to its data, empty if the user does not exist.
+        """
+        result = {user_id: {} for user_id in user_ids}
+        system_id = str(SystemUser.id)
+        if system_id in result:
+            result[system_id] = map_from_object(user_schema, SystemUser, default='')
+        query_ids = [user_id for user_id in result if user_id != system_id]
+        if query_ids:
+            users = UserProfile.query().filter(UserProfile.id == sa.any_(query_ids)).all()
+            for user in users:
+                result[str(user.id)] = map_from_object(user_schema, user, default='')
+        return result
+
+    def _pending_principals(self, actors_map: ActorsMap) -> set:
+        """Return the principals with local roles on the items registered by prefetch_actors."""
+        item_ids = actors_map.pop_pending_items()
+        if not item_ids:
+            return set()
+        session = LocalRole.__session__
+        query = session.query(LocalRole.principal_id).filter(
+            LocalRole.item_id == sa.any_(item_ids)
+        ).distinct()
+        return {str(row.principal_id) for row in query}
+
+    def resolve(self, user_ids: t.Iterable[AnyUUID]) -> dict:
+        """Get the data of many users, with at most one query per call.
+
+        Resolved users are kept in the identity map of the current request. When there are
+        missing users, all actors of the items registered with :meth:`prefetch_actors` are
+        fetched in the same query, so serializing a whole collection needs a constant number
+        of queries.
+
+        :param user_ids: Ids of the users.
+        :return: Dictionary mapping each user id, as passed, to a copy of its data.
+        """
+        actors_map = get_actors_map()
+        users = actors_map.users
+        keys = {user_id: _normalize_id(user_id) for user_id in user_ids}
+        missing = {key for key in keys.values() if key and key not in users}
+        if missing:
+            missing.update(self._pending_principals(actors_map) - set(users))
+            users.update(self._fetch(missing))
+
+        result = {}
+        for user_id, key in keys.items():
+            if key is None:
+                logger.warn(f'Invalid ACTOR UUID f{user_id}')
+                data = user_schema.copy()
+                data['id'] = str(user_id)
+                data['fullname'] = ''
+            else:
+                data = dict(users.get(key, {}))
+            result[user_id] = data
         return result
 
+    def prefetch_actors(self, item_ids: t.Iterable[AnyUUID]):
+        """Fetch the actors of these items together with the next missing user.
+
+        Call it before serializing a collection, with the ids of its items.
+
+        :param item_ids: Ids of the items about to be serialized.
+        """
+        get_actors_map().add_pending_items(item_ids)
+
+    def get_all_data(self, principal_ids: list) -> list:
+        """Get all user data from a list of principals.
+
+        Only existing user profiles are returned, invalid ids are ignored.
+        """
+        keys = {_normalize_id(user_id) for user_id in principal_ids}
+        keys.discard(None)
+        keys.discard(str(SystemUser.id))
+        resolved = self.resolve(sorted(keys))
+        return [data for data in resolved.values() if data]
+
     def update_wf_history(self, state_history: list) -> list:
         """Update workflow history with user data."""
+        # first call when the actor value still a UUID string
+        user_ids = {item.get('actor') for item in state_history}
+        resolved = self.resolve([user_id for user_id in user_ids if isinstance(user_id, str)])
         for item in state_history:
             user = item.get('actor', None)
-            # first call when the actor value still a UUID string
             if isinstance(user, str):
-                user_id = user
-                new_actor = self.get_data(user_id)
+                new_actor = resolved.get(user)
                 if new_actor:
                     item['actor'] = new_actor
 
@@ -72,12 +184,14 @@ class LeicaUserProfileQuery:
         :param actors: list of local roles to update user info
         :return: Data dictionary.
         """
+        user_ids = []
+        for local_role in actors:
+            user_ids.extend(data.get(local_role) or [])
+        resolved = self.resolve(user_ids)
+
         for local_role in actors:
             values = data.get(local_role, [])
-            results = []
-            for item in values:
-                user_info = self.get_data(item) if item else None
-                results.append(user_info)
+            results = [resolved[item] if item else None for item in values]
             if results and values:
                 data[local_role] = results
         return data
@@ -2,7 +2,15 @@
 
 from uuid import UUID
 
+import typing as t
+
 
 def ensure_uid(id_):
     """Ensure we have an uid instance."""
     return id_ if isinstance(id_, UUID) else UUID(id_)
+
+
+def chunked(items: t.Sequence, size: int) -> t.Iterator[t.Sequence]:
+    """Split a sequence in consecutive chunks with at most size items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,185 @@
+"""Business days calendars.
+
+Each calendar precomputes the ordinals of its business days, so adding business days to a
+date is a binary search plus an index lookup instead of a walk over the calendar.
+Holidays are configured per country in a JSON file (BUSINESS_DAYS_HOLIDAYS_PATH)::
+
+    {
+        "DE": ["2017-10-03", "2017-12-25"],
+        "FR": ["2017-07-14"]
+    }
+
+No holidays file is shipped with the package: by default only weekends are skipped, as with
+the previous workdays computation, and the file is a configuration hook for deployments.
+"""
+from bisect import bisect_left
+from bisect import bisect_right
+from briefy.leica import logger
+from briefy.leica.config import BUSINESS_DAYS_HOLIDAYS_PATH
+from datetime import date
+from datetime import timedelta
+from threading import Lock
+
+import json
+import os
+import typing as t
+
+
+WEEKENDS = (5, 6)
+"""Weekdays that are not business days: Saturday and Sunday."""
+
+EXTEND_DAYS = 366 * 2
+"""Number of days added to a calendar table when it needs to grow."""
+
+
+class BusinessCalendar:
+    """Calendar of business days, with weekends and holidays."""
+
+    def __init__(
+            self,
+            holidays: t.Iterable[date] = (),
+            weekends: t.Sequence[int] = WEEKENDS,
+            start: date = date(2015, 1, 1),
+            end: date = date(2020, 12, 31),
+    ):
+        """Initialize the calendar and build the table of business days.
+
+        :param holidays: Dates that are not business days.
+        :param weekends: Weekdays that are not business days, Monday is 0.
+        :param start: First day of the precomputed table.
+        :param end: Last day of the precomputed table.
+        """
+        self.holidays = frozenset(day.toordinal() for day in holidays)
+        self.weekends = frozenset(weekends)
+        self._lock = Lock()
+        self._start = start.toordinal()
+        self._end = self._start - 1
+        self._days = []
+        self._extend(end.toordinal())
+
+    def is_business_day(self, day: date) -> bool:
+        """Check if a date is a business day."""
+        ordinal = day.toordinal()
+        return day.weekday() not in self.weekends and ordinal not in self.holidays
+
+    def _extend(self, ordinal: int):
+        """Grow the table of business days so it covers ordinal."""
+        with self._lock:
+            if self._start <= ordinal <= self._end:
+                return
+            start = min(ordinal, self._start)
+            end = max(ordinal, self._end)
+            if start < self._start:
+                start = min(start, self._start - EXTEND_DAYS)
+            if end > self._end:
+                end = max(end, self._end + EXTEND_DAYS)
+            self._days = [
+                value for value in range(start, end + 1)
+                if self.is_business_day(date.fromordinal(value))
+            ]
+            self._start, self._end = start, end
+
+    def _offset_ordinal(self, ordinal: int, days: int) -> int:
+        """Return the ordinal of the business day days business days away from ordinal."""
+        # roughly seven calendar days per five business days, plus room for holidays
+        margin = abs(days) * 2 + 14
+        self._extend(ordinal - margin)
+        self._extend(ordinal + margin)
+        table = self._days
+        if days >= 0:
+            # non business days start from the previous business day
+            position = bisect_right(table, ordinal) - 1
+        else:
+            # non business days start from the next business day
+            position = bisect_left(table, ordinal)
+        return table[position + days]
+
+    def offset(self, value: date, days: int) -> date:
+        """Add business days to a date or datetime, keeping the time of the day.
+
+        :param value: Date or datetime.
+        :param days: Number of business days, negative values go back in time.
+        :return: Date or datetime with the same type and time of the day of value.
+        """
+        if not days:
+            return value
+        ordinal = value.toordinal()
+        return value + timedelta(days=self._offset_ordinal(ordinal, days) - ordinal)
+
+    def offsets(
+            self,
+            values: t.Sequence[date],
+            days: t.Union[int, t.Sequence[int]]
+    ) -> t.List[date]:
+        """Add business days to a sequence of dates.
+
+        The table is extended once for the whole sequence, then each offset is one lookup.
+
+        :param values: Dates or datetimes, None values are kept.
+        :param days: Number of business days, for all values or one per value.
+        :return: List of dates or datetimes.
+        """
+        if isinstance(days, int):
+            days = [days] * len(values)
+        ordinals = [value.toordinal() for value in values if value is not None]
+        if ordinals:
+            margin = max(abs(value) for value in days) * 2 + 14
+            self._extend(min(ordinals) - margin)
+            self._extend(max(ordinals) + margin)
+        return [
+            None if value is None else self.offset(value, delta)
+            for value, delta in zip(values, days)
+        ]
+
+
+_calendars = {}
+_calendars_lock = Lock()
+_holidays = None
+
+
+def load_holidays(path: str = '') -> t.Dict[str, t.List[date]]:
+    """Load the holidays, per country, from a JSON file.
+
+    :param path: Path of the JSON file, defaults to BUSINESS_DAYS_HOLIDAYS_PATH.
+    :return: Dictionary mapping country codes to lists of dates.
+    """
+    path = path or BUSINESS_DAYS_HOLIDAYS_PATH
+    if not path or not os.path.exists(path):
+        if path:
+            logger.warning(f'Holidays file not found on {path}, using weekends only.')
+        return {}
+    with open(path) as fh:
+        data = json.load(fh)
+    return {
+        country.upper(): [date(*map(int, day.split('-'))) for day in days]
+        for country, days in data.items()
+    }
+
+
+def get_calendar(country: t.Optional[str] = None) -> BusinessCalendar:
+    """Return the business days calendar of a country.
+
+    :param country: ISO 3166 country code, None for a calendar without holidays.
+    :return: Calendar, shared by all callers.
+    """
+    global _holidays
+    country = getattr(country, 'code', country)
+    key = str(country).upper() if country else ''
+    calendar = _calendars.get(key)
+    if calendar is None:
+        with _calendars_lock:
+            if _holidays is None:
+                _holidays = load_holidays()
+            calendar = _calendars.get(key)
+            if calendar is None:
+                calendar = BusinessCalendar(holidays=_holidays.get(key, ()))
+                _calendars[key] = calendar
+    return calendar
+
+
+def reset_calendars(holidays: t.Optional[t.Dict[str, t.List[date]]] = None):
+    """Drop the cached calendars, holidays are reloaded from the file if not given."""
+    global _holidays
+    with _calendars_lock:
+        _holidays = holidays
+        _calendars.clear()
@@ -1,6 +1,11 @@
 """Image management functions."""
+from collections import OrderedDict
+from threading import Lock
 from typing import Any
+from typing import List
+from typing import Sequence
 
+import json
 import logging
 
 
@@ -147,31 +152,127 @@ def check_image_constraints(metadata: dict, constraints: dict) -> list:
     :param constraints: Constraints to be checked.
     :return: List of error messages.
     """
-    response = []
-    if 'asset' in constraints:
-        constraints = constraints['asset']
-        if not constraints:
-            return response
-    for name, checks in constraints.items():
-        if isinstance(checks, dict):
-            checks = [checks, ]
-
-        for check in checks:
-            if 'value' not in check:
-                logger.info('Error with constraints format')
-                continue
-            elif name not in CHECKERS:
-                logger.info('Invalid constraint name {name}'.format(name=name))
-                continue
-
-            value = check['value']
-            operator = check.get('operator', 'eq')
-
-            passed = CHECKERS[name](metadata, value, operator)
-            if not passed:
-                value = metadata.get(name, '')
-                if name == 'ratio':
-                    value = ''
+    return get_validator(constraints).validate(metadata)
+
+
+def _dimensions(metadata: dict) -> tuple:
+    """Return the image dimensions, as a (width, height) tuple of integers."""
+    w, h = metadata.get('dimensions', '').split(' x ')
+    return int(w), int(h)
+
+
+def _ratio(metadata: dict) -> str:
+    """Return the image ratio, formatted as _check_ratio does."""
+    w, h = _dimensions(metadata)
+    return '{0:.2f}'.format(w / h)
+
+
+COMPILERS = {
+    'dimensions': (
+        lambda value: tuple(int(v) for v in value.split('x')),
+        _dimensions,
+        'dimensions',
+    ),
+    'ratio': (
+        lambda value: '{0:.2f}'.format(value),
+        _ratio,
+        'dimensions',
+    ),
+    'size': (
+        int,
+        lambda metadata: int(metadata.get('size')),
+        'size',
+    ),
+    'dpi': (
+        str,
+        lambda metadata: str(metadata.get('dpi')),
+        'dpi',
+    ),
+    'mimetype': (
+        lambda value: value,
+        lambda metadata: str(metadata.get('mimetype')),
+        'mimetype',
+    ),
+    'orientation': (
+        str,
+        lambda metadata: str(metadata.get('orientation')),
+        'orientation',
+    ),
+}
+"""Per constraint name: function preparing the constraint value, function reading the
+metadata value, with the same conversions done by the _check_* functions, and name of the
+metadata field it reads."""
+
+
+class CompiledCheck:
+    """One constraint, with its value and operation already resolved."""
+
+    __slots__ = ('name', 'value', 'operation', 'extract', 'field')
+
+    def __init__(self, name: str, value: Any, operator: str='eq'):
+        """Compile a constraint.
+
+        :param name: Constraint name, one of CHECKERS.
+        :param value: Constraint value.
+        :param operator: Constraint operator.
+        """
+        prepare, extract, field = COMPILERS[name]
+        self.name = name
+        self.value = prepare(value)
+        self.operation = OPERATIONS[operator]
+        self.extract = extract
+        self.field = field
+
+    def __call__(self, metadata: dict) -> bool:
+        """Check if the constraint is met for Image metadata."""
+        return self.operation(self.extract(metadata), self.value)
+
+
+class ImageValidator:
+    """Tech requirements compiled once and reused to check the metadata of many images.
+
+    Results are memoised by the metadata values used by the checks.
+    """
+
+    def __init__(self, constraints: dict, cache_size: int=4096):
+        """Compile the constraints.
+
+        :param constraints: Constraints, as accepted by check_image_constraints.
+        :param cache_size: Number of results kept in memory.
+        """
+        self.checks = []
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = Lock()
+        if 'asset' in constraints:
+            constraints = constraints['asset'] or {}
+        for name, checks in constraints.items():
+            if isinstance(checks, dict):
+                checks = [checks, ]
+            for check in checks:
+                if 'value' not in check:
+                    logger.info('Error with constraints format')
+                    continue
+                elif name not in CHECKERS:
+                    logger.info('Invalid constraint name {name}'.format(name=name))
+                    continue
+                self.checks.append(
+                    CompiledCheck(name, check['value'], check.get('operator', 'eq'))
+                )
+        self.fields = sorted({check.field for check in self.checks})
+
+    def _key(self, metadata: dict) -> str:
+        """Return the memoisation key of the metadata, using only the fields read by checks."""
+        values = [metadata.get(field) for field in self.fields]
+        return json.dumps(values, default=str)
+
+    def _validate(self, metadata: dict) -> list:
+        """Check the metadata against all constraints, without memoisation."""
+        response = []
+        for check in self.checks:
+            if not check(metadata):
+                name = check.name
+                value = '' if name == 'ratio' else metadata.get(name, '')
                 response.append(
                     {
                         'check': name,
@@ -181,4 +282,78 @@ def check_image_constraints(metadata: dict, constraints: dict) -> list:
                         ).strip()
                     }
                 )
-    return response
+        return response
+
+    def validate(self, metadata: dict) -> list:
+        """Check if the constraints are met for Image metadata.
+
+        :param metadata: Image metadata.
+        :return: List of error messages.
+        """
+        if not self.checks:
+            return []
+        key = self._key(metadata)
+        with self._lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+                return list(response)
+        response = self._validate(metadata)
+        with self._lock:
+            self._cache[key] = response
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(response)
+
+    def validate_many(self, metadatas: Sequence[dict]) -> List[list]:
+        """Check the metadata of many images, each distinct metadata is checked once.
+
+        :param metadatas: Metadata of the images.
+        :return: List of error messages for each image, in the same order.
+        """
+        results = {}
+        responses = []
+        for metadata in metadatas:
+            key = self._key(metadata)
+            if key not in results:
+                results[key] = self.validate(metadata)
+            responses.append(list(results[key]))
+        return responses
+
+
+_validators = OrderedDict()
+_validators_lock = Lock()
+VALIDATORS_CACHE_SIZE = 256
+
+
+def get_validator(constraints: dict) -> ImageValidator:
+    """Return the compiled validator of the constraints, compiling it on the first use.
+
+    Validators are shared by equal constraints, so a new version of the tech requirements of
+    a project gets a new validator.
+
+    :param constraints: Constraints to be checked.
+    :return: Validator.
+    """
+    key = json.dumps(constraints, sort_keys=True, default=str)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+    validator = ImageValidator(constraints)
+    with _validators_lock:
+        _validators[key] = validator
+        if len(_validators) > VALIDATORS_CACHE_SIZE:
+            _validators.popitem(last=False)
+    return validator
+
+
+def check_images_constraints(metadatas: Sequence[dict], constraints: dict) -> List[list]:
+    """Check if the constraints are met for the metadata of many Images.
+
+    :param metadatas: Metadata of the images.
+    :param constraints: Constraints to be checked.
+    :return: List of error messages for each image, in the same order.
+    """
+    return get_validator(constraints).validate_many(metadatas)
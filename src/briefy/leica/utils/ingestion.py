@@ -0,0 +1,178 @@
+"""Bulk ingestion of the assets submitted for an Assignment.
+
+Assets are created, validated and submitted in the request transaction. The slow parts of the
+ingestion, moving the source files between buckets and fetching the metadata, are queued on the
+leica queue after the commit and handled by the worker
+(:func:`briefy.leica.worker.actions.process_ingested_assets`). Source files of assets created
+or changed through the single asset endpoint are moved the same way
+(:func:`briefy.leica.worker.actions.process_source_changes`).
+"""
+from briefy.common.db import datetime_utcnow
+from briefy.common.queue import IQueue
+from briefy.leica import logger
+from briefy.leica.config import ASSETS_BULK_MESSAGE_SIZE
+from briefy.leica.events.asset import AssetCreatedEvent
+from briefy.leica.models import Image
+from briefy.leica.models.asset import check_images_requirements
+from briefy.leica.subscribers import safe_workflow_trigger_transitions
+from briefy.leica.utils import chunked
+from briefy.ws.errors import ValidationError
+from sqlalchemy.exc import IntegrityError
+from zope.component import getUtility
+
+import transaction
+import typing as t
+import uuid
+
+
+INGESTED_EVENT = 'leica.assets.ingested'
+"""Name of the event queued for the worker after the ingestion."""
+
+SOURCE_CHANGED_EVENT = 'leica.assets.source_changed'
+"""Name of the event queued for the worker after the source file of an asset changes."""
+
+REQUIRED_FIELDS = ('title', 'filename', 'source_path', 'owner')
+"""Fields every asset on the batch must have."""
+
+
+def _asset_payload(item: dict, assignment, user_id) -> dict:
+    """Return the payload used to create one asset of the batch.
+
+    :param item: Asset, as sent by the client.
+    :param assignment: Assignment receiving the assets.
+    :param user_id: ID of the user uploading the assets.
+    :return: Payload for Image.create.
+    """
+    payload = dict(item)
+    payload['assignment_id'] = assignment.id
+    payload['id'] = payload.get('id') or uuid.uuid4()
+    payload['professional_id'] = payload.get('professional_id') or assignment.professional_id
+    payload['uploaded_by'] = payload.get('uploaded_by') or user_id
+    payload.pop('state', None)
+    payload.pop('state_history', None)
+    return payload
+
+
+def create_assets(assignment, items: t.Sequence[dict], request) -> t.List[dict]:
+    """Create, validate and submit a batch of assets for an Assignment.
+
+    Each asset is inserted on its own savepoint, so an invalid asset does not prevent the
+    others from being created. Tech requirements are checked once for the whole batch.
+
+    :param assignment: Assignment receiving the assets.
+    :param items: Assets, as sent by the client.
+    :param request: Current request.
+    :return: Result for each item, in the same order.
+    """
+    session = Image.__session__
+    user_id = request.user.id
+    results = []
+    created = []
+    for position, item in enumerate(items):
+        result = {'position': position, 'id': None, 'status': 'error', 'errors': []}
+        results.append(result)
+        if not isinstance(item, dict):
+            result['errors'] = ['Invalid asset payload']
+            continue
+        missing = [name for name in REQUIRED_FIELDS if not item.get(name)]
+        if missing:
+            result['errors'] = [f'Missing field: {name}' for name in missing]
+            continue
+        payload = _asset_payload(item, assignment, user_id)
+        try:
+            with session.begin_nested():
+                image = Image.create(payload)
+                session.add(image)
+        except (IntegrityError, ValidationError, ValueError, TypeError) as exc:
+            logger.info(f'Asset {position} of assignment {assignment.id} not created: {exc}')
+            result['errors'] = [str(getattr(exc, 'message', exc))]
+            continue
+        result['id'] = str(image.id)
+        result['status'] = 'created'
+        created.append((result, image))
+
+    # Validate the whole batch at once, submit then reuses the memoised checks
+    checks = check_images_requirements([image for _, image in created])
+    for result, image in created:
+        event = AssetCreatedEvent(image, request)
+        safe_workflow_trigger_transitions(event, transitions=[('submit', '')])
+        invalid = checks.get(image.id) or []
+        result['state'] = image.state
+        result['is_valid'] = not invalid
+        result['invalid_checks'] = [check['check'] for check in invalid]
+
+    if created:
+        queue_processing(assignment.id, [image for _, image in created])
+    return results
+
+
+def ingestion_messages(
+        assignment_id,
+        images: t.Sequence[Image],
+        event_name: str = INGESTED_EVENT,
+        **data
+) -> t.List[dict]:
+    """Return the leica queue messages processing the ingested assets.
+
+    :param assignment_id: ID of the Assignment.
+    :param images: Ingested assets.
+    :param event_name: Name of the event handled by the worker.
+    :param data: Additional data sent on each message.
+    :return: List of message bodies, each one with at most ASSETS_BULK_MESSAGE_SIZE assets.
+    """
+    assets = [{'id': str(image.id), 'source_path': image.source_path} for image in images]
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'event_name': event_name,
+            'created_at': datetime_utcnow().isoformat(),
+            'guid': str(assignment_id),
+            'data': dict(
+                data,
+                assignment={'id': str(assignment_id)},
+                assets=list(chunk),
+            )
+        }
+        for chunk in chunked(assets, int(ASSETS_BULK_MESSAGE_SIZE))
+    ]
+
+
+def _send_messages(status: bool, messages: t.Sequence[dict], queue=None):
+    """After commit hook writing the messages to the leica queue."""
+    if not status:
+        return
+    for message in messages:
+        try:
+            queue = queue if queue else getUtility(IQueue, 'leica.queue')
+            queue.write_message(message)
+        except Exception as exc:
+            logger.exception(f'Error queueing ingested assets {message["id"]}: {exc}')
+
+
+def queue_processing(assignment_id, images: t.Sequence[Image], queue=None):
+    """Queue moving the source files and fetching the metadata of ingested assets.
+
+    Messages are only written if the current transaction commits, so the worker never sees
+    assets that do not exist.
+
+    :param assignment_id: ID of the Assignment.
+    :param images: Ingested assets.
+    :param queue: Queue to write to, defaults to the leica queue.
+    """
+    messages = ingestion_messages(assignment_id, images)
+    transaction.get().addAfterCommitHook(_send_messages, args=(messages, queue))
+
+
+def queue_source_change(image: Image, update_metadata: bool = False, queue=None):
+    """Queue moving the source file of an asset, once the current transaction commits.
+
+    Moves are handled by the worker, so they are not lost if this process stops.
+
+    :param image: Asset with a new source file.
+    :param update_metadata: Fetch the metadata of the asset after its file is moved.
+    :param queue: Queue to write to, defaults to the leica queue.
+    """
+    messages = ingestion_messages(
+        image.assignment_id, [image], SOURCE_CHANGED_EVENT, update_metadata=update_metadata
+    )
+    transaction.get().addAfterCommitHook(_send_messages, args=(messages, queue))
@@ -2,7 +2,7 @@
 from briefy.leica import models as m  # noQA
 from briefy.leica.config import INTERCOM_APP_ID
 from briefy.leica.config import INTERCOM_HASH_KEY
-from briefy.leica.models.mixins import get_public_user_info
+from briefy.leica.models.mixins import get_public_users_info
 
 import hashlib
 import hmac
@@ -52,14 +52,8 @@ def get_projects_for_professional(professional: 'm.Professional') -> t.Sequence[
 
 def get_project_managers(projects: t.Sequence['m.Project']) -> t.Sequence[dict]:
     """Get project managers."""
-    project_managers = []
-    project_managers_ids = set()
-    for project in projects:
-        for pm in project.internal_pm:
-            if pm not in project_managers_ids:
-                project_managers_ids.add(pm)
-                project_managers.append(get_public_user_info(str(pm)))
-    return project_managers
+    project_managers_ids = [str(pm) for project in projects for pm in project.internal_pm]
+    return list(get_public_users_info(project_managers_ids).values())
 
 
 def intercom_payload_professional(professional: 'm.Professional') -> dict:
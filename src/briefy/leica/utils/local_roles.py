@@ -0,0 +1,125 @@
+"""Index of the local roles of a principal.
+
+The local roles of a principal are loaded with a single query and kept on the current request,
+so user profile properties and views reading them in the same request do not query LocalRole
+again. Each principal has a version, increased whenever one of its local roles is added,
+changed or removed, and an index with an older version is loaded again.
+"""
+from briefy.common.db.models.local_role import LocalRole
+from pyramid.threadlocal import get_current_request
+from sqlalchemy import event
+from threading import Lock
+
+import typing as t
+
+
+_versions = {}
+_versions_lock = Lock()
+
+
+def get_version(principal_id) -> int:
+    """Return the version of the local roles of a principal."""
+    return _versions.get(str(principal_id), 0)
+
+
+def bump_version(principal_id):
+    """Invalidate the indexes of a principal."""
+    key = str(principal_id)
+    with _versions_lock:
+        _versions[key] = _versions.get(key, 0) + 1
+
+
+class PrincipalRoles:
+    """Local roles of one principal, grouped by item type and item."""
+
+    def __init__(self, principal_id, rows: t.Iterable[tuple], version: int = 0):
+        """Initialize the index.
+
+        :param principal_id: ID of the principal.
+        :param rows: Tuples with item_id, item_type and role_name.
+        :param version: Version of the local roles of the principal when the rows were read.
+        """
+        self.principal_id = principal_id
+        self.version = version
+        self._items = {}
+        for item_id, item_type, role_name in rows:
+            roles = self._items.setdefault(item_type, {}).setdefault(item_id, [])
+            if role_name not in roles:
+                roles.append(role_name)
+
+    def item_ids(self, item_type: str, role_name: t.Optional[str] = None) -> list:
+        """Return the ids of the items of a type the principal has a local role on.
+
+        :param item_type: Type of the items, i.e.: project.
+        :param role_name: Only items where the principal has this role.
+        :return: List of item ids.
+        """
+        items = self._items.get(item_type, {})
+        return [
+            item_id for item_id, roles in items.items()
+            if role_name is None or role_name in roles
+        ]
+
+    def roles(self, item_type: str) -> t.Dict[t.Any, t.List[str]]:
+        """Return the roles of the principal on each item of a type.
+
+        :param item_type: Type of the items, i.e.: project.
+        :return: Dictionary mapping item ids to lists of role names.
+        """
+        return {item_id: list(roles) for item_id, roles in self._items.get(item_type, {}).items()}
+
+
+def _pending_principals(session) -> set:
+    """Return the principals with local roles changed on the session but not flushed."""
+    changed = session.new | session.dirty | session.deleted
+    return {str(obj.principal_id) for obj in changed if isinstance(obj, LocalRole)}
+
+
+def load_principal_roles(principal_id) -> PrincipalRoles:
+    """Query all local roles of a principal.
+
+    :param principal_id: ID of the principal.
+    :return: Index of the local roles.
+    """
+    version = get_version(principal_id)
+    session = LocalRole.__session__
+    rows = session.query(
+        LocalRole.item_id, LocalRole.item_type, LocalRole.role_name
+    ).filter(
+        LocalRole.principal_id == principal_id
+    ).order_by(LocalRole.item_id)
+    return PrincipalRoles(principal_id, rows, version)
+
+
+def get_principal_roles(principal_id) -> PrincipalRoles:
+    """Return the local roles index of a principal.
+
+    Inside a request the index is kept on the request and reused while the version of the
+    principal does not change. Outside a request it is always loaded.
+
+    :param principal_id: ID of the principal.
+    :return: Index of the local roles.
+    """
+    request = get_current_request()
+    if request is None:
+        return load_principal_roles(principal_id)
+    key = str(principal_id)
+    session = LocalRole.__session__
+    if key in _pending_principals(session):
+        # as the query would autoflush, flushing the changes also invalidates the index
+        session.flush()
+    indexes = getattr(request, '_leica_local_roles', None)
+    if indexes is None:
+        indexes = request._leica_local_roles = {}
+    index = indexes.get(key)
+    if index is None or index.version != get_version(key):
+        index = indexes[key] = load_principal_roles(principal_id)
+    return index
+
+
+@event.listens_for(LocalRole, 'after_insert', propagate=True)
+@event.listens_for(LocalRole, 'after_update', propagate=True)
+@event.listens_for(LocalRole, 'after_delete', propagate=True)
+def local_role_changed(mapper, connection, target):
+    """Invalidate the indexes of the principal of a changed local role."""
+    bump_version(target.principal_id)
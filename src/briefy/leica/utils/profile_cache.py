@@ -0,0 +1,225 @@
+"""In process cache of public user information.
+
+Entries expire after USER_INFO_CACHE_TTL seconds and the least recently used ones are evicted
+when the cache holds USER_INFO_CACHE_SIZE users, so memory stays bounded on long running
+processes. Updating a UserProfile publishes a new token for the user on the shared cache
+region and every process drops its entry the next time it syncs with the region.
+"""
+from briefy.common.utilities.interfaces import IUserProfileQuery
+from briefy.leica import logger
+from briefy.leica.cache import bump_generations
+from briefy.leica.cache import cache_region
+from briefy.leica.cache import USERS_GENERATION
+from briefy.leica.config import USER_INFO_CACHE_SIZE
+from briefy.leica.config import USER_INFO_CACHE_SYNC_INTERVAL
+from briefy.leica.config import USER_INFO_CACHE_TTL
+from collections import OrderedDict
+from threading import Lock
+from zope.component import getUtility
+
+import time
+import transaction
+import typing as t
+import uuid
+
+
+TOKEN_KEY = 'leica.user_info.token:{0}'
+"""Key, on the shared cache region, of the token of the public information of a user."""
+
+
+def _fetch_users(user_ids: t.Sequence[str]) -> t.Dict[str, dict]:
+    """Query the public information of many users at once.
+
+    get_all_data only returns existing users, the others are read one by one with get_data,
+    which returns the placeholder of invalid ids and the information of the system user.
+    """
+    profile_service = getUtility(IUserProfileQuery)
+    found = {str(data['id']): data for data in profile_service.get_all_data(list(user_ids))}
+    return {
+        user_id: found[user_id] if user_id in found else profile_service.get_data(user_id)
+        for user_id in user_ids
+    }
+
+
+class _Entry:
+    """Cached information of one user."""
+
+    __slots__ = ('data', 'expires_at', 'token')
+
+    def __init__(self, data: dict, expires_at: float, token: t.Optional[str]):
+        """Initialize the entry."""
+        self.data = data
+        self.expires_at = expires_at
+        self.token = token
+
+
+class ProfileCache:
+    """Size bounded LRU cache of public user information, with expiration."""
+
+    def __init__(
+            self,
+            maxsize: int = int(USER_INFO_CACHE_SIZE),
+            ttl: float = float(USER_INFO_CACHE_TTL),
+            sync_interval: float = float(USER_INFO_CACHE_SYNC_INTERVAL),
+            fetch: t.Optional[t.Callable] = None,
+            region=None,
+            clock: t.Callable[[], float] = time.monotonic
+    ):
+        """Initialize the cache.
+
+        :param maxsize: Maximum number of users kept.
+        :param ttl: Seconds an entry is served before being fetched again.
+        :param sync_interval: Seconds between checks of the tokens on the shared region,
+                              0 disables the cross process invalidation.
+        :param fetch: Function receiving a list of user ids and returning a dictionary with
+                      their information, defaults to the IUserProfileQuery utility.
+        :param region: Shared cache region, defaults to the leica cache region.
+        :param clock: Function returning the current time, in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self._fetch = fetch if fetch else _fetch_users
+        self._region = region if region is not None else cache_region
+        self._clock = clock
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._next_sync = clock() + sync_interval
+        self._counters = dict.fromkeys(
+            ('hits', 'misses', 'evictions', 'expirations', 'invalidations'), 0
+        )
+
+    def _tokens(self, user_ids: t.Sequence[str]) -> t.List[t.Optional[str]]:
+        """Read the tokens of many users from the shared region."""
+        if not (self.sync_interval and user_ids):
+            return [None] * len(user_ids)
+        try:
+            values = self._region.get_multi([TOKEN_KEY.format(user_id) for user_id in user_ids])
+        except Exception as exc:
+            logger.exception(f'Error reading user info tokens: {exc}')
+            return [None] * len(user_ids)
+        return [value if isinstance(value, str) else None for value in values]
+
+    def _sync(self):
+        """Drop the entries invalidated by other processes since the last sync."""
+        now = self._clock()
+        with self._lock:
+            if not self.sync_interval or now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            user_ids = list(self._entries)
+        tokens = self._tokens(user_ids)
+        with self._lock:
+            for user_id, token in zip(user_ids, tokens):
+                entry = self._entries.get(user_id)
+                if entry is not None and entry.token != token:
+                    del self._entries[user_id]
+                    self._counters['invalidations'] += 1
+
+    def get_many(self, user_ids: t.Iterable) -> t.Dict[str, dict]:
+        """Return the public information of many users, fetching the missing ones at once.
+
+        :param user_ids: Ids of the users.
+        :return: Dictionary mapping each user id, as a string, to a copy of its information.
+        """
+        keys = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        self._sync()
+        now = self._clock()
+        result = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires_at <= now:
+                    del self._entries[key]
+                    self._counters['expirations'] += 1
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    self._counters['misses'] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    result[key] = entry.data
+                    self._counters['hits'] += 1
+        if missing:
+            tokens = self._tokens(missing)
+            fetched = self._fetch(missing)
+            expires_at = self._clock() + self.ttl
+            with self._lock:
+                for key, token in zip(missing, tokens):
+                    data = fetched.get(key) or {}
+                    result[key] = data
+                    self._entries[key] = _Entry(data, expires_at, token)
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._counters['evictions'] += 1
+        return {key: dict(result[key]) for key in keys}
+
+    def get(self, user_id) -> dict:
+        """Return a copy of the public information of one user."""
+        return self.get_many([user_id])[str(user_id)]
+
+    def invalidate(self, user_id=None):
+        """Drop the entry of a user on this process, or all entries if user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            elif self._entries.pop(str(user_id), None) is not None:
+                self._counters['invalidations'] += 1
+
+    def publish(self, user_id):
+        """Invalidate the entry of a user on this and on the other processes."""
+        self.invalidate(user_id)
+        if not self.sync_interval:
+            return
+        try:
+            self._region.set(TOKEN_KEY.format(user_id), uuid.uuid4().hex)
+        except Exception as exc:
+            logger.exception(f'Error publishing user info invalidation {user_id}: {exc}')
+
+    def stats(self) -> dict:
+        """Return the counters and the current size of the cache."""
+        with self._lock:
+            data = dict(self._counters, size=len(self._entries), maxsize=self.maxsize)
+        total = data['hits'] + data['misses']
+        data['hit_ratio'] = data['hits'] / total if total else 0.0
+        return data
+
+    def reset_stats(self):
+        """Reset the counters."""
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+user_info_cache = ProfileCache()
+"""Cache used by :func:`briefy.leica.models.mixins.get_public_user_info`."""
+
+
+def _publish_after_commit(status: bool, user_ids: t.Set[str]):
+    """After commit hook invalidating the updated users on all processes."""
+    if not status:
+        return
+    for user_id in user_ids:
+        user_info_cache.publish(user_id)
+    bump_generations([USERS_GENERATION])
+
+
+def invalidate_user_info(user_id):
+    """Invalidate the public information of a user.
+
+    The entry of this process is dropped at once, other processes are notified when the
+    current transaction commits, so they never fetch the old information again. Cached
+    serializations embedding users are invalidated too.
+
+    :param user_id: ID of the user.
+    """
+    user_info_cache.invalidate(user_id)
+    bump_generations([USERS_GENERATION])
+    txn = transaction.get()
+    scheduled = getattr(txn, '_leica_user_info', None)
+    if scheduled is None:
+        scheduled = txn._leica_user_info = set()
+        txn.addAfterCommitHook(_publish_after_commit, args=(scheduled, ))
+    scheduled.add(str(user_id))
@@ -1,15 +1,55 @@
-"""S3 helpers."""
+"""S3 helpers.
+
+Moves of asset source files run on a :class:`TransferService`, a bounded thread pool sharing
+one S3 client. API requests queue the moves on the leica queue and the worker runs them, so
+they survive restarts of the web processes. Setting S3_TRANSFER_LOCAL_PATH replaces S3 with a
+local directory, used on tests and benchmarks.
+"""
 from botocore.exceptions import ClientError
 from briefy.leica.config import DEIS_APP
 from briefy.leica.config import IMAGE_BUCKET
+from briefy.leica.config import S3_TRANSFER_LOCAL_PATH
+from briefy.leica.config import S3_TRANSFER_MAX_WORKERS
+from briefy.leica.config import S3_TRANSFER_RETRIES
+from briefy.leica.config import S3_TRANSFER_RETRY_DELAY
 from briefy.leica.config import UPLOAD_BUCKET
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from threading import Lock
 
 import boto3
 import logging
+import os
+import time
+import typing as t
 
 
 logger = logging.getLogger('briefy.leica')
 
+_client = None
+_client_lock = Lock()
+
+
+def get_client():
+    """Return the S3 client shared by all threads, creating it on the first call.
+
+    boto3 clients are thread safe, resources and the default session are not.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.session.Session().client('s3')
+    return _client
+
+
+def reset_client():
+    """Discard the shared S3 client, a new one is created on the next call."""
+    global _client
+    with _client_lock:
+        _client = None
+
 
 def should_move() -> bool:
     """Decide if we need to run the routine to move the image between buckets.
@@ -19,25 +59,25 @@ def should_move() -> bool:
     return True if DEIS_APP else False
 
 
-def move_key_between_buckets(key: str, source: str, dest: str) -> bool:
+def move_key_between_buckets(key: str, source: str, dest: str, client=None) -> bool:
     """Move a file (key) between two S3 buckets.
 
     :param key: Path to data to be moved.
     :param source: Source bucket.
     :param dest: Destination bucket.
+    :param client: S3 client, defaults to the shared one.
     :return: Status of the move.
     """
     status = False
-    s3 = boto3.resource('s3')
-    source_path = '{source}/{key}'.format(source=source, key=key)
+    client = client if client else get_client()
     try:
-        s3.Object(dest, key).copy_from(CopySource=source_path)
+        client.copy_object(Bucket=dest, Key=key, CopySource={'Bucket': source, 'Key': key})
     except ClientError as e:
         if 'NoSuchKey' in str(e):
             logger.exception('Source key not found: {key}'.format(key=key))
     else:
         try:
-            s3.Object(source, key).delete()
+            client.delete_object(Bucket=source, Key=key)
         except ClientError as e:
             logger.exception('Not able to delete: {key} from {source}'.format(
                 key=key,
@@ -48,6 +88,169 @@ def move_key_between_buckets(key: str, source: str, dest: str) -> bool:
     return status
 
 
+class S3Backend:
+    """Move keys between S3 buckets using the shared client."""
+
+    def move(self, key: str, source: str, dest: str):
+        """Copy the key to the destination bucket, then delete it from the source.
+
+        :raises: ClientError if the copy or the delete fails.
+        """
+        client = get_client()
+        client.copy_object(Bucket=dest, Key=key, CopySource={'Bucket': source, 'Key': key})
+        client.delete_object(Bucket=source, Key=key)
+
+    @staticmethod
+    def is_missing(error: Exception) -> bool:
+        """Check if the error means the key does not exist, so retrying is useless."""
+        return isinstance(error, ClientError) and 'NoSuchKey' in str(error)
+
+
+class LocalBackend:
+    """Move files between directories of a local path, standing in for S3 buckets."""
+
+    def __init__(self, root: str):
+        """Initialize the backend.
+
+        :param root: Directory with one subdirectory per bucket.
+        """
+        self.root = root
+
+    def path(self, bucket: str, key: str) -> str:
+        """Return the local path of a key."""
+        return os.path.join(self.root, bucket, key)
+
+    def move(self, key: str, source: str, dest: str):
+        """Move the file of the key to the destination bucket directory.
+
+        :raises: FileNotFoundError if the key does not exist.
+        """
+        dest_path = self.path(dest, key)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        os.replace(self.path(source, key), dest_path)
+
+    @staticmethod
+    def is_missing(error: Exception) -> bool:
+        """Check if the error means the key does not exist, so retrying is useless."""
+        return isinstance(error, FileNotFoundError)
+
+
+class TransferService:
+    """Run moves between buckets on a bounded thread pool, with retries.
+
+    Moves of a key already waiting or running are not scheduled again, the caller receives
+    the future of the pending move instead.
+    """
+
+    def __init__(
+            self,
+            backend=None,
+            max_workers: int = int(S3_TRANSFER_MAX_WORKERS),
+            retries: int = int(S3_TRANSFER_RETRIES),
+            retry_delay: float = float(S3_TRANSFER_RETRY_DELAY)
+    ):
+        """Initialize the service.
+
+        :param backend: S3Backend or LocalBackend, defaults to S3Backend.
+        :param max_workers: Number of moves running at the same time.
+        :param retries: Number of retries of a failed move.
+        :param retry_delay: Delay, in seconds, before the first retry.
+        """
+        self.backend = backend if backend else S3Backend()
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='s3-transfer'
+        )
+        self._lock = Lock()
+        self._pending = {}
+
+    def _move(self, key: str, source: str, dest: str) -> bool:
+        """Move one key, retrying on errors other than a missing key."""
+        for attempt in range(self.retries + 1):
+            try:
+                self.backend.move(key, source, dest)
+                return True
+            except Exception as exc:
+                if self.backend.is_missing(exc):
+                    logger.error(f'Source key not found: {key}')
+                    return False
+                if attempt == self.retries:
+                    logger.exception(f'Not able to move {key} from {source} to {dest}: {exc}')
+                    return False
+                time.sleep(self.retry_delay * 2 ** attempt)
+        return False
+
+    def _done(self, pending_key: tuple, future: Future):
+        """Forget a finished move."""
+        with self._lock:
+            if self._pending.get(pending_key) is future:
+                del self._pending[pending_key]
+
+    def submit(self, key: str, source: str, dest: str) -> Future:
+        """Schedule moving a key between buckets.
+
+        :param key: Path to data to be moved.
+        :param source: Source bucket.
+        :param dest: Destination bucket.
+        :return: Future with the status of the move.
+        """
+        pending_key = (source, dest, key)
+        with self._lock:
+            future = self._pending.get(pending_key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._move, key, source, dest)
+            self._pending[pending_key] = future
+        future.add_done_callback(lambda f: self._done(pending_key, f))
+        return future
+
+    def submit_many(self, keys: t.Iterable[str], source: str, dest: str) -> t.Dict[str, Future]:
+        """Schedule moving many keys between the same buckets.
+
+        :return: Dictionary mapping each distinct key to the future of its move.
+        """
+        return {key: self.submit(key, source, dest) for key in dict.fromkeys(keys)}
+
+    def move_many(self, keys: t.Iterable[str], source: str, dest: str) -> t.Dict[str, bool]:
+        """Move many keys between the same buckets and wait for all of them.
+
+        :return: Dictionary mapping each distinct key to the status of its move.
+        """
+        futures = self.submit_many(keys, source, dest)
+        wait(futures.values())
+        return {key: future.result() for key, future in futures.items()}
+
+    def wait(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait for the pending moves.
+
+        :return: True if all pending moves finished before the timeout.
+        """
+        with self._lock:
+            futures = list(self._pending.values())
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait: bool = True):
+        """Stop the thread pool, optionally waiting for the pending moves."""
+        self._executor.shutdown(wait=wait)
+
+
+_service = None
+_service_lock = Lock()
+
+
+def get_transfer_service() -> TransferService:
+    """Return the transfer service, creating it on the first call."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                backend = LocalBackend(S3_TRANSFER_LOCAL_PATH) if S3_TRANSFER_LOCAL_PATH else None
+                _service = TransferService(backend=backend)
+    return _service
+
+
 def move_asset_source_file(key: str) -> bool:
     """Move an asset source file from the upload bucket to the destination bucket.
 
@@ -61,3 +264,16 @@ def move_asset_source_file(key: str) -> bool:
         # We run only if inside a DEIS environment
         status = move_key_between_buckets(key, source, dest)
     return status
+
+
+def move_asset_source_files(keys: t.Iterable[str]) -> t.Dict[str, bool]:
+    """Move many asset source files to the destination bucket, waiting for all of them.
+
+    :param keys: Paths to data to be moved.
+    :return: Dictionary mapping each key to the status of its move.
+    """
+    keys = list(keys)
+    if not should_move():
+        return {key: False for key in keys}
+    return get_transfer_service().move_many(keys, UPLOAD_BUCKET, IMAGE_BUCKET)
+
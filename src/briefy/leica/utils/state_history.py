@@ -1,5 +1,17 @@
-"""Helpers to validate and fix state_history."""
+"""Helpers to validate and fix state_history.
+
+Usage::
+
+    python -m briefy.leica.utils.state_history [--dry-run] [--workers 4] [--chunk-size 500]
+
+Items are streamed in chunks ordered by id and repaired in a process pool. Each chunk is
+committed on its own and the last committed id, per type, is stored in a checkpoint file so an
+interrupted run can be resumed with --resume. Other runs start from the beginning, and the
+checkpoint file is removed when all types are repaired.
+"""
+from briefy.common.db import datetime_utcnow
 from briefy.leica import logger
+from briefy.leica.cache import bump_generations_on_commit
 from briefy.leica.db import Session
 from briefy.leica.models import Assignment
 from briefy.leica.models import Customer
@@ -11,13 +23,30 @@ from briefy.leica.models import Order
 from briefy.leica.models import Photographer
 from briefy.leica.models import Pool
 from briefy.leica.models import Project
+from briefy.leica.models.transition import transition_rows
+from briefy.leica.models.transition import WorkflowTransition
+from briefy.leica.utils.transitions import update_transition_index
+from concurrent.futures import ProcessPoolExecutor
 from dateutil.parser import parse
 from operator import itemgetter
+from types import SimpleNamespace
+from zope.sqlalchemy import mark_changed
 
+import argparse
+import json
+import os
+import sqlalchemy as sa
 import transaction
 import typing as t
 
 
+KNACK_DATE = parse('2017-02-12')
+"""Transitions before this date were imported from Knack."""
+
+CHECKPOINT_PATH = 'state_history.checkpoint'
+"""Default checkpoint file, on the working directory."""
+
+
 def get_all_items(types: tuple) -> t.List[t.Tuple]:
     """Create a list with all items: id, type, state and state_history."""
     return Session.query(
@@ -47,112 +76,362 @@ def count_wrong(state_history: t.List[dict], state: str, knack_check: bool=True)
     return total_wrong
 
 
-def find_wrong(state_history: t.List[dict], state: str, skip: list, knack_check: bool=True) -> int:
-    """Find transition in the wrong position."""
-    wrong_position = None
-    total = len(state_history)
-    for i, transition in enumerate(state_history):
-        tdate = parse(transition.get('date'), ignoretz=True)
-        if tdate < parse('2017-02-12') and knack_check is False:
-            continue
-        if i in skip:
-            continue
-        if i == 0 and transition.get('to') != 'created':
-            wrong_position = i
-            break
-        if 1 <= i < total:
-            previous = state_history[i-1]
-            if transition.get('from') != previous.get('to'):
-                wrong_position = i
-                break
-        if i == total and transition.get('to') != state:
-            wrong_position = i
-            break
-    return wrong_position
-
-
 def sort_state_history(state_history: t.List[dict]) -> t.List[dict]:
     """Sort by date state history."""
     return sorted(state_history, key=itemgetter('date'))
 
 
-def fix_transition_position(
-        state_history: t.List[dict],
-        position: int
-) -> t.Tuple[t.List[dict], bool]:
-    """Move transition from one position to another and return the updated state history."""
-    state_history = state_history.copy()
-    to_fix = state_history.pop(position)
-    fixed = False
-    for i, transition in enumerate(state_history):
-        tto = transition.get('to')
-        tdate = parse(transition.get('date'), ignoretz=True)
-        fix_date = parse(to_fix.get('date'), ignoretz=True)
-        if to_fix.get('from') == tto and fix_date >= tdate:
-            state_history.insert(i + 1, to_fix)
-            fixed = True
-            break
-    if not fixed:
-        state_history.insert(position, to_fix)
-    return state_history, fixed
+def get_items_chunk(
+        types: tuple,
+        chunk_size: int = 500,
+        after: t.Optional[str] = None
+) -> t.List[t.Tuple]:
+    """Return the next chunk of items, ordered by id, after the given id.
+
+    :param types: Item types.
+    :param chunk_size: Number of items per chunk.
+    :param after: Last id already processed.
+    :return: List of (id, type, state, state_history).
+    """
+    query = get_all_items(types)
+    if after:
+        query = query.filter(Item.id > after)
+    return query.order_by(Item.id).limit(chunk_size).all()
 
 
-def fix_state_history(
+def iter_items(
         types: tuple,
-        model: Item,
-        debug: bool=False,
-        knack_check: bool=True,
-) -> t.Tuple[list, list, list, int]:
-    """Fix state history."""
-    model_name = model.__name__
-    items_fixed = []
-    items_skiped = []
-    items_loop = []
-    all_items = get_all_items(types).all()
-    total = len(all_items)
-    for id_, type_, state, state_history in all_items:
-        skip = []
-        number_fixed = 0
-        total_wrong = count_wrong(state_history, state, knack_check)
-        if not total_wrong:
+        chunk_size: int = 500,
+        after: t.Optional[str] = None
+) -> t.Iterator[t.List[t.Tuple]]:
+    """Stream items, in chunks ordered by id, starting after the given id.
+
+    :param types: Item types.
+    :param chunk_size: Number of items per chunk.
+    :param after: Last id already processed.
+    :return: Iterator of lists of (id, type, state, state_history).
+    """
+    while True:
+        chunk = get_items_chunk(types, chunk_size, after)
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1][0]
+
+
+def _find_wrong_from(
+        entries: t.List[dict],
+        dates: list,
+        start: int,
+        skip: t.Container[int],
+        knack_check: bool
+) -> t.Optional[int]:
+    """Return the position of the first transition not following the previous one.
+
+    :param entries: Sorted state_history.
+    :param dates: Parsed dates of the entries.
+    :param start: First position to check.
+    :param skip: Positions already known as not fixable.
+    :param knack_check: Check transitions imported from Knack.
+    :return: Position of the wrong transition, or None.
+    """
+    for i in range(start, len(entries)):
+        if knack_check is False and dates[i] < KNACK_DATE:
+            continue
+        if i in skip:
             continue
-        new_state_history = sort_state_history(state_history)
-        number_transitions = len(new_state_history)
-        wrong_position = find_wrong(new_state_history, state, skip, knack_check)
-        while wrong_position is not None and number_fixed < number_transitions:
-            if debug:
-                logger.debug(f'Starting fixing model {model_name} id: {id_}')
-            new_state_history, fixed = fix_transition_position(new_state_history, wrong_position)
-            if not fixed:
-                not_fixed = state_history[wrong_position]
-                logger.debug(f'Transition not fixed for {model_name} id: {id_} '
-                             f'\ntransition:{not_fixed}\n')
-                skip.append(wrong_position)
-            else:
-                number_fixed = number_fixed + 1
-            wrong_position = find_wrong(new_state_history, state, skip, knack_check)
-        if number_fixed >= number_transitions:
-            items_loop.append(id_)
-            logger.debug(f'Loop detected for {model_name} id: {id_}')
-        if skip:
-            items_skiped.append(id_)
-        if number_fixed or total_wrong:
-            obj = model.get(id_)
-            obj.state_history = new_state_history
-            items_fixed.append(id_)
-    return items_fixed, items_skiped, items_loop, total
+        transition = entries[i]
+        if i == 0:
+            if transition.get('to') != 'created':
+                return i
+        elif transition.get('from') != entries[i - 1].get('to'):
+            return i
+    return None
+
+
+def _move_transition(entries: t.List[dict], dates: list, position: int) -> t.Tuple[int, bool]:
+    """Move a transition after the last earlier one ending on its from state.
+
+    Entries and dates are changed in place, the transition is kept where it was if there is
+    no such transition.
+
+    :return: Tuple with the new position of the transition and if it was fixed.
+    """
+    to_fix = entries.pop(position)
+    fix_date = dates.pop(position)
+    for i, transition in enumerate(entries):
+        if to_fix.get('from') == transition.get('to') and fix_date >= dates[i]:
+            entries.insert(i + 1, to_fix)
+            dates.insert(i + 1, fix_date)
+            return i + 1, True
+    entries.insert(position, to_fix)
+    dates.insert(position, fix_date)
+    return position, False
+
+
+def repair_item(payload: t.Tuple) -> dict:
+    """Check and repair the state_history of one item, in a single pass.
+
+    The history is sorted by date, then each transition not following the previous one is
+    moved after the last earlier transition ending on its from state. Dates are parsed once
+    and, after each move, the history is only scanned again from the first changed position.
+
+    :param payload: Tuple with id, state, state_history and knack_check.
+    :return: Dictionary with the id, the number of wrong transitions before and after sorting,
+             the repaired state_history (None if not changed) and the skip and loop flags.
+    """
+    id_, state, state_history, knack_check = payload
+    state_history = state_history or []
+    result = {
+        'id': id_,
+        'wrong': count_wrong(state_history, state),
+        'sorted_wrong': 0,
+        'state_history': None,
+        'skipped': False,
+        'loop': False,
+    }
+    entries = sort_state_history(state_history)
+    result['sorted_wrong'] = count_wrong(entries, state)
+    total_wrong = result['wrong'] if knack_check else count_wrong(state_history, state, False)
+    if not total_wrong:
+        return result
+
+    dates = [parse(transition.get('date'), ignoretz=True) for transition in entries]
+    number_transitions = len(entries)
+    number_fixed = 0
+    skip = set()
+    position = _find_wrong_from(entries, dates, 0, skip, knack_check)
+    while position is not None and number_fixed < number_transitions:
+        new_position, fixed = _move_transition(entries, dates, position)
+        if fixed:
+            number_fixed += 1
+        else:
+            logger.debug(f'Transition not fixed for id: {id_} \ntransition:{entries[position]}\n')
+            skip.add(position)
+        position = _find_wrong_from(
+            entries, dates, min(position, new_position), skip, knack_check
+        )
+
+    result['loop'] = number_fixed >= number_transitions
+    result['skipped'] = bool(skip)
+    result['state_history'] = entries
+    return result
+
+
+def write_histories(session, results: t.Sequence[dict], type_: str):
+    """Write repaired histories in batch, with their transitions log and index.
+
+    updated_at is set and the cache generations of the items are changed, so their cached
+    serializations are not served with the previous state_history.
+
+    :param session: Database session.
+    :param results: Results of repair_item with a new state_history.
+    :param type_: Item type.
+    """
+    if not results:
+        return
+    items = Item.__table__
+    transitions = WorkflowTransition.__table__
+    ids = [result['id'] for result in results]
+    session.execute(
+        items.update().where(items.c.id == sa.bindparam('item_id')).values(
+            state_history=sa.bindparam('history'),
+            updated_at=datetime_utcnow(),
+        ),
+        [{'item_id': result['id'], 'history': result['state_history']} for result in results]
+    )
+    session.execute(transitions.delete().where(transitions.c.item_id.in_(ids)))
+    rows = []
+    for result in results:
+        item = SimpleNamespace(id=result['id'], type=type_)
+        rows.extend(transition_rows(item, result['state_history']))
+    if rows:
+        session.execute(transitions.insert(), rows)
+
+    model = {'order': Order, 'assignment': Assignment}.get(type_)
+    if model is not None:
+        table = model.__table__
+        session.execute(
+            table.update().where(table.c.id == sa.bindparam('item_id')).values(
+                transition_index=sa.bindparam('index')
+            ),
+            [
+                {
+                    'item_id': result['id'],
+                    'index': update_transition_index(None, result['state_history'])
+                }
+                for result in results
+            ]
+        )
+    mark_changed(session)
+    bump_generations_on_commit(str(id_) for id_ in ids)
+
+
+class IssuesReport:
+    """Totals of the report_issues report."""
+
+    def __init__(self, types: tuple):
+        """Initialize the report."""
+        self.types = types
+        self.good_before = 0
+        self.good_after = 0
+        self.worst = 0
+        self.better = 0
+        self.same = 0
+        self.other = 0
+        self.total_items = 0
+        self.total_wrong = 0
+        self.total_sorted_wrong = 0
+
+    def add(self, wrong: int, sorted_wrong: int):
+        """Classify one item by its number of wrong transitions, before and after sorting."""
+        self.total_items += 1
+        if 0 < sorted_wrong < wrong:
+            self.better += 1
+            self.total_wrong += wrong
+            self.total_sorted_wrong += sorted_wrong
+        elif sorted_wrong == wrong and sorted_wrong > 0:
+            self.same += 1
+        elif 0 < wrong < sorted_wrong:
+            self.worst += 1
+        elif wrong == 0:
+            self.good_before += 1
+        elif sorted_wrong == 0:
+            self.good_after += 1
+        else:
+            self.other += 1
+
+    def print(self):
+        """Print the report."""
+        total_items = self.total_items or 1
+        print(f'========={self.types}===========')
+        print(f'Good before: {self.good_before}')
+        print(f'Good after: {self.good_after}')
+        print(f'Worst: {self.worst}')
+        print(f'Better: {self.better}')
+        print(f'Same: {self.same}')
+        print(f'Other: {self.other}')
+        print(f'Total Items: {self.total_items}')
+        print(f'Avg wrong: {self.total_wrong / total_items}')
+        print(f'Avg sorted_wrong: {self.total_sorted_wrong / total_items}')
+
+
+class Checkpoint:
+    """Last committed id, per type, and the types already repaired, stored in a JSON file."""
+
+    def __init__(self, path: str = CHECKPOINT_PATH, resume: bool = True):
+        """Initialize the checkpoint.
+
+        :param path: Path of the JSON file, empty to keep the checkpoint only in memory.
+        :param resume: Load the file, if it exists, instead of starting from the beginning.
+        """
+        self.path = path
+        self.data = {}
+        if resume and path and os.path.exists(path):
+            with open(path) as fin:
+                self.data = json.load(fin)
+
+    def _write(self):
+        """Write the checkpoint file."""
+        if self.path:
+            with open(self.path, 'w') as fout:
+                json.dump(self.data, fout)
+
+    def get(self, type_: str) -> t.Optional[str]:
+        """Return the last committed id of a type."""
+        return self.data.get(type_)
+
+    def set(self, type_: str, id_):
+        """Store the last committed id of a type."""
+        self.data[type_] = str(id_)
+        self._write()
+
+    def is_done(self, type_: str) -> bool:
+        """Check if all items of a type were repaired."""
+        return type_ in self.data.get('done', [])
+
+    def done(self, type_: str):
+        """Mark a type as repaired, dropping its last committed id."""
+        self.data.pop(type_, None)
+        done = self.data.setdefault('done', [])
+        if type_ not in done:
+            done.append(type_)
+        self._write()
+
+    def remove(self):
+        """Remove the checkpoint file, once all types are repaired."""
+        self.data = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def repair_state_history(
+        type_: str,
+        knack_check: bool = True,
+        dry_run: bool = False,
+        workers: int = 1,
+        chunk_size: int = 500,
+        checkpoint: t.Optional[Checkpoint] = None,
+) -> t.Tuple[IssuesReport, dict]:
+    """Repair the state_history of all items of one type.
+
+    :param type_: Item type.
+    :param knack_check: Check transitions imported from Knack.
+    :param dry_run: Only report, without writing.
+    :param workers: Number of processes repairing items.
+    :param chunk_size: Number of items per chunk, each chunk is committed on its own.
+    :param checkpoint: Checkpoint to resume from and to update, ignored on dry runs.
+    :return: Tuple with the issues report and the totals of fixed, skipped and loop items.
+    """
+    types = (type_,)
+    report = IssuesReport(types)
+    totals = {'total': 0, 'fixed': 0, 'skipped': 0, 'loop': 0}
+    after = checkpoint.get(type_) if checkpoint and not dry_run else None
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    mapper = executor.map if executor else map
+    try:
+        while True:
+            with transaction.manager:
+                chunk = get_items_chunk(types, chunk_size, after=after)
+                if not chunk:
+                    break
+                payloads = [
+                    (id_, state, state_history, knack_check)
+                    for id_, _, state, state_history in chunk
+                ]
+                results = list(mapper(repair_item, payloads))
+                fixed = [result for result in results if result['state_history'] is not None]
+                if not dry_run:
+                    write_histories(Session(), fixed, type_)
+
+            after = chunk[-1][0]
+            for result in results:
+                report.add(result['wrong'], result['sorted_wrong'])
+                totals['skipped'] += int(result['skipped'])
+                totals['loop'] += int(result['loop'])
+            totals['total'] += len(results)
+            totals['fixed'] += len(fixed)
+            if checkpoint and not dry_run:
+                checkpoint.set(type_, after)
+        if checkpoint and not dry_run:
+            checkpoint.done(type_)
+    finally:
+        if executor:
+            executor.shutdown()
+    return report, totals
 
 
 def fix_customers_wrong_transition():
     """Fix all wrong transitions in customers."""
-    for o in Customer.query().all():
-        state_history = o.state_history.copy()
-        for item in state_history:
-            if item.get('transition') == 'activate':
-                item['to'] = 'active'
-        o.state_history = state_history
-        session = o.__session__
-        session.flush()
+    with transaction.manager:
+        for o in Customer.query().all():
+            state_history = o.state_history.copy()
+            for item in state_history:
+                if item.get('transition') == 'activate':
+                    item['to'] = 'active'
+            o.state_history = state_history
+            session = o.__session__
+            session.flush()
 
 
 def fix_leads_wrong_transition():
@@ -176,85 +455,68 @@ def fix_leads_wrong_transition():
 
 def report_issues(types: tuple):
     """Execute the main report."""
-    good_before = []
-    good_after = []
-    worst = []
-    better = []
-    same = []
-    other = []
-    query = get_all_items(types)
-    total_items = query.count()
-    total_sorted_wrong = 0
-    total_wrong = 0
-    for id_, type_, state, state_history in query:
-        wrong = count_wrong(state_history, state)
-        sorted_state_history = sort_state_history(state_history)
-        sorted_wrong = count_wrong(sorted_state_history, state)
-        if 0 < sorted_wrong < wrong:
-            better.append(id_)
-            total_wrong = total_wrong + wrong
-            total_sorted_wrong = total_sorted_wrong + sorted_wrong
-        elif sorted_wrong == wrong and sorted_wrong > 0:
-            same.append(id_)
-        elif 0 < wrong < sorted_wrong:
-            worst.append(id_)
-        else:
-            if wrong == 0:
-                good_before.append(id_)
-            elif sorted_wrong == 0:
-                good_after.append(id_)
-            else:
-                other.append(id_)
-
-    total_good_before = len(good_before)
-    total_good_after = len(good_after)
-    total_worst = len(worst)
-    total_better = len(better)
-    total_same = len(same)
-    total_other = len(other)
-    avg_wrong = total_wrong / total_items
-    avg_sorted_wrong = total_sorted_wrong / total_items
-
-    print(f'========={types}===========')
-    print(f'Good before: {total_good_before}')
-    print(f'Good after: {total_good_after}')
-    print(f'Worst: {total_worst}')
-    print(f'Better: {total_better}')
-    print(f'Same: {total_same}')
-    print(f'Other: {total_other}')
-    print(f'Total Items: {total_items}')
-    print(f'Avg wrong: {avg_wrong}')
-    print(f'Avg sorted_wrong: {avg_sorted_wrong}')
+    report = IssuesReport(types)
+    for chunk in iter_items(types):
+        for id_, type_, state, state_history in chunk:
+            wrong = count_wrong(state_history, state)
+            sorted_wrong = count_wrong(sort_state_history(state_history), state)
+            report.add(wrong, sorted_wrong)
+    report.print()
 
 
 def main():
     """Verify and fix the state history for all the main types."""
+    parser = argparse.ArgumentParser(description='Verify and fix the state history.')
+    parser.add_argument('--dry-run', action='store_true', help='Only report the issues.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument(
+        '--resume', action='store_true', help='Continue from the checkpoint of the last run.'
+    )
+    parser.add_argument('--types', nargs='*', help='Item types, defaults to all main types.')
+    args = parser.parse_args()
+
     models = [
-        ('customer', Customer, fix_customers_wrong_transition, False, True),
-        ('photographer', Photographer, None, False, True),
-        ('project', Project, None, False, True),
-        ('customeruserprofile', CustomerUserProfile, None, False, True),
-        ('pool', Pool, None, None, True),
-        ('internaluserprofile', InternalUserProfile, None, False, True),
-        ('leadorder', LeadOrder, fix_leads_wrong_transition, False, True),
-        ('order', Order, None, False, True),
-        ('assignment', Assignment, None, False, True),
+        ('customer', Customer, fix_customers_wrong_transition, True),
+        ('photographer', Photographer, None, True),
+        ('project', Project, None, True),
+        ('customeruserprofile', CustomerUserProfile, None, True),
+        ('pool', Pool, None, True),
+        ('internaluserprofile', InternalUserProfile, None, True),
+        ('leadorder', LeadOrder, fix_leads_wrong_transition, True),
+        ('order', Order, None, True),
+        ('assignment', Assignment, None, True),
     ]
-    for type_, model, fix_before, debug, knack_check in models:
-        with transaction.manager:
-            model_name = model.__name__
-            print(f'Fixing model: {model_name}')
-            if fix_before:
-                fix_before()
-            fixed, skip, loop, total = fix_state_history((type_,), model, debug=debug)
-            total_fixed = len(fixed)
-            total_skip = len(skip)
-            total_loop = len(loop)
-            print(f'Total of items: {total}')
-            print(f'Total fixed: {total_fixed}')
-            print(f'Total skip: {total_skip}')
-            print(f'Total loop: {total_loop}')
-            print('\n')
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    for type_, model, fix_before, knack_check in models:
+        if args.types and type_ not in args.types:
+            continue
+        model_name = model.__name__
+        if not args.dry_run and checkpoint.is_done(type_):
+            print(f'Skipping model, already repaired: {model_name}')
+            continue
+        if fix_before and not args.dry_run and checkpoint.get(type_) is None:
+            print(f'Fixing transitions of model: {model_name}')
+            fix_before()
+        print(f'Fixing model: {model_name}')
+        report, totals = repair_state_history(
+            type_,
+            knack_check=knack_check,
+            dry_run=args.dry_run,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            checkpoint=checkpoint,
+        )
+        if args.dry_run:
+            report.print()
+        print(f'Total of items: {totals["total"]}')
+        print(f'Total fixed: {totals["fixed"]}')
+        print(f'Total skip: {totals["skipped"]}')
+        print(f'Total loop: {totals["loop"]}')
+        print('\n')
+    if not args.dry_run:
+        checkpoint.remove()
 
 
 if __name__ == '__main__':
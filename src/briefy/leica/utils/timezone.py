@@ -1,25 +1,197 @@
 """Utils to deal with Timezones.
 
+Timezones are resolved offline, from a GeoJSON file with the timezone polygons, as released by
+https://github.com/evansiroky/timezone-boundary-builder. The file is downloaded by
+scripts/fetch_timezone_polygons.py when the image is built, and loaded by
+:func:`load_resolver` when the application and the worker start.
+
+If the file is not available the GeoNames web service is used instead, unless
+TIMEZONE_POLYGONS_REQUIRED is set, as it is on the image, and then the startup fails.
+
 Documentation: http://www.geonames.org/export/web-services.html
 """
 from briefy.leica import logger
+from briefy.leica.config import TIMEZONE_CACHE_PRECISION
+from briefy.leica.config import TIMEZONE_CACHE_SIZE
+from briefy.leica.config import TIMEZONE_POLYGONS_PATH
+from briefy.leica.config import TIMEZONE_POLYGONS_REQUIRED
+from briefy.leica.config import TIMEZONE_REQUEST_TIMEOUT
+from functools import lru_cache
+from math import floor
+from threading import Lock
 
+import json
+import os
 import requests
+import typing as t
 
 
 ENDPOINT = 'http://api.geonames.org/timezoneJSON?formatted=true&lat={0}&lng={1}&username=briefy'
 
+BUNDLED_POLYGONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'timezones.json'
+)
 
-def timezone_from_coordinates(lat: float, lng: float) -> str:
-    """Get timezone info from coordinates.
+Ring = t.List[t.Tuple[float, float]]
 
-    :param lat: Latitude.
-    :param lng: Longitude.
-    :return: Timezone id. i.e: Europe/Berlin
+
+def _in_ring(lng: float, lat: float, ring: Ring) -> bool:
+    """Check if a point is inside a ring, using ray casting."""
+    inside = False
+    x_j, y_j = ring[-1]
+    for x_i, y_i in ring:
+        if (y_i > lat) != (y_j > lat) and lng < (x_j - x_i) * (lat - y_i) / (y_j - y_i) + x_i:
+            inside = not inside
+        x_j, y_j = x_i, y_i
+    return inside
+
+
+class TimezonePolygon:
+    """Polygon, with holes, of one timezone."""
+
+    __slots__ = ('tzid', 'rings', 'bbox')
+
+    def __init__(self, tzid: str, rings: t.Sequence[Ring]):
+        """Initialize the polygon.
+
+        :param tzid: Timezone id. i.e: Europe/Berlin
+        :param rings: Exterior ring followed by the holes, as (lng, lat) pairs.
+        """
+        self.tzid = tzid
+        self.rings = [[(float(x), float(y)) for x, y in ring] for ring in rings]
+        exterior = self.rings[0]
+        lngs = [x for x, _ in exterior]
+        lats = [y for _, y in exterior]
+        self.bbox = (min(lngs), min(lats), max(lngs), max(lats))
+
+    def contains(self, lng: float, lat: float) -> bool:
+        """Check if the point is inside this polygon."""
+        min_lng, min_lat, max_lng, max_lat = self.bbox
+        if not (min_lng <= lng <= max_lng and min_lat <= lat <= max_lat):
+            return False
+        exterior, *holes = self.rings
+        if not _in_ring(lng, lat, exterior):
+            return False
+        return not any(_in_ring(lng, lat, hole) for hole in holes)
+
+
+class TimezoneResolver:
+    """Resolve coordinates to timezone ids using a grid index over timezone polygons."""
+
+    def __init__(self, polygons: t.Sequence[TimezonePolygon], cell_size: float = 1.0):
+        """Initialize the resolver and build the grid index.
+
+        :param polygons: Timezone polygons.
+        :param cell_size: Size, in degrees, of the grid cells.
+        """
+        self.polygons = list(polygons)
+        self.cell_size = cell_size
+        self._grid = {}
+        for position, polygon in enumerate(self.polygons):
+            min_lng, min_lat, max_lng, max_lat = polygon.bbox
+            for x in range(self._cell(min_lng), self._cell(max_lng) + 1):
+                for y in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                    self._grid.setdefault((x, y), []).append(position)
+
+    @classmethod
+    def from_geojson(cls, data: dict, **kwargs) -> 'TimezoneResolver':
+        """Create a resolver from a GeoJSON FeatureCollection.
+
+        Each feature must have a tzid property and a Polygon or MultiPolygon geometry.
+        """
+        polygons = []
+        for feature in data.get('features', []):
+            tzid = feature['properties']['tzid']
+            geometry = feature['geometry']
+            if geometry['type'] == 'Polygon':
+                parts = [geometry['coordinates']]
+            else:
+                parts = geometry['coordinates']
+            polygons.extend(TimezonePolygon(tzid, rings) for rings in parts)
+        return cls(polygons, **kwargs)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'TimezoneResolver':
+        """Create a resolver from a GeoJSON file."""
+        with open(path) as fh:
+            return cls.from_geojson(json.load(fh), **kwargs)
+
+    def _cell(self, value: float) -> int:
+        """Return the grid cell of a coordinate."""
+        return floor(value / self.cell_size)
+
+    def resolve(self, lat: float, lng: float) -> t.Optional[str]:
+        """Return the timezone id of a point, or None if it is not inside any polygon.
+
+        :param lat: Latitude.
+        :param lng: Longitude.
+        :return: Timezone id. i.e: Europe/Berlin
+        """
+        for position in self._grid.get((self._cell(lng), self._cell(lat)), ()):
+            polygon = self.polygons[position]
+            if polygon.contains(lng, lat):
+                return polygon.tzid
+
+
+_resolver = None
+_resolver_lock = Lock()
+
+
+def load_resolver(required: bool = TIMEZONE_POLYGONS_REQUIRED) -> t.Optional[TimezoneResolver]:
+    """Load the offline resolver from the polygons file.
+
+    Called on startup, so the polygons are never parsed while serving a request.
+
+    :param required: Raise an error if the polygons file is not available.
+    :return: Resolver or None if the polygons file is not available.
+    """
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            path = TIMEZONE_POLYGONS_PATH or BUNDLED_POLYGONS_PATH
+            if os.path.exists(path):
+                _resolver = TimezoneResolver.from_file(path)
+                logger.info(f'Timezone polygons loaded from {path}.')
+            elif required:
+                raise RuntimeError(
+                    f'Timezone polygons not found on {path}, '
+                    'run scripts/fetch_timezone_polygons.py.'
+                )
+            else:
+                logger.warning(f'Timezone polygons not found on {path}, using GeoNames.')
+                _resolver = False
+    return _resolver or None
+
+
+def get_resolver() -> t.Optional[TimezoneResolver]:
+    """Return the offline resolver, loading it if it was not loaded on startup.
+
+    :return: Resolver or None if the polygons file is not available.
     """
+    if _resolver is None:
+        return load_resolver()
+    return _resolver or None
+
+
+def set_resolver(resolver: t.Optional[TimezoneResolver]):
+    """Replace the offline resolver, None reloads it from the polygons file on the next call."""
+    global _resolver
+    with _resolver_lock:
+        _resolver = resolver
+    _resolve_offline.cache_clear()
+
+
+@lru_cache(maxsize=int(TIMEZONE_CACHE_SIZE))
+def _resolve_offline(lat: float, lng: float) -> t.Optional[str]:
+    """Resolve rounded coordinates using the offline resolver."""
+    return get_resolver().resolve(lat, lng)
+
+
+def _timezone_from_geonames(lat: float, lng: float) -> t.Optional[str]:
+    """Get timezone info from GeoNames web service."""
     url = ENDPOINT.format(lat, lng)
     try:
-        r = requests.get(url)
+        r = requests.get(url, timeout=float(TIMEZONE_REQUEST_TIMEOUT))
         data = r.json()
         if data and data.get('timezoneId'):
             return data['timezoneId']
@@ -30,3 +202,19 @@ def timezone_from_coordinates(lat: float, lng: float) -> str:
             logger.error('Unable to fetch timezone thanks to GeoNames throttling.')
     except Exception as exc:
         logger.exception('Error retrieving timezone info: ' + str(exc))
+
+
+def timezone_from_coordinates(lat: float, lng: float) -> t.Optional[str]:
+    """Get timezone info from coordinates.
+
+    :param lat: Latitude.
+    :param lng: Longitude.
+    :return: Timezone id. i.e: Europe/Berlin
+    """
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        logger.error(f'Unable to fetch timezone: invalid coordinates {lat}, {lng}.')
+        return None
+    if get_resolver() is None:
+        return _timezone_from_geonames(lat, lng)
+    precision = int(TIMEZONE_CACHE_PRECISION)
+    return _resolve_offline(round(lat, precision), round(lng, precision))
@@ -2,6 +2,8 @@
 from datetime import datetime
 from sqlalchemy.orm.session import object_session
 
+import typing as t
+
 
 def get_transition_date(transitions: tuple, obj, first: bool=False) -> datetime:
     """Return the datetime for a named transition.
@@ -48,6 +50,93 @@ def get_transition_info_from_history(
     return valid[order] if valid else None
 
 
+def update_transition_index(index: t.Optional[dict], history: list) -> dict:
+    """Fold the new entries of a workflow history into a transition index.
+
+    The index keeps, for each transition name, the first and last dates, their positions in
+    the history and the number of occurrences::
+
+        {
+            'size': 3,
+            'tail': '2017-09-01T12:00:00+00:00',
+            'transitions': {
+                'deliver': {
+                    'first': '2017-08-30T10:00:00+00:00', 'first_position': 1,
+                    'last': '2017-09-01T12:00:00+00:00', 'last_position': 2,
+                    'count': 2
+                }
+            }
+        }
+
+    Only entries after the indexed size are processed, so appending one transition is O(1).
+    If the history was rewritten (shorter, or a different entry at the last indexed
+    position) the index is rebuilt.
+
+    :param index: Current index, or None.
+    :param history: Workflow history.
+    :return: New index, the current one is not modified.
+    """
+    history = history if history and isinstance(history, list) else []
+    size = index.get('size', 0) if index else 0
+    stale = (
+        size > len(history) or
+        (size and history[size - 1].get('date') != index.get('tail'))
+    )
+    if not index or stale:
+        size = 0
+        transitions = {}
+    else:
+        transitions = dict(index.get('transitions', {}))
+
+    for position in range(size, len(history)):
+        entry = history[position]
+        name = entry.get('transition')
+        if not name:
+            continue
+        date = entry.get('date')
+        info = transitions.get(name)
+        if info is None:
+            info = {'first': date, 'first_position': position, 'count': 0}
+        else:
+            info = dict(info)
+        info['last'] = date
+        info['last_position'] = position
+        info['count'] += 1
+        transitions[name] = info
+
+    return {
+        'size': len(history),
+        'tail': history[-1].get('date') if history else None,
+        'transitions': transitions,
+    }
+
+
+def get_transition_date_from_index(
+        transitions: tuple, index: t.Optional[dict], first: bool=False
+) -> datetime:
+    """Return the datetime for a named transition, using a transition index.
+
+    Return None if transition never occurred.
+    :param transitions: List of Transitions names.
+    :param index: Transition index, see :func:`update_transition_index`.
+    :param first: Return the first occurrence of this transition.
+    """
+    indexed = index.get('transitions', {}) if index else {}
+    infos = [indexed[name] for name in transitions if name in indexed]
+    if not infos:
+        return None
+    key = 'first' if first else 'last'
+    choose = min if first else max
+    info = choose(infos, key=lambda value: value[f'{key}_position'])
+    return info[key]
+
+
+def get_transition_count_from_index(transition: str, index: t.Optional[dict]) -> int:
+    """Return the number of times one transition happened, using a transition index."""
+    indexed = index.get('transitions', {}) if index else {}
+    return indexed.get(transition, {}).get('count', 0)
+
+
 # Currently not in use
 # def approve_assets_in_assignment(assignment: Base, context) -> list:
 #     """Approve all pending assets in an Assignment.
@@ -1,18 +1,26 @@
 """Views to handle Assets creation."""
+from briefy.leica.config import ASSETS_BULK_MAX_ITEMS
 from briefy.leica.events import asset as events
+from briefy.leica.models import Assignment
 from briefy.leica.models import Image
+from briefy.leica.utils.ingestion import create_assets
 from briefy.ws import CORS_POLICY
+from briefy.ws.resources import BaseResource
 from briefy.ws.resources import HistoryService
 from briefy.ws.resources import RESTService
 from briefy.ws.resources import VersionsService
 from briefy.ws.resources import WorkflowAwareResource
 from briefy.ws.resources.factory import BaseFactory
 from cornice.resource import resource
+from cornice.resource import view
+from pyramid.httpexceptions import HTTPBadRequest
+from pyramid.httpexceptions import HTTPNotFound
 from pyramid.security import Allow
 
 
 COLLECTION_PATH = '/assignments/{assignment_id}/assets'
 PATH = COLLECTION_PATH + '/{id}'
+BULK_PATH = COLLECTION_PATH + '/bulk'
 
 
 class AssetFactory(BaseFactory):
@@ -69,6 +77,53 @@ class AssetService(RESTService):
         return query
 
 
+@resource(
+    path=BULK_PATH,
+    cors_policy=CORS_POLICY,
+    factory=AssetFactory
+)
+class AssetBulkService(BaseResource):
+    """Bulk ingestion of assets for an Assignment.
+
+    Routes are matched in the order they are registered and venusian scans this module by
+    name, so this resource is registered, and matched, before AssetService PATH.
+    """
+
+    model = Image
+
+    @view(permission='create')
+    def post(self) -> dict:
+        """Create a batch of assets in a single transaction.
+
+        The body is a list of assets, or a dictionary with the list under data. Source files
+        are moved and metadata updated asynchronously by the worker.
+
+        :returns: Number of created assets and the result for each asset, in order.
+        """
+        self.set_transaction_name('bulk_post')
+        request = self.request
+        assignment = Assignment.get(request.matchdict.get('assignment_id'))
+        if not assignment:
+            raise HTTPNotFound('Assignment not found')
+        try:
+            items = request.json_body
+        except ValueError:
+            raise HTTPBadRequest('Invalid JSON payload')
+        if isinstance(items, dict):
+            items = items.get('data')
+        if not isinstance(items, list) or not items:
+            raise HTTPBadRequest('Payload must be a non empty list of assets')
+        max_items = int(ASSETS_BULK_MAX_ITEMS)
+        if len(items) > max_items:
+            raise HTTPBadRequest(f'Payload must have at most {max_items} assets')
+        results = create_assets(assignment, items, request)
+        return {
+            'total': len(results),
+            'created': len([result for result in results if result['status'] == 'created']),
+            'data': results,
+        }
+
+
 @resource(
     collection_path=PATH + '/transitions',
     path=PATH + '/transitions/{transition_id}',
@@ -3,6 +3,7 @@ from briefy.common.db import datetime_utcnow
 from briefy.leica.config import LATE_SUBMISSION_SECONDS
 from briefy.leica.events import assignment as events
 from briefy.leica.models import Assignment
+from briefy.leica.models import AssignmentNotification
 from briefy.leica.models import Professional
 from briefy.ws import CORS_POLICY
 from briefy.ws.resources import HistoryService
@@ -13,6 +14,7 @@ from briefy.ws.resources.factory import BaseFactory
 from cornice.resource import resource
 from datetime import timedelta
 from pyramid.security import Allow
+from sqlalchemy.orm.query import Query
 
 
 COLLECTION_PATH = '/assignments'
@@ -135,3 +137,36 @@ class AssignmentHistory(HistoryService):
     """Workflow history of assignments."""
 
     model = Assignment
+
+
+class AssignmentNotificationFactory(BaseFactory):
+    """AssignmentNotification context factory."""
+
+    model = AssignmentNotification
+
+    __base_acl__ = [
+        (Allow, 'g:briefy', ['list', 'view']),
+    ]
+
+
+@resource(
+    collection_path=COLLECTION_PATH + '/{assignment_id}/notifications',
+    path=COLLECTION_PATH + '/{assignment_id}/notifications/{id}',
+    cors_policy=CORS_POLICY,
+    factory=AssignmentNotificationFactory
+)
+class AssignmentNotificationService(RESTService):
+    """Notifications sent about an Assignment."""
+
+    model = AssignmentNotification
+    default_order_by = 'sent_at'
+    default_order_direction = -1
+
+    def default_filters(self, query: Query) -> Query:
+        """Filter notifications by the Assignment in the path.
+
+        :param query: Base query.
+        :return: Query with additional filters applied to it.
+        """
+        assignment_id = self.request.matchdict.get('assignment_id', '')
+        return query.filter(self.model.assignment_id == assignment_id)
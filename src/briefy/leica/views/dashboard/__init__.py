@@ -95,80 +95,76 @@ LEAD_PROJECT_COLS = (
 
 DASHBOARD_ALL_ORDERS_CUSTOMER_QUERY = """
     SELECT
-    count(active_orders.id) as total,
-    active_orders.title,
-    active_orders.project_id,
+    sum(stats.total) as total,
+    projects.title,
+    stats.project_id,
 
     sum(
     CASE WHEN
-    active_orders.state = 'received'
-    THEN 1 ELSE 0
+    stats.state = 'received'
+    THEN stats.total ELSE 0
     END) as received,
 
     sum(
     CASE WHEN
-    active_orders.state = 'assigned'
-    THEN 1 ELSE 0
+    stats.state = 'assigned'
+    THEN stats.total ELSE 0
     END) as assigned,
 
     sum(
     CASE WHEN
-    active_orders.state = 'scheduled'
-    THEN 1 ELSE 0
+    stats.state = 'scheduled'
+    THEN stats.total ELSE 0
     END) as scheduled,
 
     sum(
     CASE WHEN
-    active_orders.state = 'in_qa'
-    AND active_orders.accept_date IS NULL
-    THEN 1 ELSE 0
+    stats.state = 'in_qa'
+    AND NOT stats.accepted
+    THEN stats.total ELSE 0
     END) as in_qa,
 
     sum(
-    CASE WHEN active_orders.state = 'cancelled'
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'cancelled'
+    THEN stats.total ELSE 0
     END) as cancelled,
 
     sum(
     CASE WHEN
-        active_orders.state = 'delivered'
+        stats.state = 'delivered'
         OR
-        active_orders.state IN ('accepted', 'refused', 'perm_refused', 'in_qa')
+        stats.state IN ('accepted', 'refused', 'perm_refused', 'in_qa')
         AND
-        active_orders.accept_date IS NOT NULL
-    THEN 1 ELSE 0
+        stats.accepted
+    THEN stats.total ELSE 0
     END) as delivered
 
-    FROM
+    FROM dashboard_order_stats as stats JOIN
 
-    (SELECT DISTINCT orders.id, orders.project_id,
-    projects.title, orders.state, orders.accept_date FROM
-
-    (SELECT i.id, i.state, i.title, o.accept_date, o.project_id
-    FROM items as i JOIN orders as o on i.id = o.id
-    WHERE o.current_type = '{type}' AND
-    i.state IN ('received', 'assigned', 'scheduled', 'cancelled',
-    'delivered', 'accepted', 'in_qa', 'refused', 'perm_refused')
-    ) as orders JOIN
-
-    (SELECT i.id, i.state, i.title, p.customer_id, l.principal_id, l.role_name
+    (SELECT i.id, i.title
     FROM items as i JOIN projects as p on i.id = p.id
-    JOIN localroles as l on p.id = l.item_id) as projects
-    on orders.project_id = projects.id JOIN
-
-    (SELECT i.id, i.state, i.title, l.principal_id, l.role_name
-    FROM items as i JOIN customers as c on i.id = c.id
-    JOIN localroles as l on c.id = l.item_id
-    WHERE l.principal_id = '{principal_id}') as customers
-    on projects.customer_id = customers.id
-
-    WHERE
-    (customers.role_name IN ('customer_manager', 'internal_account')
-    AND customers.principal_id = '{principal_id}')
-    OR projects.principal_id = '{principal_id}'
+    WHERE EXISTS (
+        SELECT 1 FROM localroles as cl
+        WHERE cl.item_id = p.customer_id
+        AND cl.principal_id = '{principal_id}'
+        AND (
+            cl.role_name IN ('customer_manager', 'internal_account')
+            OR EXISTS (
+                SELECT 1 FROM localroles as pl
+                WHERE pl.item_id = p.id
+                AND pl.principal_id = '{principal_id}'
+            )
+        )
+    )) as projects
+    on stats.project_id = projects.id
+
+    WHERE stats.current_type = '{type}' AND
+    stats.state IN ('received', 'assigned', 'scheduled', 'cancelled',
+    'delivered', 'accepted', 'in_qa', 'refused', 'perm_refused')
 
-    ) as active_orders GROUP BY
-    active_orders.title,
-    active_orders.project_id
-    ORDER BY active_orders.title
+    GROUP BY
+    projects.title,
+    stats.project_id
+    HAVING sum(stats.total) > 0
+    ORDER BY projects.title
     """
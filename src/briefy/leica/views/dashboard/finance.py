@@ -34,64 +34,60 @@ class DashboardFinanceOrderService(SQLQueryService):
 
     _collection_query = """
     SELECT
-    count(active_orders.id) as total,
-    active_orders.title,
-    active_orders.project_id,
+    sum(stats.total) as total,
+    projects.title,
+    stats.project_id,
 
     sum(
     CASE WHEN
-    active_orders.state = 'received'
-    THEN 1 ELSE 0
+    stats.state = 'received'
+    THEN stats.total ELSE 0
     END) as received,
 
     sum(
     CASE WHEN
-    active_orders.state = 'assigned'
-    THEN 1 ELSE 0
+    stats.state = 'assigned'
+    THEN stats.total ELSE 0
     END) as assigned,
 
     sum(
     CASE WHEN
-    active_orders.state = 'scheduled'
-    THEN 1 ELSE 0
+    stats.state = 'scheduled'
+    THEN stats.total ELSE 0
     END) as scheduled,
 
     sum(
     CASE WHEN
-    active_orders.state IN ('in_qa', 'refused')
-    THEN 1 ELSE 0
+    stats.state IN ('in_qa', 'refused')
+    THEN stats.total ELSE 0
     END) as in_qa,
 
     sum(
-    CASE WHEN active_orders.state = 'cancelled'
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'cancelled'
+    THEN stats.total ELSE 0
     END) as cancelled,
 
     sum(
-    CASE WHEN active_orders.state IN ('delivered', 'accepted')
-    THEN 1 ELSE 0
+    CASE WHEN stats.state IN ('delivered', 'accepted')
+    THEN stats.total ELSE 0
     END) as delivered
 
-    FROM
+    FROM dashboard_order_stats as stats JOIN
 
-    (SELECT DISTINCT orders.id, orders.project_id, projects.title, orders.state FROM
-
-    (SELECT i.id, i.state, i.title, o.project_id
-    FROM items as i JOIN orders as o on i.id = o.id
-    WHERE o.current_type = '{type}' AND
-    i.state IN ('received', 'assigned', 'scheduled', 'cancelled',
-    'delivered', 'accepted', 'in_qa', 'refused')
-    ) as orders JOIN
-
-    (SELECT i.id, i.state, i.title
+    (SELECT i.id, i.title
     FROM items as i JOIN projects as p on i.id = p.id
     WHERE i.state = 'ongoing') as projects
-    on orders.project_id = projects.id
+    on stats.project_id = projects.id
 
-    ) as active_orders GROUP BY
-    active_orders.title,
-    active_orders.project_id
-    ORDER BY active_orders.title
+    WHERE stats.current_type = '{type}' AND
+    stats.state IN ('received', 'assigned', 'scheduled', 'cancelled',
+    'delivered', 'accepted', 'in_qa', 'refused')
+
+    GROUP BY
+    projects.title,
+    stats.project_id
+    HAVING sum(stats.total) > 0
+    ORDER BY projects.title
     """
 
     def query_params(self, query: str) -> str:
@@ -132,49 +128,45 @@ class DashboardFinanceDeliveredOrdersService(SQLQueryService):
 
     _collection_query = """
     SELECT
-    count(active_orders.id) as total,
-    active_orders.title,
-    active_orders.project_id,
+    sum(stats.total) as total,
+    projects.title,
+    stats.project_id,
     sum(
     CASE WHEN
-    active_orders.state = 'delivered'
-    AND active_orders.accept_date IS NULL
-    THEN 1 ELSE 0
+    stats.state = 'delivered'
+    AND NOT stats.accepted
+    THEN stats.total ELSE 0
     END) as newly_delivered,
     sum(
     CASE WHEN
-    active_orders.state IN ('refused', 'in_qa')
-    AND active_orders.accept_date IS NOT NULL
-    THEN 1 ELSE 0
+    stats.state IN ('refused', 'in_qa')
+    AND stats.accepted
+    THEN stats.total ELSE 0
     END) as further_revision,
     sum(
-    CASE WHEN active_orders.state = 'delivered'
-    AND active_orders.accept_date IS NOT NULL
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'delivered'
+    AND stats.accepted
+    THEN stats.total ELSE 0
     END) as re_delivered,
     sum(
-    CASE WHEN active_orders.state = 'accepted'
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'accepted'
+    THEN stats.total ELSE 0
     END) as completed
-    FROM
-
-    (SELECT DISTINCT orders.id, orders.project_id,
-    projects.title, orders.state, orders.accept_date FROM
 
-    (SELECT i.id, i.state, i.title, o.accept_date, o.project_id
-    FROM items as i JOIN orders as o on i.id = o.id
-    WHERE o.current_type = '{type}' AND
-    i.state IN ('delivered', 'accepted', 'in_qa', 'refused')
-    ) as orders JOIN
+    FROM dashboard_order_stats as stats JOIN
 
-    (SELECT i.id, i.state, i.title
+    (SELECT i.id, i.title
     FROM items as i JOIN projects as p on i.id = p.id) as projects
-    on orders.project_id = projects.id
+    on stats.project_id = projects.id
+
+    WHERE stats.current_type = '{type}' AND
+    stats.state IN ('delivered', 'accepted', 'in_qa', 'refused')
 
-    ) as active_orders GROUP BY
-    active_orders.title,
-    active_orders.project_id
-    ORDER BY active_orders.title
+    GROUP BY
+    projects.title,
+    stats.project_id
+    HAVING sum(stats.total) > 0
+    ORDER BY projects.title
     """
 
     def query_params(self, query: str) -> str:
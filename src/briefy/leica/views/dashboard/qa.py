@@ -50,42 +50,36 @@ class DashboardQaTypeService(SQLQueryService):
 
     _collection_query = """
     SELECT
-    count(active_assignments.id) as total,
-
-    sum(
-    CASE WHEN active_assignments.set_type = 'refused_customer'
-    THEN 1 ELSE 0
-    END) as refused_customer,
-
-    sum(
-    CASE WHEN active_assignments.set_type = 'returned_photographer'
-    THEN 1 ELSE 0
-    END) as returned_photographer,
-
-    sum(
-    CASE WHEN active_assignments.set_type = 'new'
-    THEN 1 ELSE 0
-    END) as new
-
-    FROM
-
-    (SELECT DISTINCT assignments.id, assignments.set_type FROM
-
-    (SELECT i.id, a.set_type, o.project_id
-    FROM items as i
-    JOIN assignments as a on i.id = a.id
-    JOIN orders as o on a.order_id = o.id
-    WHERE i.state = 'in_qa'
-    ) as assignments JOIN
-
-    (SELECT i.id, i.state, i.title
-    FROM items as i JOIN projects as p on i.id = p.id
-    JOIN localroles as l on p.id = l.item_id
-    WHERE l.principal_id = '{principal_id}'
-    AND l.role_name = 'internal_qa'
-    ) as projects on assignments.project_id = projects.id
-
-    ) as active_assignments ORDER BY total
+    coalesce(sum(stats.total), 0) as total,
+
+    coalesce(sum(
+    CASE WHEN stats.set_type = 'refused_customer'
+    THEN stats.total ELSE 0
+    END), 0) as refused_customer,
+
+    coalesce(sum(
+    CASE WHEN stats.set_type = 'returned_photographer'
+    THEN stats.total ELSE 0
+    END), 0) as returned_photographer,
+
+    coalesce(sum(
+    CASE WHEN stats.set_type = 'new'
+    THEN stats.total ELSE 0
+    END), 0) as new
+
+    FROM dashboard_assignment_stats as stats JOIN
+
+    (SELECT p.id
+    FROM projects as p
+    WHERE EXISTS (
+        SELECT 1 FROM localroles as l
+        WHERE l.item_id = p.id
+        AND l.principal_id = '{principal_id}'
+        AND l.role_name = 'internal_qa'
+    )) as projects
+    on stats.project_id = projects.id
+
+    WHERE stats.state = 'in_qa'
     """
 
     def query_params(self, query: str) -> str:
@@ -146,45 +140,40 @@ class DashboardQaProjectService(SQLQueryService):
 
     _collection_query = """
     SELECT
-    active_assignments.title,
-    count(active_assignments.id) as total,
+    projects.title,
+    sum(stats.total) as total,
 
     sum(
-    CASE WHEN active_assignments.set_type = 'refused_customer'
-    THEN 1 ELSE 0
+    CASE WHEN stats.set_type = 'refused_customer'
+    THEN stats.total ELSE 0
     END) as refused_customer,
 
     sum(
-    CASE WHEN active_assignments.set_type = 'returned_photographer'
-    THEN 1 ELSE 0
+    CASE WHEN stats.set_type = 'returned_photographer'
+    THEN stats.total ELSE 0
     END) as returned_photographer,
 
     sum(
-    CASE WHEN active_assignments.set_type = 'new'
-    THEN 1 ELSE 0
+    CASE WHEN stats.set_type = 'new'
+    THEN stats.total ELSE 0
     END) as new
 
-    FROM
-
-    (SELECT DISTINCT assignments.id, assignments.set_type, projects.title FROM
-
-    (SELECT i.id, a.set_type, o.project_id
-    FROM items as i
-    JOIN assignments as a on i.id = a.id
-    JOIN orders as o on a.order_id = o.id
-    WHERE i.state = 'in_qa'
-    ) as assignments JOIN
+    FROM dashboard_assignment_stats as stats JOIN
 
-    (SELECT i.id, i.state, i.title
+    (SELECT i.id, i.title
     FROM items as i JOIN projects as p on i.id = p.id
-    JOIN localroles as l on p.id = l.item_id
-    WHERE l.principal_id = '{principal_id}'
-    AND l.role_name = 'internal_qa'
-    ) as projects on assignments.project_id = projects.id
-
-    ) as active_assignments
-    GROUP BY title
-    ORDER BY title
+    WHERE EXISTS (
+        SELECT 1 FROM localroles as l
+        WHERE l.item_id = p.id
+        AND l.principal_id = '{principal_id}'
+        AND l.role_name = 'internal_qa'
+    )) as projects
+    on stats.project_id = projects.id
+
+    WHERE stats.state = 'in_qa'
+    GROUP BY projects.title
+    HAVING sum(stats.total) > 0
+    ORDER BY projects.title
     """
 
     def query_params(self, query: str) -> str:
@@ -71,45 +71,39 @@ class DashboardScoutingCountryService(SQLQueryService):
 
     (SELECT
 
-    count(assignments.id) as total,
-    assignments.country,
+    sum(stats.total) as total,
+    stats.country,
 
     sum(
-    CASE WHEN assignments.state = 'pending'
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'pending'
+    THEN stats.total ELSE 0
     END) as unassigned,
 
     sum(
     CASE WHEN
-    assignments.state = 'published'
-    AND assignments.pool_id IS NOT NULL
-    THEN 1 ELSE 0
+    stats.state = 'published'
+    AND stats.in_pool
+    THEN stats.total ELSE 0
     END) as pool,
 
     sum(
     CASE WHEN
-    assignments.state IN ('assigned', 'scheduled')
-    THEN 1 ELSE 0
+    stats.state IN ('assigned', 'scheduled')
+    THEN stats.total ELSE 0
     END) as assigned
 
-    FROM
-
-    (SELECT DISTINCT
-    i.id, i.state, a.pool_id, ol.country
-    FROM items as i
-    JOIN assignments as a on i.id = a.id
-    JOIN orders as o on a.order_id = o.id
-    JOIN orderlocations as ol on ol.order_id = o.id
-    JOIN projects as p on o.project_id = p.id
-    JOIN localroles as l on l.item_id = p.id
+    FROM dashboard_assignment_stats as stats
     WHERE
-    i.state IN ('pending', 'published', 'assigned', 'scheduled')
-    AND o.current_type = 'order'
-    AND l.principal_id = '{principal_id}'
-    AND l.role_name = 'internal_scout'
-    ) as assignments
-
-    GROUP BY assignments.country) as assignments_country JOIN
+    stats.state IN ('pending', 'published', 'assigned', 'scheduled')
+    AND stats.current_type = 'order'
+    AND EXISTS (
+        SELECT 1 FROM localroles as l
+        WHERE l.item_id = stats.project_id
+        AND l.principal_id = '{principal_id}'
+        AND l.role_name = 'internal_scout'
+    )
+    GROUP BY stats.country
+    HAVING sum(stats.total) > 0) as assignments_country JOIN
 
     (SELECT
     country,
@@ -187,61 +181,47 @@ class DashboardScoutingProjectService(SQLQueryService):
 
     _collection_query = """
     SELECT
-    active_assignments.project_id,
-    active_assignments.title,
-    count(active_assignments.id) as total,
+    stats.project_id,
+    projects.title,
+    sum(stats.total) as total,
 
     sum(
-    CASE WHEN active_assignments.state = 'pending'
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'pending'
+    THEN stats.total ELSE 0
     END) as unassigned,
 
     sum(
-    CASE WHEN active_assignments.state = 'published'
-    AND active_assignments.pool_id is not NULL
-    THEN 1 ELSE 0
+    CASE WHEN stats.state = 'published'
+    AND stats.in_pool
+    THEN stats.total ELSE 0
     END) as pool,
 
     sum(
     CASE WHEN
-    active_assignments.state IN ('assigned', 'scheduled')
-    THEN 1 ELSE 0
+    stats.state IN ('assigned', 'scheduled')
+    THEN stats.total ELSE 0
     END) as assigned,
 
-    count(DISTINCT active_assignments.professional_id) as professionals
+    count(DISTINCT stats.professional_id) as professionals
 
-    FROM
+    FROM dashboard_assignment_stats as stats JOIN
 
-    (SELECT DISTINCT
-    projects.title,
-    assignments.project_id,
-    assignments.id,
-    assignments.state,
-    assignments.pool_id,
-    assignments.professional_id
-
-    FROM
-
-    (SELECT i.id, i.state, a.pool_id, a.professional_id, o.project_id
-    FROM items as i
-    JOIN assignments as a on i.id = a.id
-    JOIN orders as o on a.order_id = o.id
-    JOIN localroles as l on l.item_id = a.id
-    WHERE i.state IN ('pending', 'published', 'assigned', 'scheduled')
-    AND o.current_type = 'order'
-    ) as assignments JOIN
-
-    (SELECT i.id, i.state, i.title
+    (SELECT i.id, i.title
     FROM items as i JOIN projects as p on i.id = p.id
-    JOIN localroles as l on p.id = l.item_id
-    WHERE l.principal_id = '{principal_id}'
-    AND l.role_name = 'internal_scout'
-    ) as projects on assignments.project_id = projects.id
-
-    ) as active_assignments
-
-    GROUP BY active_assignments.title, active_assignments.project_id
-    ORDER BY title
+    WHERE EXISTS (
+        SELECT 1 FROM localroles as l
+        WHERE l.item_id = p.id
+        AND l.principal_id = '{principal_id}'
+        AND l.role_name = 'internal_scout'
+    )) as projects
+    on stats.project_id = projects.id
+
+    WHERE stats.state IN ('pending', 'published', 'assigned', 'scheduled')
+    AND stats.current_type = 'order'
+    AND stats.total > 0
+
+    GROUP BY projects.title, stats.project_id
+    ORDER BY projects.title
     """
 
     def query_params(self, query: str) -> str:
@@ -8,6 +8,7 @@ from briefy.leica.models import Assignment
 from briefy.leica.models import LeadOrder
 from briefy.leica.models import Order
 from briefy.leica.models import Project
+from briefy.leica.models.project.settings import get_project_settings
 from briefy.ws import CORS_POLICY
 from briefy.ws.resources import HistoryService
 from briefy.ws.resources import RESTService
@@ -88,9 +89,10 @@ class OrderService(RESTService):
         payload = request.validated
         payload['source'] = 'customer' if 'g:customers' in user_groups else 'briefy'
         project = Project.get(payload.get('project_id'))
-        add_order_roles = project.add_order_roles
+        settings = get_project_settings(project)
+        add_order_roles = settings.add_order_roles
 
-        if project.order_type.value == 'leadorder':
+        if settings.order_type.value == 'leadorder':
             model = LeadOrder
             current_type = 'leadorder'
         else:
@@ -1,22 +1,57 @@
-"""Reports in CSV."""
+"""Reports in CSV.
+
+Streamed reports cross a transaction boundary. The view runs inside the request transaction,
+managed by pyramid_tm, which ends when the view returns. The body is consumed by the WSGI
+server after that, inside a transaction of its own (:func:`stream_in_transaction`). The first
+batch of results is read and converted inside the view, so query, permission and conversion
+errors still return an error status. Errors after that can only end the response early, as
+the 200 status was already sent.
+"""
+from briefy.leica.reports import iter_csv
 from briefy.ws.resources import BaseResource
 from datetime import datetime
 from io import StringIO
+from itertools import islice
 from pyramid.request import Response
 from sqlalchemy.orm import Query
 
 import csv
 import newrelic.agent
+import transaction
 import typing as t
 
 
+def stream_in_transaction(chunks: t.Iterable) -> t.Iterator[bytes]:
+    """Consume chunks inside its own transaction, encoding them to utf-8.
+
+    Streamed responses are consumed by the WSGI server after the request transaction was
+    already finished, so the queries feeding the chunks need a transaction of their own. The
+    transaction is aborted if the response is not fully consumed.
+    """
+    with transaction.manager:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+
+
 class BaseReport(BaseResource):
-    """Reports in CSV."""
+    """Reports in CSV.
+
+Streamed reports cross a transaction boundary. The view runs inside the request transaction,
+managed by pyramid_tm, which ends when the view returns. The body is consumed by the WSGI
+server after that, inside a transaction of its own (:func:`stream_in_transaction`). The first
+batch of results is read and converted inside the view, so query, permission and conversion
+errors still return an error status. Errors after that can only end the response early, as
+the 200 status was already sent.
+"""
 
     model = None
     filename = ''
     mime_type = 'text/csv'
     column_order = ()
+    stream = True
+    """Stream the CSV to the client instead of building it in memory."""
+    batch_size = 500
+    """Number of rows fetched from the server side cursor at a time when streaming."""
 
     def __init__(self, context, request):
         """Initialize the report view."""
@@ -50,9 +85,41 @@ class BaseReport(BaseResource):
         """Return an iterator with all results from the query."""
         return self.default_filters(self.model.query())
 
+    def iter_results(self) -> t.Iterator:
+        """Iterate over the results, fetching ORM queries in batches of batch_size."""
+        results = self.results()
+        if isinstance(results, Query):
+            results = results.yield_per(self.batch_size)
+        return iter(results)
+
+    def check_results(self):
+        """Read and convert the first batch of results inside the request transaction.
+
+        Streamed reports are read after the view returns, so this runs their query once here,
+        limited to batch_size rows, and errors are raised by the view itself.
+        """
+        results = self.results()
+        if isinstance(results, Query):
+            results = results.limit(self.batch_size)
+        for row in islice(results, self.batch_size):
+            self.convert_data(row)
+
+    def iter_report_data(self) -> t.Iterator[str]:
+        """Execute the report lazily, yielding the CSV content in chunks.
+
+        The results iterator is created here, so request attributes are read by the view.
+        """
+        results = self.iter_results()
+        rows = (self.convert_data(row) for row in results)
+        header = [c for c in self.column_order]
+        return iter_csv(rows, header, quoting=csv.QUOTE_ALL)
+
     def get_report_data(self, filename: str):
         """Execute the report, return a tuple with data and metadata."""
         content_type = self.mime_type
+        if self.stream:
+            self.check_results()
+            return filename, content_type, self.iter_report_data()
         csv_file = StringIO()
         header = [c for c in self.column_order]
         writer = csv.DictWriter(csv_file, fieldnames=header, quoting=csv.QUOTE_ALL)
@@ -64,7 +131,11 @@ class BaseReport(BaseResource):
         return filename, content_type, data
 
     def get_response(self, filename, content_type, data):
-        """Prepare the response."""
+        """Prepare the response.
+
+        data could be either a string or an iterator of strings, in which case the
+        response body is streamed.
+        """
         response = Response()
         header_list = [
             ('Content-Disposition', 'attachment; filename={filename}'.format(
@@ -77,8 +148,11 @@ class BaseReport(BaseResource):
         response.status_int = 200
         response.charset = 'utf-8'
         response.content_type = content_type
-        response.text = data
         response.headerlist = header_list
+        if isinstance(data, str):
+            response.text = data
+        else:
+            response.app_iter = stream_in_transaction(data)
         return response
 
     def get(self) -> Response:
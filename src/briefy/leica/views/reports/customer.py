@@ -1,4 +1,5 @@
 """Views to handle Customer Dashboards."""
+from briefy.leica.models.reports.customer import orders_by_project
 from briefy.leica.models.reports.customer import OrdersByProjectReport
 from briefy.leica.views.reports import BaseReport
 from briefy.ws import CORS_POLICY
@@ -66,59 +67,44 @@ class CustomerReports(BaseReport):
         'Delivery Date',
     )
 
+    page_size = 1000
+    """Number of rows fetched per query."""
+
     def convert_data(self, data: tuple):
         """Apply some basic type conversions."""
-        slug, customer_order_id, title, project_title, \
-            state, created_at, scheduled_datetime, deliver_date, \
-            accept_date, timezone_str = data
-
-        timezone_obj = timezone(timezone_str)
+        timezone_obj = timezone(data.timezone)
         response = {
-            'Briefy ID': slug,
-            'Order ID': customer_order_id,
-            'Order Name': title,
-            'Project Name': project_title,
-            'Status': get_label_for_order_status(state, accept_date),
-            'Input Date': self._format_datetime(created_at, timezone_obj, False),
-            'Shooting Date': self._format_datetime(scheduled_datetime, timezone_obj, True),
-            'Delivery Date': self._format_datetime(deliver_date, timezone_obj, False),
+            'Briefy ID': data.slug,
+            'Order ID': data.customer_order_id,
+            'Order Name': data.title,
+            'Project Name': data.project_title,
+            'Status': get_label_for_order_status(data.state, data.accept_date),
+            'Input Date': self._format_datetime(data.created_at, timezone_obj, False),
+            'Shooting Date': self._format_datetime(data.scheduled_datetime, timezone_obj, True),
+            'Delivery Date': self._format_datetime(data.deliver_date, timezone_obj, False),
         }
         return response
 
     def results(self) -> t.Iterator:
-        """Return the results iterator."""
-        session = self.request.db
-        raw_query = """
-        SELECT DISTINCT
-        orders.slug,
-        orders.customer_order_id,
-        orders.title,
-        projects.title,
-        orders.state,
-        orders.created_at,
-        orders.scheduled_datetime,
-        orders.deliver_date,
-        orders.accept_date,
-        orders.timezone
-
-        FROM
-
-        (SELECT i.slug, i.state, i.title, o.accept_date, o.project_id,
-        o.customer_order_id, i.created_at, o.scheduled_datetime,
-        o.deliver_date, o.timezone
-        FROM items as i JOIN orders as o on i.id = o.id
-        ) as orders JOIN
-
-        (SELECT i.id, i.state, i.title, p.customer_id, l.principal_id, l.role_name
-        FROM items as i JOIN projects as p on i.id = p.id
-        JOIN localroles as l on p.id = l.item_id
-        WHERE l.principal_id = '{principal_id}') as projects
-        on orders.project_id = projects.id
-
-        WHERE projects.id = '{project_id}'
-        ORDER BY orders.created_at
+        """Return the results iterator.
+
+        Orders are fetched in pages of page_size rows, using keyset pagination on
+        (created_at, id), so memory usage does not depend on the number of orders.
         """
-        user = self.request.user
+        session = self.request.db
+        principal_id = self.request.user.id
         project_id = self.request.matchdict.get('id', '')
-        query = raw_query.format(principal_id=user.id, project_id=project_id)
-        return session.execute(query)
+        page_size = self.page_size
+
+        def iter_pages():
+            after = None
+            while True:
+                query = orders_by_project(project_id, principal_id, after=after, limit=page_size)
+                rows = session.execute(query).fetchall()
+                yield from rows
+                if len(rows) < page_size:
+                    break
+                last = rows[-1]
+                after = (last.created_at, last.id)
+
+        return iter_pages()
@@ -62,6 +62,9 @@ class MsOphelieReport(BaseReport):
             raise HTTPNotFound('Report not found')
         content_type = self.mime_type
         report = all_reports[report_id]()
+        if self.stream:
+            report.check()
+            return filename, content_type, report.stream()
         csv_file = report()
         data = csv_file.getvalue()
         return filename, content_type, data
@@ -1,5 +1,6 @@
 """Vocabularies used by Leica."""
 from briefy.leica.vocabularies.asset import AssetTypes  # noQA
+from briefy.leica.vocabularies.assignment import NotificationKindChoices  # noQA
 from briefy.leica.vocabularies.assignment import SchedulingIssuesChoices  # noQA
 from briefy.leica.vocabularies.assignment import TypesOfSetChoices  # noQA
 from briefy.leica.vocabularies.billing_info import ContactTypes  # noQA
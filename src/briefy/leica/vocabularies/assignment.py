@@ -3,6 +3,7 @@ from briefy.common.vocabularies import LabeledEnum
 
 
 __all__ = (
+    'NotificationKindChoices',
     'SchedulingIssuesChoices',
     'TypesOfSetChoices',
 )
@@ -51,3 +52,11 @@ types_options = [
 ]
 
 TypesOfSetChoices = LabeledEnum('TypesOfSetChoices', types_options)
+
+
+notification_options = [
+    ('before_shooting', 'before_shooting', 'Creative notified before the shooting'),
+    ('late_submission', 'late_submission', 'Creative notified about late submission'),
+]
+
+NotificationKindChoices = LabeledEnum('NotificationKindChoices', notification_options)
@@ -4,11 +4,19 @@ from briefy.common.queue.message import SQSMessage
 from briefy.common.utils.data import Objectify
 from briefy.common.worker.queue import QueueWorker
 from briefy.leica.config import NEW_RELIC_LICENSE_KEY
+from briefy.leica.config import WORKER_BATCH_SIZE
+from briefy.leica.config import WORKER_MAX_WORKERS
 from briefy.leica.log import worker_logger as logger
+from briefy.leica.utils.timezone import load_resolver
 from briefy.leica.worker import actions
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from zope.component import getUtility
 
 import newrelic.agent
+import time
+import typing as t
+import zlib
 
 
 MESSAGE_DISPATCH = {
@@ -59,7 +67,19 @@ MESSAGE_DISPATCH = {
         'action': actions.asset_copy_malfunction,
         'success_notification': None,
         'failure_notification': None,
-    }
+    },
+    'leica.assets.ingested': {
+        'name': 'moving and updating assets ingested in bulk',
+        'action': actions.process_ingested_assets,
+        'success_notification': None,
+        'failure_notification': None,
+    },
+    'leica.assets.source_changed': {
+        'name': 'moving source files of created or updated assets',
+        'action': actions.process_source_changes,
+        'success_notification': None,
+        'failure_notification': None,
+    },
 }
 
 """
@@ -164,16 +184,130 @@ class Worker(QueueWorker):
         return status
 
 
+class ConcurrentWorker(Worker):
+    """Briefy.leica queue worker processing messages concurrently.
+
+    Messages are received in batches and distributed among max_workers lanes. Each lane is a
+    single thread, so messages for the same assignment always go to the same lane and are
+    processed one at a time, in the order they were received. As the Session is scoped per
+    thread, each lane has its own database session.
+    """
+
+    name = 'briefy.leica.concurrent_worker'
+    """Worker name."""
+
+    max_workers = 4
+    """Number of messages processed at the same time."""
+
+    batch_size = 10
+    """Maximum number of messages received at once (SQS allows up to 10)."""
+
+    def __init__(self, *args, max_workers: int = None, batch_size: int = None, **kwargs):
+        """Initialize the worker and its processing lanes."""
+        super().__init__(*args, **kwargs)
+        self.max_workers = max_workers or self.max_workers
+        self.batch_size = batch_size or self.batch_size
+        self._lanes = [ThreadPoolExecutor(max_workers=1) for _ in range(self.max_workers)]
+        self._running = False
+
+    @property
+    def session(self):
+        """Return the session for the current thread."""
+        return self.Session()
+
+    @staticmethod
+    def message_key(message: SQSMessage) -> str:
+        """Return the key used to order the processing of a message.
+
+        :param message: A message from the queue
+        :returns: Id of the assignment, or of the message itself if there is no assignment.
+        """
+        body = message.body
+        data = body.get('data') or {}
+        assignment = data.get('assignment') or {}
+        return str(assignment.get('id') or body.get('id', ''))
+
+    def _lane(self, message: SQSMessage) -> ThreadPoolExecutor:
+        """Return the lane responsible for a message."""
+        key = self.message_key(message).encode('utf-8')
+        return self._lanes[zlib.crc32(key) % len(self._lanes)]
+
+    def _process(self, message: SQSMessage) -> bool:
+        """Process one message and release the thread session afterwards."""
+        try:
+            self.process_message(message)
+        except Exception:
+            logger.exception('Failure processing message {0}'.format(message.body.get('id')))
+            return False
+        finally:
+            self.Session.remove()
+        return True
+
+    def process_batch(self, messages: t.Sequence[SQSMessage]) -> int:
+        """Process a batch of messages concurrently, waiting for all of them.
+
+        Messages processed without exceptions are deleted from the queue, the others will be
+        received again after their visibility timeout.
+
+        :param messages: Messages from the queue
+        :returns: Number of messages deleted from the queue.
+        """
+        futures = {self._lane(message).submit(self._process, message): message
+                   for message in messages}
+        wait(futures)
+        total = 0
+        for future, message in futures.items():
+            if future.result():
+                message.delete()
+                total += 1
+        return total
+
+    def receive_messages(self) -> t.List[SQSMessage]:
+        """Receive a batch of messages from the input queue.
+
+        Long polling is controlled by the ReceiveMessageWaitTimeSeconds setting of the queue.
+        """
+        return self.input_queue.get_messages(num_messages=self.batch_size)
+
+    def stop(self):
+        """Stop the processing loop after the current batch."""
+        self._running = False
+
+    def __call__(self):
+        """Receive and process messages until stopped."""
+        self._running = True
+        try:
+            while self._running:
+                messages = self.receive_messages()
+                if messages:
+                    self.process_batch(messages)
+                else:
+                    time.sleep(self.run_interval)
+        finally:
+            for lane in self._lanes:
+                lane.shutdown(wait=True)
+
+
 def main():
     """Initialize and execute the Worker."""
     queue = getUtility(IQueue, 'leica.queue')
-    worker = Worker(logger_=logger, input_queue=queue)
+    max_workers = int(WORKER_MAX_WORKERS)
+    if max_workers > 1:
+        worker = ConcurrentWorker(
+            logger_=logger,
+            input_queue=queue,
+            max_workers=max_workers,
+            batch_size=int(WORKER_BATCH_SIZE),
+        )
+    else:
+        worker = Worker(logger_=logger, input_queue=queue)
     if NEW_RELIC_LICENSE_KEY:
         newrelic.agent.register_application(timeout=10.0)
     try:
+        load_resolver()
         worker.Session = ignite_database_session()
         worker()
     except Exception as error:
-        worker_name = Worker.name
+        worker_name = worker.name
         logger.exception(f'{worker_name} exiting due to an exception. error: {error}')
         raise
@@ -1,12 +1,16 @@
 """Briefy Leica worker."""
 from briefy.common.users import SystemUser
-from briefy.leica.cache import cache_region
+from briefy.leica.events.asset import AssetCreatedEvent
 from briefy.leica.log import worker_logger as logger
 from briefy.leica.models import Assignment
 from briefy.leica.models import Comment
+from briefy.leica.models import Image
 from briefy.leica.models import Order
+from briefy.leica.subscribers import safe_update_metadata
+from briefy.leica.utils import s3
 
 import transaction
+import typing as t
 
 
 def update_delivery(order: Order, laure_data: object) -> dict:
@@ -69,9 +73,6 @@ def validate_assignment(laure_data: object, session: object) -> (bool, dict):
             )
         logger.info('Assignment {0} state set to {1}'.format(assignment.slug, assignment.state))
 
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
-
     return True, {}
 
 
@@ -109,9 +110,6 @@ def ignored_assignment(laure_data: object, session: object) -> (bool, dict):
             )
         logger.info('Assignment {0} state set to {1}'.format(assignment.slug, assignment.state))
 
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
-
     return True, {}
 
 
@@ -154,9 +152,6 @@ def invalidate_assignment(laure_data: object, session: object) -> (bool, dict):
         )
         logger.info('Assignment {0} state set to {1}'.format(assignment.slug, assignment.state))
 
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
-
         return True, {}
 
 
@@ -203,9 +198,6 @@ def approve_assignment(
                 message='Assets automatic delivered.'
             )
 
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(order)
-
         logger.info(
             msg.format(
                 order_id=assignment.order.id
@@ -262,7 +254,78 @@ def asset_copy_malfunction(laure_data: object, session: object) -> (bool, dict):
         assignment.workflow_context = SystemUser
         assignment.comments.append(comment)
 
-        cache_region.invalidate(assignment)
-        cache_region.invalidate(assignment.order)
-
     return True, {}
+
+
+def _move_source_files(items: t.Sequence[dict]) -> (bool, t.List[dict]):
+    """Move the source files of existing assets to the image bucket.
+
+    Only source files of existing assets are moved, errors on the move are logged and never
+    raised, so the message is not retried moving files already moved.
+
+    :param items: Assets, each one with its id and source_path.
+    :return: Flag indicating if all assets were found and moved, assets moved.
+    """
+    status = True
+    found = []
+    with transaction.manager:
+        for item in items:
+            if not Image.get(item['id']):
+                logger.error('Got message for non-existing asset {0}'.format(item['id']))
+                status = False
+                continue
+            found.append(item)
+
+    moved = {}
+    if found and s3.should_move():
+        keys = [item['source_path'] for item in found]
+        try:
+            moved = s3.move_asset_source_files(keys)
+        except Exception as exc:
+            logger.exception('Error moving asset source files: {0}'.format(exc))
+            moved = {key: False for key in keys}
+
+    result = []
+    for item in found:
+        if moved.get(item['source_path']) is False:
+            logger.error('Source file of asset {0} was not moved: {1}'.format(
+                item['id'], item['source_path']))
+            status = False
+            continue
+        result.append(item)
+    return status, result
+
+
+def process_ingested_assets(laure_data: object, session: object) -> (bool, dict):
+    """Move the source files and update the metadata of assets ingested in bulk.
+
+    An asset whose source file could not be moved is skipped, the others are still processed.
+
+    :param laure_data: Python object with the assignment and the ingested assets
+    :return: Flag indicating if all assets were found and moved, empty dict
+    """
+    status, items = _move_source_files(laure_data.dct.get('assets', []))
+    for item in items:
+        with transaction.manager:
+            asset = Image.get(item['id'])
+            safe_update_metadata(asset)
+            # event dispatch: sqs event, as done by the single asset endpoint
+            AssetCreatedEvent(asset, None)()
+    return status, {}
+
+
+def process_source_changes(laure_data: object, session: object) -> (bool, dict):
+    """Move the source files of assets created or changed by the single asset endpoint.
+
+    The metadata is fetched after the move, when requested, so it is read from the file on
+    the image bucket.
+
+    :param laure_data: Python object with the assignment and the changed assets
+    :return: Flag indicating if all assets were found and moved, empty dict
+    """
+    status, items = _move_source_files(laure_data.dct.get('assets', []))
+    if laure_data.dct.get('update_metadata'):
+        for item in items:
+            with transaction.manager:
+                safe_update_metadata(Image.get(item['id']))
+    return status, {}
@@ -0,0 +1,98 @@
+"""In memory queue, used to test and benchmark the worker without SQS."""
+from collections import deque
+from threading import Lock
+
+import typing as t
+import uuid
+
+
+class LocalMessage:
+    """A message retrieved from a LocalQueue."""
+
+    def __init__(self, queue: 'LocalQueue', body: dict):
+        """Initialize the message.
+
+        :param queue: Queue this message belongs to.
+        :param body: Message body, already deserialized.
+        """
+        self.queue = queue
+        self.body = body
+        self.receipt_handle = uuid.uuid4().hex
+
+    def delete(self):
+        """Remove this message from the queue."""
+        self.queue.delete_message(self)
+
+
+class LocalQueue:
+    """Thread safe, in memory, replacement for the SQS queue.
+
+    Messages received but not deleted stay in flight until release_in_flight is called,
+    mimicking the SQS visibility timeout.
+    """
+
+    name = 'leica.local'
+
+    def __init__(self):
+        """Initialize the queue."""
+        self._lock = Lock()
+        self._messages = deque()
+        self._in_flight = {}
+        self.total_received = 0
+        self.total_deleted = 0
+
+    def __len__(self) -> int:
+        """Number of messages waiting to be received."""
+        with self._lock:
+            return len(self._messages)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of messages received but not deleted."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def write_message(self, body: dict) -> str:
+        """Add a new message to the queue.
+
+        :param body: Message body.
+        :return: Id of the message.
+        """
+        body = dict(body)
+        body.setdefault('id', str(uuid.uuid4()))
+        with self._lock:
+            self._messages.append(body)
+        return body['id']
+
+    def get_messages(self, num_messages: int = 1) -> t.List[LocalMessage]:
+        """Receive up to num_messages messages.
+
+        :param num_messages: Maximum number of messages to be returned.
+        :return: List of messages.
+        """
+        messages = []
+        with self._lock:
+            while self._messages and len(messages) < num_messages:
+                message = LocalMessage(self, self._messages.popleft())
+                self._in_flight[message.receipt_handle] = message
+                messages.append(message)
+            self.total_received += len(messages)
+        return messages
+
+    def delete_message(self, message: LocalMessage):
+        """Delete a message received from this queue."""
+        with self._lock:
+            if self._in_flight.pop(message.receipt_handle, None):
+                self.total_deleted += 1
+
+    def release_in_flight(self) -> int:
+        """Make all messages in flight available again, as if their visibility expired.
+
+        :return: Number of messages released.
+        """
+        with self._lock:
+            messages = list(self._in_flight.values())
+            self._in_flight = {}
+            for message in reversed(messages):
+                self._messages.appendleft(message.body)
+        return len(messages)
@@ -250,6 +250,34 @@ class TestOrderModel(BaseModelTest):
         assert assignment.state_history[-1]['transition'] == 'submit'
         assert assignment.asset_types == order.asset_types
 
+    def test_workflow_transitions_log(self, instance_obj, roles, web_request, session):
+        """Test transitions are appended to workflow_transitions with state_history."""
+        order, wf, request = self.prepare_obj_wf(instance_obj, web_request, roles['pm'])
+        order.requirement_items = []
+        order.project.project_type = 'on-demand'
+        session.flush()
+
+        WorkflowTransition = models.WorkflowTransition
+        query = WorkflowTransition.filter(item_type='order').filter(
+            WorkflowTransition.item_id == order.id
+        )
+        assert query.count() == len(order.state_history)
+        logged = [row.id for row in query.order_by(WorkflowTransition.position)]
+
+        fields = {'number_required_assets': 25, 'requirements': 'New requirements!'}
+        wf.edit_requirements(fields=fields)
+        session.flush()
+
+        transitions = query.order_by(WorkflowTransition.position).all()
+        assert len(transitions) == len(order.state_history)
+        # only the new entry is written, the logged ones are kept
+        assert [row.id for row in transitions[:-1]] == logged
+        last = transitions[-1]
+        assert last.transition == 'edit_requirements'
+        assert last.position == len(order.state_history) - 1
+        edits = WorkflowTransition.filter(transitions=('edit_requirements',), query=query)
+        assert edits.count() == 1
+
     @pytest.mark.parametrize('file_path', ['data/order_locations.json'])
     @pytest.mark.parametrize('position', [0])
     @pytest.mark.parametrize('origin_state', ['received', 'assigned', 'scheduled'])
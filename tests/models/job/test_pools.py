@@ -29,3 +29,25 @@ class TestPoolModel(BaseModelTest):
             assert instance_obj in prof.pools
 
         assert len(instance_obj.professionals) == 3
+
+    def test_total_professionals(self, instance_obj, session):
+        """total_professionals follows Professionals added and removed from the Pool."""
+        table = models.Pool.__table__
+        professionals = models.Professional.query().order_by(models.Professional.title).all()
+
+        def total():
+            return session.execute(
+                table.select().with_only_columns([table.c.total_professionals]).where(
+                    table.c.id == instance_obj.id
+                )
+            ).scalar()
+
+        instance_obj.professionals = list(professionals)
+        session.flush()
+        assert total() == 3
+        assert instance_obj.professionals_page(limit=2) == professionals[:2]
+        assert instance_obj.professionals_page(offset=2) == professionals[2:]
+
+        professionals[0].pools.remove(instance_obj)
+        session.flush()
+        assert total() == 2
@@ -71,3 +71,24 @@ class TestProjectModel(BaseModelTest):
         fields = instance_obj.leadorder_confirmation_fields
 
         assert fields == []
+
+    def test_settings_snapshot(self, instance_obj):
+        """Test the settings snapshot is cached per project version and can not be changed."""
+        from briefy.leica.models.project.settings import get_project_settings
+        from briefy.leica.models.project.settings import invalidate_project_settings
+
+        session = instance_obj.__session__
+        session.flush()
+        invalidate_project_settings()
+        snapshot = get_project_settings(instance_obj)
+
+        assert get_project_settings(instance_obj) is snapshot
+        assert snapshot.availability_window == instance_obj.availability_window
+        assert list(snapshot.add_order_roles) == list(instance_obj.add_order_roles)
+        with pytest.raises(AttributeError):
+            snapshot.availability_window = 1
+        with pytest.raises(TypeError):
+            snapshot.tech_requirements['asset'] = {}
+
+        invalidate_project_settings(instance_obj.id)
+        assert get_project_settings(instance_obj) is not snapshot
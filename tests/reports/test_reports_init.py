@@ -4,6 +4,7 @@ from briefy.leica.reports import export_date_from_history
 from briefy.leica.reports import export_datetime
 from briefy.leica.reports import export_location
 from briefy.leica.reports import export_money_to_fixed_point
+from briefy.leica.reports import iter_csv
 from briefy.leica.reports import records_to_csv
 from datetime import datetime
 from pytz import utc
@@ -173,6 +174,39 @@ def test_records_to_csv():
     assert lines[2] == '49\tGermany\tde\r\n'
 
 
+def test_iter_csv():
+    """Test iter_csv yields the header before consuming the records."""
+    consumed = []
+
+    def records():
+        for data in (
+            {'code': 'BR', 'title': 'Brazil', 'tld': 'br', 'phone': '55'},
+            {'code': 'DE', 'title': 'Germany', 'tld': 'de', 'phone': '49'},
+        ):
+            consumed.append(data['code'])
+            yield data
+
+    func = iter_csv
+    fieldnames = ['phone', 'title', 'tld']
+
+    result = func(records(), fieldnames, delimiter='\t')
+    assert next(result) == 'phone\ttitle\ttld\r\n'
+    assert consumed == []
+
+    assert ''.join(result) == '55\tBrazil\tbr\r\n49\tGermany\tde\r\n'
+    assert consumed == ['BR', 'DE']
+
+
+def test_iter_csv_chunks():
+    """Test iter_csv groups rows in chunks."""
+    records = [{'id': i} for i in range(100)]
+
+    chunks = list(iter_csv(records, ['id'], chunk_size=50))
+    assert chunks[0] == 'id\r\n'
+    assert 1 < len(chunks) < 101
+    assert ''.join(chunks[1:]) == ''.join(f'{i}\r\n' for i in range(100))
+
+
 testdata = [
     (['Image'], 'Photograph'),
     (['Image', 'ImageRaw'], 'Photograph, Photograph (RAW)'),
@@ -72,6 +72,30 @@ class TestMoveAssignmentToAwaitingAssets(BaseTaskTest):
         messages = self.get_messages_from_queue()
         assert len(messages) == 2
 
+    def test_move_assignments_awaiting_assets_in_chunks(self, instance_obj):
+        """Test move_assignments_awaiting_assets processing one assignment per chunk."""
+        assignment = instance_obj
+        assignment_id = assignment.id
+        assignment.state = 'scheduled'
+        assignment.scheduled_datetime = datetime(2016, 9, 1, 12, 0, 0, tzinfo=utc)
+        total = move_assignments_awaiting_assets(chunk_size=1)
+        messages = self.get_messages_from_queue()
+        assert total == 1
+        assert len(messages) == 2
+
+        assignment = models.Assignment.get(assignment_id)
+        assert assignment.state == 'awaiting_assets'
+
+    def test_move_assignments_awaiting_assets_not_due(self, instance_obj):
+        """Assignments scheduled in the future are not selected."""
+        assignment = instance_obj
+        assignment.state = 'scheduled'
+        assignment.scheduled_datetime = datetime(2100, 9, 1, 12, 0, 0, tzinfo=utc)
+        total = move_assignments_awaiting_assets()
+        messages = self.get_messages_from_queue()
+        assert total == 0
+        assert len(messages) == 0
+
     def test_wrong_assignment_state(self, instance_obj):
         """Will not move the order because an Assignment is not in a correct state."""
         from briefy.common.workflow.exceptions import WorkflowTransitionException
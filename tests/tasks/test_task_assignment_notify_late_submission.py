@@ -2,12 +2,14 @@
 from briefy.leica import models
 from briefy.leica.config import LATE_SUBMISSION_SECONDS
 from briefy.leica.tasks.assignment import _notify_late_submissions
+from briefy.leica.tasks.assignment import _register_notification
 from briefy.leica.tasks.assignment import LATE_SUBMISSION_MSG
 from briefy.leica.tasks.assignment import notify_late_submissions
 from conftest import BaseTaskTest
 from datetime import timedelta
 
 import json
+import mock
 
 
 class TestNotifyAssignmentNotSubmitted(BaseTaskTest):
@@ -88,6 +90,49 @@ class TestNotifyAssignmentNotSubmitted(BaseTaskTest):
         assignment = models.Assignment.get(assignment_id)
         assert assignment.comments[0].content == LATE_SUBMISSION_MSG
 
+        # the notification is registered on the ledger
+        notifications = assignment.notifications
+        assert len(notifications) == 1
+        assert notifications[0].kind.value == 'late_submission'
+        assert notifications[0].comment_id == assignment.comments[0].id
+
         # assert next time it will not notify again
         status = _notify_late_submissions(assignment)
         assert status is False
+        assert len(assignment.notifications) == 1
+
+    def test_claim_notification_once(self, instance_obj):
+        """A notification can be claimed only once per Assignment and kind."""
+        assignment = instance_obj
+        Notification = models.AssignmentNotification
+
+        first = Notification.claim(assignment.id, 'late_submission')
+        assert first is not None
+        assert Notification.claim(assignment.id, 'late_submission') is None
+        assert Notification.claim(assignment.id, 'before_shooting') is not None
+
+        query = models.Assignment.query().filter(
+            models.Assignment.id == assignment.id,
+            ~Notification.sent(models.Assignment.id, 'late_submission')
+        )
+        assert query.count() == 0
+
+    def test_failed_comment_releases_claim(self, instance_obj):
+        """If the comment can not be added the claim is rolled back and retried later."""
+        assignment = instance_obj
+        Notification = models.AssignmentNotification
+        task_name = 'leica.task.notify_late_submission'
+
+        with mock.patch(
+            'briefy.leica.tasks.assignment.Comment', side_effect=ValueError('Failure')
+        ):
+            status = _register_notification(assignment, 'late_submission', 'Msg', task_name)
+        assert status is False
+        query = assignment.__session__.query(Notification).filter(
+            Notification.assignment_id == assignment.id
+        )
+        assert query.count() == 0
+
+        status = _register_notification(assignment, 'late_submission', 'Msg', task_name)
+        assert status is True
+        assert query.count() == 1
@@ -0,0 +1,92 @@
+"""Test the dashboard aggregates and the task rebuilding them."""
+from briefy.leica import models
+from briefy.leica.models.dashboard.stats import assignment_stats
+from briefy.leica.models.dashboard.stats import order_stats
+from briefy.leica.tasks.dashboard import refresh_dashboard_stats
+from conftest import BaseTaskTest
+from sqlalchemy import func
+from sqlalchemy import select
+
+
+def _totals(session, table) -> dict:
+    """Return the non zero counters of an aggregates table."""
+    rows = session.execute(select([table.c.key, table.c.total]).where(table.c.total != 0))
+    return {key: total for key, total in rows}
+
+
+class TestDashboardStats(BaseTaskTest):
+    """Test the dashboard aggregates."""
+
+    dependencies = [
+        (models.Professional, 'data/professionals.json'),
+        (models.Customer, 'data/customers.json'),
+        (models.Pool, 'data/jpools.json'),
+        (models.Project, 'data/projects.json'),
+        (models.Order, 'data/orders.json'),
+    ]
+
+    payload_position = -1
+    file_path = 'data/assignments.json'
+    model = models.Assignment
+
+    def test_counters_follow_changes(self, instance_obj, session):
+        """Counters are updated when Orders and Assignments are created or changed."""
+        assignment = instance_obj
+        session.flush()
+        total_orders = session.query(models.Order).count()
+        total_assignments = session.query(models.Assignment).count()
+        stats_total = session.execute(select([func.sum(order_stats.c.total)])).scalar()
+        assert stats_total == total_orders
+        stats_total = session.execute(select([func.sum(assignment_stats.c.total)])).scalar()
+        assert stats_total == total_assignments
+
+        assignment.state = 'in_qa'
+        session.flush()
+        in_qa = session.execute(
+            select([func.sum(assignment_stats.c.total)]).where(
+                assignment_stats.c.state == 'in_qa'
+            )
+        ).scalar()
+        assert in_qa >= 1
+
+    def test_counters_follow_deletes(self, instance_obj, session):
+        """Deleting an Assignment removes it from the counters."""
+        assignment = instance_obj
+        session.flush()
+        total_assignments = session.query(models.Assignment).count()
+        session.delete(assignment)
+        session.flush()
+        stats_total = session.execute(select([func.sum(assignment_stats.c.total)])).scalar()
+        assert stats_total == total_assignments - 1
+
+    def test_refresh_dashboard_stats(self, instance_obj, session):
+        """Reconciling the aggregates gives the same counters kept by the hooks."""
+        assignment = instance_obj
+        assignment.state = 'in_qa'
+        session.flush()
+        orders = _totals(session, order_stats)
+        assignments = _totals(session, assignment_stats)
+
+        assert refresh_dashboard_stats() == 0
+        assert _totals(session, order_stats) == orders
+        assert _totals(session, assignment_stats) == assignments
+
+    def test_refresh_dashboard_stats_fixes_counters(self, instance_obj, session):
+        """Wrong counters are fixed, unknown ones removed and missing ones created."""
+        session.flush()
+        orders = _totals(session, order_stats)
+        assignments = _totals(session, assignment_stats)
+        wrong_key, missing_key = sorted(orders)[0], sorted(assignments)[0]
+        session.execute(
+            order_stats.update().where(order_stats.c.key == wrong_key).values(total=1000)
+        )
+        session.execute(assignment_stats.delete().where(assignment_stats.c.key == missing_key))
+        stale = dict(
+            session.execute(select([order_stats]).where(order_stats.c.key == wrong_key)).first()
+        )
+        stale.update(key='stale', total=3, state='unknown')
+        session.execute(order_stats.insert().values(**stale))
+
+        assert refresh_dashboard_stats() == 3
+        assert _totals(session, order_stats) == orders
+        assert _totals(session, assignment_stats) == assignments
@@ -70,6 +70,38 @@ class TestMoveOrderToAccepted(BaseTaskTest):
         messages = self.get_messages_from_queue()
         assert len(messages) == 0
 
+    def test_move_orders_accepted_due(self, instance_obj):
+        """Test move_orders_accepted only moves orders with acceptance_due_at in the past."""
+        order = instance_obj
+        order_id = order.id
+        project = order.project
+        project.approval_window = 1  # 1 day
+        order.state = 'delivered'
+        order.last_deliver_date = datetime(2016, 9, 1, 12, 0, 0, tzinfo=utc)
+        order.acceptance_due_at = order.compute_acceptance_due_at()
+        assert order.acceptance_due_at == datetime(2016, 9, 2, 12, 0, 0, tzinfo=utc)
+
+        assert move_orders_accepted() == 1
+        order = models.Order.get(order_id)
+        assert order.state == 'accepted'
+
+    def test_acceptance_due_at_follows_project(self, instance_obj, session):
+        """A new approval window of the Project moves the due date of delivered Orders."""
+        order = instance_obj
+        order_id = order.id
+        project = order.project
+        project.approval_window = 1
+        order.state = 'delivered'
+        order.last_deliver_date = datetime(2016, 9, 1, 12, 0, 0, tzinfo=utc)
+        session.flush()
+        assert order.acceptance_due_at == datetime(2016, 9, 2, 12, 0, 0, tzinfo=utc)
+
+        project.approval_window = 3
+        session.flush()
+        session.expire(order)
+        order = models.Order.get(order_id)
+        assert order.acceptance_due_at == datetime(2016, 9, 6, 12, 0, 0, tzinfo=utc)
+
     def test_wrong_assignment_state(self, instance_obj):
         """Will not move the order because an Assignment is not in a correct state."""
         order = instance_obj
@@ -1,10 +1,15 @@
 """Test Task to move assignments to a Pool."""
+from briefy.common.db import datetime_utcnow
 from briefy.leica import models
 from briefy.leica.tasks.pool import _move_assignment_to_pool
 from briefy.leica.tasks.pool import move_assignments_to_pool
+from briefy.leica.tasks.pool import pool_assignments_query
+from briefy.leica.tasks.pool import refresh_pool_counters
 from conftest import BaseTaskTest
+from datetime import timedelta
 
 import json
+import mock
 
 
 class TestMoveAssignmentToPool(BaseTaskTest):
@@ -163,9 +168,86 @@ class TestMoveAssignmentToPool(BaseTaskTest):
         """Test move_assignments_to_pool."""
         pool = models.Pool.query().first()
         assignment = instance_obj
+        assignment_id = assignment.id
+        assignment.state = 'pending'
         order = assignment.order
         project = order.project
         project.pool_id = pool.id
-        move_assignments_to_pool()
+
+        # orders without availability are skipped
+        order.availability_dates = []
+        assert move_assignments_to_pool() == 0
+        messages = self.get_messages_from_queue()
+        assert len(messages) == 0
+
+        # availability dates in the past are not published
+        now = datetime_utcnow()
+        order.availability_dates = [now - timedelta(days=1)]
+        assert move_assignments_to_pool() == 0
+        messages = self.get_messages_from_queue()
+        assert len(messages) == 1
+        body = json.loads(messages[0].body)
+        assert body['event_name'] == 'leica.task.assignment_pool.no_availability'
+
+        order.availability_dates = [now + timedelta(days=1), now + timedelta(days=3)]
+        assert pool_assignments_query().count() == 1
+        assert move_assignments_to_pool() == 1
+
+        assignment = models.Assignment.get(assignment_id)
+        assert assignment.state == 'published'
+        assert assignment.pool_id == pool.id
+        assert pool_assignments_query().count() == 0
+
+    def test_move_assignments_to_pool_has_pool_id(self, instance_obj):
+        """Pending Assignments with a pool id get the has_pool_id event, as before."""
+        pool = models.Pool.query().first()
+        assignment = instance_obj
+        assignment.state = 'pending'
+        assignment.pool_id = pool.id
+        order = assignment.order
+        order.project.pool_id = pool.id
+        order.availability_dates = [datetime_utcnow() + timedelta(days=3)]
+
+        assert move_assignments_to_pool() == 0
         messages = self.get_messages_from_queue()
         assert len(messages) == 1
+        body = json.loads(messages[0].body)
+        assert body['event_name'] == 'leica.task.assignment_pool.has_pool_id'
+
+    def test_pool_counters(self, instance_obj, session):
+        """Pool counters follow the Assignments and are reconciled by refresh_pool_counters."""
+        pool_id = models.Pool.query().first().id
+        assignment = instance_obj
+        assignment.pool_id = pool_id
+        assignment.state = 'published'
+        session.flush()
+
+        def counters():
+            table = models.Pool.__table__
+            return tuple(session.execute(
+                table.select().with_only_columns(
+                    [table.c.total_assignments, table.c.live_assignments]
+                ).where(table.c.id == pool_id)
+            ).first())
+
+        total, live = counters()
+        assert live >= 1
+        assert refresh_pool_counters() == 0
+
+        assignment.state = 'scheduled'
+        session.flush()
+        assert counters() == (total, live - 1)
+
+        assignment.pool_id = None
+        session.flush()
+        assert counters() == (total - 1, live - 1)
+
+        table = models.Pool.__table__
+        session.execute(table.update().values(total_assignments=99))
+        assert refresh_pool_counters() == session.query(models.Pool).count()
+        assert counters() == (total - 1, live - 1)
+
+        # the raw update must be joined to the transaction, as no ORM flush marks it changed
+        with mock.patch('briefy.leica.tasks.pool.mark_changed') as mark_changed:
+            refresh_pool_counters()
+        mark_changed.assert_called_once_with(models.Pool.__session__)
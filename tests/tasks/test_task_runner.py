@@ -0,0 +1,68 @@
+"""Test the parallel task runner."""
+from briefy.leica.tasks import TASKS
+from briefy.leica.tasks.runner import create_scheduler
+from briefy.leica.tasks.runner import run_job
+from briefy.leica.tasks.runner import TaskJob
+from briefy.leica.tasks.runner import TaskMetrics
+
+
+def test_run_job_records_metrics():
+    """Duration and number of rows are recorded for each execution."""
+    metrics = TaskMetrics()
+    job = TaskJob('foo', lambda: 42, 'running foo')
+
+    assert run_job(job, metrics) == 42
+    assert run_job(job, metrics) == 42
+
+    data = metrics.get('foo')
+    assert data['runs'] == 2
+    assert data['failures'] == 0
+    assert data['last_rows'] == 42
+    assert data['total_rows'] == 84
+    assert data['last_duration'] >= 0
+
+
+def test_run_job_failure_is_isolated():
+    """A failure is logged and recorded, but not raised."""
+    def failing_task():
+        raise ValueError('Boom')
+
+    metrics = TaskMetrics()
+    job = TaskJob('bar', failing_task, 'running bar')
+
+    assert run_job(job, metrics) is None
+
+    data = metrics.get('bar')
+    assert data['runs'] == 1
+    assert data['failures'] == 1
+    assert data['last_rows'] is None
+
+
+def test_create_scheduler():
+    """Each enabled task is scheduled as an independent job without overlapping runs."""
+    trigger_args = {'hour': '*', 'minute': '*/1'}
+    jobs = list(TASKS) + [TaskJob('disabled', lambda: None, 'disabled', enabled=False)]
+    scheduler = create_scheduler(jobs, 5, trigger_args)
+
+    scheduled = {job.id: job for job in scheduler.get_jobs()}
+    assert 'disabled' not in scheduled
+    for job in TASKS:
+        if job.enabled:
+            assert scheduled[job.name].max_instances == 1
+            assert scheduled[job.name].coalesce is True
+
+
+def test_create_scheduler_job_trigger_args():
+    """A job can replace the default cron trigger arguments."""
+    trigger_args = {'hour': '*', 'minute': '*/1'}
+    jobs = [
+        TaskJob('default', lambda: None, 'default'),
+        TaskJob('hourly', lambda: None, 'hourly', trigger_args={'hour': '*', 'minute': '0'}),
+    ]
+    scheduler = create_scheduler(jobs, 2, trigger_args)
+
+    scheduled = {job.id: job for job in scheduler.get_jobs()}
+    fields = {field.name: str(field) for field in scheduled['hourly'].trigger.fields}
+    assert fields['minute'] == '0'
+    fields = {field.name: str(field) for field in scheduled['default'].trigger.fields}
+    assert fields['minute'] == '*/1'
@@ -0,0 +1,112 @@
+"""Test the serialization cache helpers."""
+from briefy.leica.cache import CacheStats
+from briefy.leica.cache import serialization_key
+from datetime import datetime
+
+import uuid
+
+
+class DummyObject:
+    """Dummy versioned object."""
+
+    def __init__(self, version=0):
+        self.id = uuid.uuid4()
+        self.version = version
+        self.updated_at = datetime(2017, 10, 1, 12, 0, 0)
+
+
+def test_serialization_key_ignores_order_of_lists():
+    """includes and excludes are normalized before building the key."""
+    obj = DummyObject()
+    key01 = serialization_key(obj, 'to_dict', {'includes': ['a', 'b'], 'excludes': None})
+    key02 = serialization_key(obj, 'to_dict', {'includes': ['b', 'a'], 'excludes': None})
+    key03 = serialization_key(obj, 'to_dict', {'includes': ['a'], 'excludes': None})
+    assert key01 == key02
+    assert key01 != key03
+
+
+def test_serialization_key_changes_with_version():
+    """A new version of the object, or of a dependency, produces a new key."""
+    obj = DummyObject()
+    key01 = serialization_key(obj, 'to_dict', {}, dependencies='1:2017-10-01T12:00:00')
+
+    obj.version = 1
+    key02 = serialization_key(obj, 'to_dict', {}, dependencies='1:2017-10-01T12:00:00')
+    assert key02 != key01
+
+    key03 = serialization_key(obj, 'to_dict', {}, dependencies='2:2017-10-01T12:00:00')
+    assert key03 != key02
+
+    assert key03 == serialization_key(obj, 'to_dict', {}, dependencies='2:2017-10-01T12:00:00')
+    assert key03 != serialization_key(
+        obj, 'to_listing_dict', {}, dependencies='2:2017-10-01T12:00:00'
+    )
+
+
+class FakeRegion:
+    """Cache region kept in memory."""
+
+    def __init__(self):
+        """Initialize the region."""
+        self.values = {}
+
+    def get_multi(self, keys):
+        """Return the values of many keys, None if missing."""
+        return [self.values.get(key) for key in keys]
+
+    def set_multi(self, mapping):
+        """Set the values of many keys."""
+        self.values.update(mapping)
+
+
+def test_changed_generations():
+    """Items change their own generation and the children generation of their parent."""
+    from briefy.leica.cache import changed_generations
+
+    order, assignment = DummyObject(), DummyObject()
+    assignment.__parent_attr__ = 'order_id'
+    assignment.order_id = order.id
+    assert changed_generations(assignment) == {str(assignment.id), f'{order.id}:children'}
+
+    role = DummyObject()
+    role.item_id = order.id
+    assert changed_generations(role) == {str(order.id)}
+
+
+def test_dependencies_token(monkeypatch):
+    """The token follows ancestors, related items, children and users, without queries."""
+    from briefy.leica import cache
+
+    monkeypatch.setattr(cache, 'cache_region', FakeRegion())
+    obj = DummyObject()
+    parent = DummyObject()
+    pool_id = uuid.uuid4()
+    obj.path = [parent.id, obj.id]
+    obj.pool_id = pool_id
+
+    def token():
+        return cache.dependencies_token(obj, related=('pool_id', ), children=True)
+
+    first = token()
+    assert token() == first
+    for names in ([parent.id], [pool_id], [f'{obj.id}:children'], [cache.USERS_GENERATION]):
+        cache.bump_generations(names)
+        current = token()
+        assert current != first
+        first = current
+
+    cache.bump_generations([uuid.uuid4()])
+    assert token() == first
+
+
+def test_cache_stats():
+    """Test hit and miss counters."""
+    stats = CacheStats()
+    stats.record(hit=False)
+    stats.record(hit=True)
+    stats.record(hit=True)
+    stats.record(hit=True)
+    assert stats.snapshot() == {'hits': 3, 'misses': 1, 'hit_ratio': 0.75}
+
+    stats.reset()
+    assert stats.snapshot() == {'hits': 0, 'misses': 0, 'hit_ratio': 0.0}
@@ -0,0 +1,92 @@
+"""Test the Leica IUserProfileQuery utility."""
+from briefy.leica.utilities.userprofile import ActorsMap
+from briefy.leica.utilities.userprofile import LeicaUserProfileQuery
+
+import mock
+
+
+USER_01 = '3966051e-6bfd-4998-9d96-432ddc93d8e9'
+USER_02 = '414ff864-b9d3-4d75-a355-0a255bb253bf'
+
+
+def _fake_fetch(user_ids):
+    """Return fake user data."""
+    return {user_id: {'id': user_id, 'fullname': f'User {user_id[:4]}'} for user_id in user_ids}
+
+
+def test_apply_actors_info_single_fetch():
+    """All actors of a payload are resolved with a single fetch."""
+    service = LeicaUserProfileQuery()
+    data = {
+        'internal_pm': [USER_01],
+        'internal_qa': [USER_01, USER_02],
+        'internal_scout': [],
+    }
+    with mock.patch.object(service, '_fetch', side_effect=_fake_fetch) as fetch:
+        result = service.apply_actors_info(data, ['internal_pm', 'internal_qa', 'internal_scout'])
+
+    assert fetch.call_count == 1
+    assert set(fetch.call_args[0][0]) == {USER_01, USER_02}
+    assert result['internal_pm'] == [{'id': USER_01, 'fullname': 'User 3966'}]
+    assert [item['id'] for item in result['internal_qa']] == [USER_01, USER_02]
+    assert result['internal_scout'] == []
+
+
+def test_resolve_invalid_id():
+    """Invalid ids are not queried."""
+    service = LeicaUserProfileQuery()
+    with mock.patch.object(service, '_fetch', side_effect=_fake_fetch) as fetch:
+        result = service.resolve(['foo'])
+
+    assert fetch.call_count == 0
+    assert result['foo']['id'] == 'foo'
+    assert result['foo']['fullname'] == ''
+
+
+def test_update_wf_history_single_fetch():
+    """Repeated actors of the workflow history are resolved with a single fetch."""
+    service = LeicaUserProfileQuery()
+    history = [
+        {'actor': USER_01, 'transition': 'submit'},
+        {'actor': USER_02, 'transition': 'assign'},
+        {'actor': USER_01, 'transition': 'schedule'},
+        {'actor': {'id': USER_02}, 'transition': 'ready_for_upload'},
+    ]
+    with mock.patch.object(service, '_fetch', side_effect=_fake_fetch) as fetch:
+        result = service.update_wf_history(history)
+
+    assert fetch.call_count == 1
+    assert set(fetch.call_args[0][0]) == {USER_01, USER_02}
+    assert [item['actor']['id'] for item in result] == [USER_01, USER_02, USER_01, USER_02]
+
+
+def test_get_all_data_ignores_invalid_ids():
+    """Only existing users are returned by get_all_data."""
+    service = LeicaUserProfileQuery()
+    with mock.patch.object(service, '_fetch', side_effect=_fake_fetch) as fetch:
+        result = service.get_all_data(['foo', USER_01])
+
+    assert fetch.call_count == 1
+    assert set(fetch.call_args[0][0]) == {USER_01}
+    assert result == [{'id': USER_01, 'fullname': 'User 3966'}]
+
+
+def test_prefetch_actors():
+    """Actors of the registered items are fetched with the first missing user."""
+    service = LeicaUserProfileQuery()
+    actors_map = ActorsMap()
+    with mock.patch(
+        'briefy.leica.utilities.userprofile.get_actors_map', return_value=actors_map
+    ), mock.patch.object(
+        service, '_pending_principals', return_value={USER_02}
+    ) as pending, mock.patch.object(
+        service, '_fetch', side_effect=_fake_fetch
+    ) as fetch:
+        service.prefetch_actors(['item-01', 'item-02'])
+        service.resolve([USER_01])
+        service.resolve([USER_02])
+
+    assert actors_map.pending_items == {'item-01', 'item-02'}
+    assert pending.call_count == 1
+    assert fetch.call_count == 1
+    assert set(fetch.call_args[0][0]) == {USER_01, USER_02}
@@ -0,0 +1,66 @@
+"""Test business days calendars."""
+from briefy.leica.utils import business_days
+from datetime import date
+from datetime import datetime
+from pytz import utc
+
+import json
+import pytest
+
+
+testdata = [
+    (date(2017, 9, 29), 1, date(2017, 10, 2)),
+    (date(2017, 9, 29), 5, date(2017, 10, 6)),
+    (date(2017, 9, 30), 1, date(2017, 10, 2)),
+    (date(2017, 10, 1), 2, date(2017, 10, 3)),
+    (date(2017, 10, 2), 0, date(2017, 10, 2)),
+    (date(2017, 10, 2), -1, date(2017, 9, 29)),
+    (date(2017, 10, 1), -1, date(2017, 9, 29)),
+    (date(2030, 1, 4), 1, date(2030, 1, 7)),
+]
+
+
+@pytest.mark.parametrize('value,days,expected', testdata)
+def test_offset(value, days, expected):
+    """Test BusinessCalendar.offset without holidays."""
+    calendar = business_days.BusinessCalendar()
+    assert calendar.offset(value, days) == expected
+
+
+def test_offset_keeps_time():
+    """Test BusinessCalendar.offset with datetimes."""
+    calendar = business_days.BusinessCalendar()
+    value = datetime(2017, 9, 29, 18, 30, tzinfo=utc)
+    assert calendar.offset(value, 1) == datetime(2017, 10, 2, 18, 30, tzinfo=utc)
+
+
+def test_offset_holidays():
+    """Test BusinessCalendar.offset skipping holidays."""
+    calendar = business_days.BusinessCalendar(holidays=[date(2017, 10, 3)])
+    assert calendar.is_business_day(date(2017, 10, 3)) is False
+    assert calendar.offset(date(2017, 10, 2), 1) == date(2017, 10, 4)
+    assert calendar.offset(date(2017, 10, 3), 1) == date(2017, 10, 4)
+    assert calendar.offset(date(2017, 10, 4), -1) == date(2017, 10, 2)
+
+
+def test_offsets():
+    """Test BusinessCalendar.offsets."""
+    calendar = business_days.BusinessCalendar()
+    values = [date(2017, 9, 29), None, date(2017, 10, 2)]
+    assert calendar.offsets(values, 1) == [date(2017, 10, 2), None, date(2017, 10, 3)]
+    assert calendar.offsets(values, [1, 1, 5]) == [date(2017, 10, 2), None, date(2017, 10, 9)]
+
+
+def test_get_calendar(tmpdir):
+    """Test get_calendar loading holidays per country."""
+    path = tmpdir.join('holidays.json')
+    path.write(json.dumps({'de': ['2017-10-03']}))
+    business_days.reset_calendars(business_days.load_holidays(str(path)))
+    try:
+        german = business_days.get_calendar('DE')
+        assert business_days.get_calendar('de') is german
+        assert german.offset(date(2017, 10, 2), 1) == date(2017, 10, 4)
+        assert business_days.get_calendar('FR').offset(date(2017, 10, 2), 1) == date(2017, 10, 3)
+        assert business_days.get_calendar().offset(date(2017, 10, 2), 1) == date(2017, 10, 3)
+    finally:
+        business_days.reset_calendars()
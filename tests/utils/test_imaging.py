@@ -137,3 +137,67 @@ def test_check_image_constraints(value, expected):
     }
 
     assert len(func(metadata, value)) == expected
+
+
+def test_validator_memoises_results():
+    """Test ImageValidator memoises results by the checked metadata values."""
+    constraints = {
+        'asset': {
+            'size': {'value': 4194304, 'operator': 'min'},
+            'mimetype': {'value': ['image/jpeg', 'image/png'], 'operator': 'in'},
+        }
+    }
+    validator = imaging.get_validator(constraints)
+    assert imaging.get_validator(dict(constraints)) is validator
+    assert [check.name for check in validator.checks] == ['size', 'mimetype']
+
+    metadata = {'size': 4000000, 'mimetype': 'image/jpeg', 'dpi': '300'}
+    result = validator.validate(metadata)
+    assert result == [{'check': 'size', 'text': 'Size check failed 4000000'}]
+    assert len(validator._cache) == 1
+
+    # dpi is not checked, so it is not part of the key
+    assert validator.validate(dict(metadata, dpi='72')) == result
+    assert len(validator._cache) == 1
+
+    # results are copies, changing them does not change the cache
+    result.clear()
+    assert len(validator.validate(metadata)) == 1
+
+
+def test_validator_validate_many():
+    """Test ImageValidator.validate_many returns the same as check_image_constraints."""
+    constraints = {
+        'dimensions': [{'value': '4200x3150', 'operator': 'min'}, ],
+        'ratio': [{'value': 4 / 3, 'operator': 'eq'}, ],
+        'orientation': [{'value': 'landscape'}, ],
+        'invalid': [{'value': 1}, ],
+        'dpi': [{'operator': 'eq'}, ],
+    }
+    metadatas = [
+        {'dimensions': '4200 x 3150', 'orientation': 'landscape'},
+        {'dimensions': '800 x 600', 'orientation': 'landscape'},
+        {'dimensions': '6000 x 3000', 'orientation': 'portrait'},
+        {'dimensions': '4200 x 3150', 'orientation': 'landscape'},
+    ]
+    results = imaging.check_images_constraints(metadatas, constraints)
+    assert results == [imaging.check_image_constraints(m, constraints) for m in metadatas]
+    assert [len(result) for result in results] == [0, 1, 2, 0]
+    assert results[2][0] == {'check': 'ratio', 'text': 'Ratio check failed'}
+    assert imaging.check_images_constraints(metadatas, {'asset': {}}) == [[], [], [], []]
+
+
+def test_validator_ratio_only():
+    """Test a ratio only requirement memoises results by the image dimensions."""
+    validator = imaging.ImageValidator({'ratio': {'value': 1.5}})
+    assert validator.fields == ['dimensions']
+
+    assert validator.validate({'dimensions': '3000 x 2000'}) == []
+    assert validator.validate({'dimensions': '2000 x 2000'}) == [
+        {'check': 'ratio', 'text': 'Ratio check failed'}
+    ]
+    assert len(validator._cache) == 2
+
+    validator = imaging.ImageValidator({'ratio': {'value': 1.5}})
+    assert len(validator.validate({'dimensions': '2000 x 2000'})) == 1
+    assert validator.validate({'dimensions': '3000 x 2000'}) == []
@@ -0,0 +1,66 @@
+"""Test the bulk ingestion of assets."""
+from briefy.leica.utils import ingestion
+from briefy.leica.worker.local import LocalQueue
+from types import SimpleNamespace
+
+import transaction
+import uuid
+
+
+def _images(total: int) -> list:
+    """Return objects with the attributes of Images used by the ingestion messages."""
+    return [
+        SimpleNamespace(id=uuid.uuid4(), source_path=f'source/files/jobs/{number}.jpg')
+        for number in range(total)
+    ]
+
+
+def test_ingestion_messages(monkeypatch):
+    """Ingested assets are split in messages of at most ASSETS_BULK_MESSAGE_SIZE assets."""
+    monkeypatch.setattr(ingestion, 'ASSETS_BULK_MESSAGE_SIZE', '2')
+    assignment_id = uuid.uuid4()
+    images = _images(5)
+    messages = ingestion.ingestion_messages(assignment_id, images)
+
+    assert [len(message['data']['assets']) for message in messages] == [2, 2, 1]
+    message = messages[0]
+    assert message['event_name'] == ingestion.INGESTED_EVENT
+    assert message['guid'] == str(assignment_id)
+    assert message['data']['assignment'] == {'id': str(assignment_id)}
+    assert message['data']['assets'][0] == {
+        'id': str(images[0].id), 'source_path': 'source/files/jobs/0.jpg'
+    }
+
+
+def test_send_messages_after_commit():
+    """Messages are written to the queue only if the transaction committed."""
+    queue = LocalQueue()
+    messages = ingestion.ingestion_messages(uuid.uuid4(), _images(3))
+
+    ingestion._send_messages(False, messages, queue)
+    assert len(queue) == 0
+
+    ingestion._send_messages(True, messages, queue)
+    assert len(queue) == len(messages)
+
+
+def test_queue_source_change():
+    """The move of a changed source file is queued only if the transaction commits."""
+    queue = LocalQueue()
+    image = _images(1)[0]
+    image.assignment_id = uuid.uuid4()
+
+    with transaction.manager:
+        ingestion.queue_source_change(image, update_metadata=True, queue=queue)
+    assert len(queue) == 1
+    message = queue.get_messages()[0].body
+    assert message['event_name'] == ingestion.SOURCE_CHANGED_EVENT
+    assert message['data']['update_metadata'] is True
+    assert message['data']['assets'] == [
+        {'id': str(image.id), 'source_path': 'source/files/jobs/0.jpg'}
+    ]
+
+    txn = transaction.begin()
+    ingestion.queue_source_change(image, queue=queue)
+    txn.abort()
+    assert len(queue) == 0
@@ -0,0 +1,42 @@
+"""Test the local roles index."""
+from briefy.leica.utils import local_roles
+
+import uuid
+
+
+def test_principal_roles():
+    """Test PrincipalRoles groups the local roles by item type and item."""
+    project_1, project_2, customer = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    rows = [
+        (project_1, 'project', 'project_customer_pm'),
+        (project_1, 'project', 'project_customer_qa'),
+        (project_1, 'project', 'project_customer_qa'),
+        (project_2, 'project', 'project_customer_qa'),
+        (customer, 'customer', 'customer_manager'),
+    ]
+    index = local_roles.PrincipalRoles(uuid.uuid4(), rows, version=3)
+
+    assert index.version == 3
+    assert index.item_ids('project') == [project_1, project_2]
+    assert index.item_ids('project', 'project_customer_pm') == [project_1]
+    assert index.item_ids('project', 'project_customer_qa') == [project_1, project_2]
+    assert index.item_ids('order') == []
+    assert index.roles('project') == {
+        project_1: ['project_customer_pm', 'project_customer_qa'],
+        project_2: ['project_customer_qa'],
+    }
+    assert index.roles('customer') == {customer: ['customer_manager']}
+
+
+def test_bump_version():
+    """Test the versions of the principals are independent."""
+    principal_id = uuid.uuid4()
+    other_id = uuid.uuid4()
+    assert local_roles.get_version(principal_id) == 0
+
+    local_roles.bump_version(principal_id)
+    local_roles.bump_version(str(principal_id))
+
+    assert local_roles.get_version(principal_id) == 2
+    assert local_roles.get_version(str(principal_id)) == 2
+    assert local_roles.get_version(other_id) == 0
@@ -0,0 +1,133 @@
+"""Test the cache of public user information."""
+from briefy.leica.utils.profile_cache import _fetch_users
+from briefy.leica.utils.profile_cache import ProfileCache
+from briefy.leica.utils.profile_cache import TOKEN_KEY
+
+import mock
+
+
+class FakeRegion:
+    """Shared cache region, kept in memory."""
+
+    def __init__(self):
+        """Initialize the region."""
+        self.values = {}
+
+    def get_multi(self, keys):
+        """Return the values of many keys, None if missing."""
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value):
+        """Set the value of a key."""
+        self.values[key] = value
+
+
+class Clock:
+    """Clock moved by the tests."""
+
+    def __init__(self):
+        """Initialize the clock."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def make_cache(**kwargs):
+    """Create a cache recording the ids fetched."""
+    calls = []
+
+    def fetch(user_ids):
+        calls.append(list(user_ids))
+        return {user_id: {'id': user_id, 'fullname': f'User {user_id}'} for user_id in user_ids}
+
+    kwargs.setdefault('region', FakeRegion())
+    kwargs.setdefault('clock', Clock())
+    return ProfileCache(fetch=fetch, **kwargs), calls
+
+
+def test_get_many_fetches_missing_users_at_once():
+    """Test get_many fetches all missing users with one call and caches them."""
+    cache, calls = make_cache(maxsize=10, ttl=60, sync_interval=0)
+
+    users = cache.get_many(['1', '2', '1'])
+    assert list(users) == ['1', '2']
+    assert calls == [['1', '2']]
+
+    assert cache.get('2') == {'id': '2', 'fullname': 'User 2'}
+    cache.get_many(['1', '3'])
+    assert calls == [['1', '2'], ['3']]
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 3
+    assert stats['size'] == 3
+
+
+def test_returns_copies():
+    """Test changing a returned value does not change the cache."""
+    cache, _ = make_cache(ttl=600, sync_interval=0)
+    cache.get('1')['fullname'] = 'Changed'
+    assert cache.get('1')['fullname'] == 'User 1'
+
+
+def test_lru_eviction_and_expiration():
+    """Test the cache is bounded and entries expire."""
+    clock = Clock()
+    cache, calls = make_cache(maxsize=2, ttl=60, sync_interval=0, clock=clock)
+    cache.get('1')
+    cache.get('2')
+    cache.get('1')
+    cache.get('3')
+
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+    cache.get('1')
+    assert calls == [['1'], ['2'], ['3']]
+
+    clock.now = 61
+    cache.get('1')
+    assert calls == [['1'], ['2'], ['3'], ['1']]
+    assert cache.stats()['expirations'] == 1
+
+
+def test_invalidation_between_processes():
+    """Test a publish on one process invalidates the entry on the others."""
+    region = FakeRegion()
+    clock = Clock()
+    cache_1, calls_1 = make_cache(region=region, clock=clock, ttl=600, sync_interval=10)
+    cache_2, calls_2 = make_cache(region=region, clock=clock, ttl=600, sync_interval=10)
+    cache_1.get('1')
+    cache_2.get('1')
+
+    cache_2.publish('1')
+    assert TOKEN_KEY.format('1') in region.values
+    cache_1.get('1')
+    assert calls_1 == [['1']]
+
+    clock.now = 11
+    cache_1.get('1')
+    assert calls_1 == [['1'], ['1']]
+    assert cache_1.stats()['invalidations'] == 1
+
+    clock.now = 22
+    cache_1.get('1')
+    assert calls_1 == [['1'], ['1']]
+
+
+def test_fetch_users_falls_back_to_get_data():
+    """Ids missing from get_all_data are read with get_data, keeping its placeholders."""
+    service = mock.Mock()
+    service.get_all_data.return_value = [{'id': 'found', 'fullname': 'Found'}]
+    service.get_data.side_effect = lambda user_id: {'id': user_id, 'fullname': ''}
+
+    with mock.patch('briefy.leica.utils.profile_cache.getUtility', return_value=service):
+        result = _fetch_users(['found', 'invalid'])
+
+    assert result == {
+        'found': {'id': 'found', 'fullname': 'Found'},
+        'invalid': {'id': 'invalid', 'fullname': ''},
+    }
+    service.get_data.assert_called_once_with('invalid')
@@ -4,7 +4,9 @@ from moto import mock_s3
 
 import boto3
 import botocore
+import os
 import pytest
+import threading
 
 
 @pytest.fixture
@@ -12,6 +14,7 @@ def unmock_botocore():
     """Remove mock of botocore."""
     if hasattr(botocore.endpoint, 'OrigEndpoint'):
         botocore.endpoint.Endpoint = botocore.endpoint.OrigEndpoint
+    s3.reset_client()
 
 
 @mock_s3
@@ -96,3 +99,81 @@ def test_move_asset_source_file(unmock_botocore):
     assert len([o for o in dest.objects.all()]) == 1
 
     s3.should_move = original
+
+
+@pytest.fixture
+def local_service(tmpdir):
+    """TransferService moving files between local directories."""
+    backend = s3.LocalBackend(str(tmpdir))
+    service = s3.TransferService(backend=backend, max_workers=2, retries=2, retry_delay=0)
+    yield service
+    service.shutdown()
+
+
+def _put(service: s3.TransferService, bucket: str, key: str, data: bytes=b'Hello world!!'):
+    """Create a file on a local bucket."""
+    path = service.backend.path(bucket, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def test_transfer_service_move_many(local_service):
+    """Test TransferService.move_many with the local backend."""
+    keys = ['foo/bar/{0}.jpg'.format(number) for number in range(10)]
+    for key in keys:
+        _put(local_service, 'source', key)
+
+    status = local_service.move_many(keys + ['foo/bar/missing.jpg'], 'source', 'dest')
+
+    assert status.pop('foo/bar/missing.jpg') is False
+    assert set(status) == set(keys)
+    assert all(status.values())
+    backend = local_service.backend
+    assert all(os.path.exists(backend.path('dest', key)) for key in keys)
+    assert not any(os.path.exists(backend.path('source', key)) for key in keys)
+
+
+def test_transfer_service_deduplicates_pending_moves(local_service):
+    """Test a key waiting to be moved is not scheduled again."""
+    started = threading.Event()
+    release = threading.Event()
+    moves = []
+    move = local_service.backend.move
+
+    def slow_move(key, source, dest):
+        moves.append(key)
+        started.set()
+        release.wait(5)
+        move(key, source, dest)
+
+    local_service.backend.move = slow_move
+    _put(local_service, 'source', 'foo.jpg')
+    first = local_service.submit('foo.jpg', 'source', 'dest')
+    started.wait(5)
+    second = local_service.submit('foo.jpg', 'source', 'dest')
+    release.set()
+
+    assert first is second
+    assert first.result(5) is True
+    assert local_service.wait(5) is True
+    assert moves == ['foo.jpg']
+
+
+def test_transfer_service_retries(local_service):
+    """Test failed moves are retried."""
+    errors = [OSError('Timeout'), OSError('Timeout')]
+    move = local_service.backend.move
+
+    def flaky_move(key, source, dest):
+        if errors:
+            raise errors.pop()
+        move(key, source, dest)
+
+    local_service.backend.move = flaky_move
+    _put(local_service, 'source', 'foo.jpg')
+    assert local_service.submit('foo.jpg', 'source', 'dest').result(5) is True
+
+    errors.extend([OSError('Timeout')] * 3)
+    _put(local_service, 'source', 'bar.jpg')
+    assert local_service.submit('bar.jpg', 'source', 'dest').result(5) is False
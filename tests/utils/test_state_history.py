@@ -0,0 +1,94 @@
+"""Test state_history repair helpers."""
+from briefy.leica.utils import state_history
+
+import mock
+
+
+_history = [
+    {'from': '', 'to': 'created', 'transition': '', 'date': '2017-03-01T10:00:00+00:00'},
+    {'from': 'pending', 'to': 'published', 'transition': 'publish',
+     'date': '2017-03-01T12:00:00+00:00'},
+    {'from': 'created', 'to': 'pending', 'transition': 'submit',
+     'date': '2017-03-01T12:00:00+00:00'},
+]
+
+
+def test_repair_item():
+    """Test repair_item moves transitions to the right position."""
+    result = state_history.repair_item(('id', 'published', _history, True))
+    assert result['wrong'] == 2
+    assert result['sorted_wrong'] == 2
+    assert result['skipped'] is False
+    assert result['loop'] is False
+    transitions = [item['transition'] for item in result['state_history']]
+    assert transitions == ['', 'submit', 'publish']
+
+
+def test_repair_item_valid_history():
+    """Test repair_item does not change a valid history."""
+    valid = [_history[0], _history[2], _history[1]]
+    result = state_history.repair_item(('id', 'published', valid, True))
+    assert result['wrong'] == 0
+    assert result['state_history'] is None
+
+
+@mock.patch('briefy.leica.utils.state_history.mark_changed')
+@mock.patch('briefy.leica.utils.state_history.bump_generations_on_commit')
+def test_write_histories(bump, mark_changed):
+    """Test write_histories sets updated_at and changes the cache generations."""
+    item_id = 'a0f3c1e2-5b7d-4c9e-8f1a-2b3c4d5e6f70'
+    session = mock.Mock()
+    result = state_history.repair_item((item_id, 'published', _history, True))
+    state_history.write_histories(session, [result], 'project')
+
+    update = session.execute.call_args_list[0][0][0]
+    assert 'updated_at' in str(update)
+    mark_changed.assert_called_once_with(session)
+    assert list(bump.call_args[0][0]) == [item_id]
+
+
+def test_issues_report():
+    """Test IssuesReport classification."""
+    report = state_history.IssuesReport(('order',))
+    report.add(0, 0)
+    report.add(2, 0)
+    report.add(3, 1)
+    report.add(1, 1)
+    report.add(1, 2)
+    assert report.good_before == 1
+    assert report.good_after == 1
+    assert report.better == 1
+    assert report.same == 1
+    assert report.worst == 1
+    assert report.total_items == 5
+    assert report.total_wrong == 3
+    assert report.total_sorted_wrong == 1
+
+
+def test_checkpoint(tmpdir):
+    """Test Checkpoint persistence."""
+    path = str(tmpdir.join('state_history.checkpoint'))
+    checkpoint = state_history.Checkpoint(path)
+    assert checkpoint.get('order') is None
+    checkpoint.set('order', 'c5904fb5-f589-4c5f-aecd-1cd2e20a5625')
+    assert state_history.Checkpoint(path).get('order') == 'c5904fb5-f589-4c5f-aecd-1cd2e20a5625'
+
+
+def test_checkpoint_resume(tmpdir):
+    """Checkpoints are only resumed on request and types are dropped once repaired."""
+    path = str(tmpdir.join('state_history.checkpoint'))
+    checkpoint = state_history.Checkpoint(path)
+    checkpoint.set('order', 'c5904fb5-f589-4c5f-aecd-1cd2e20a5625')
+    checkpoint.done('customer')
+    assert state_history.Checkpoint(path, resume=False).get('order') is None
+
+    checkpoint = state_history.Checkpoint(path, resume=True)
+    assert checkpoint.is_done('customer') is True
+    assert checkpoint.is_done('order') is False
+    checkpoint.done('order')
+    checkpoint = state_history.Checkpoint(path)
+    assert checkpoint.get('order') is None
+    assert checkpoint.is_done('order') is True
+
+    checkpoint.remove()
+    assert not tmpdir.join('state_history.checkpoint').exists()
@@ -1,6 +1,11 @@
 """Test Timezone function."""
 from briefy.leica.utils import timezone
 
+import json
+import mock
+import os
+import pytest
+
 
 def test_get_timezone_id_from_coordinates():
     """Test timezone_from_coordinates."""
@@ -35,3 +40,63 @@ def test_get_timezone_id_bad_response():
     timezone_id = func(lat, lng)
     # Error logged
     assert timezone_id is None
+
+
+@pytest.fixture
+def resolver():
+    """Use the offline resolver with the test polygons."""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    resolver = timezone.TimezoneResolver.from_file(os.path.join(path, 'timezone_polygons.json'))
+    timezone.set_resolver(resolver)
+    yield resolver
+    timezone.set_resolver(None)
+
+
+def test_resolver_polygons(resolver):
+    """Test the offline resolver, including holes and multi polygons."""
+    assert resolver.resolve(52.5200, 13.4050) == 'Europe/Berlin'
+    assert resolver.resolve(50.5, 9.5) == 'Europe/Amsterdam'
+    assert resolver.resolve(52.3702, 4.8952) == 'Europe/Amsterdam'
+    assert resolver.resolve(-30.0346, -51.2177) == 'America/Sao_Paulo'
+    assert resolver.resolve(-30.0, -30.0) is None
+    assert resolver.resolve(0.0, 0.0) is None
+
+
+def test_timezone_from_coordinates_offline(resolver):
+    """Coordinates are resolved offline and cached, without calling GeoNames."""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'timezone.json')
+    with open(path) as fh:
+        fixture = json.load(fh)
+    with mock.patch('briefy.leica.utils.timezone.requests') as requests:
+        timezone_id = timezone.timezone_from_coordinates(fixture['lat'], fixture['lng'])
+        assert timezone_id == fixture['timezoneId']
+        assert timezone.timezone_from_coordinates(55.67921, 12.59851) == fixture['timezoneId']
+        assert requests.get.called is False
+    info = timezone._resolve_offline.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+def test_load_resolver_required(tmpdir):
+    """Startup fails when the polygons are required and not available."""
+    missing = str(tmpdir.join('timezones.json'))
+    timezone.set_resolver(None)
+    with mock.patch('briefy.leica.utils.timezone.TIMEZONE_POLYGONS_PATH', missing):
+        with pytest.raises(RuntimeError):
+            timezone.load_resolver(required=True)
+        assert timezone.load_resolver(required=False) is None
+    timezone.set_resolver(None)
+
+
+def test_load_resolver():
+    """The polygons are loaded once, on startup."""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    timezone.set_resolver(None)
+    with mock.patch(
+        'briefy.leica.utils.timezone.TIMEZONE_POLYGONS_PATH',
+        os.path.join(path, 'timezone_polygons.json')
+    ):
+        resolver = timezone.load_resolver(required=True)
+        assert resolver.resolve(52.5200, 13.4050) == 'Europe/Berlin'
+        assert timezone.get_resolver() is resolver
+    timezone.set_resolver(None)
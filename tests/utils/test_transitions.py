@@ -42,3 +42,36 @@ def test_get_transition_date(t, history, first, expected):
     obj = DummyObject(history)
 
     assert func(t, obj, first) == expected
+
+
+@pytest.mark.parametrize('t,history,first,expected', testdata)
+def test_get_transition_date_from_index(t, history, first, expected):
+    """Test get_transition_date_from_index."""
+    index = transitions.update_transition_index(None, history)
+    assert transitions.get_transition_date_from_index(t, index, first) == expected
+
+
+def test_update_transition_index_incremental():
+    """Test update_transition_index only folds the new entries."""
+    index = transitions.update_transition_index(None, _history[:3])
+    assert index['size'] == 3
+    assert transitions.get_transition_count_from_index('assign', index) == 1
+
+    updated = transitions.update_transition_index(index, _history)
+    assert updated == transitions.update_transition_index(None, _history)
+    assert transitions.get_transition_count_from_index('assign', updated) == 2
+    assert transitions.get_transition_count_from_index('approve', updated) == 0
+    # the previous index is not modified
+    assert transitions.get_transition_count_from_index('assign', index) == 1
+
+
+def test_update_transition_index_rewritten_history():
+    """Test update_transition_index rebuilds the index when the history was rewritten."""
+    index = transitions.update_transition_index(None, _history)
+    history = _history[:2] + [
+        {'date': datetime(2016, 12, 22, 12, 0, 0), 'transition': 'cancel'},
+    ]
+    updated = transitions.update_transition_index(index, history)
+    assert updated == transitions.update_transition_index(None, history)
+    assert transitions.get_transition_date_from_index(['assign'], updated) is None
+    assert transitions.get_transition_count_from_index('cancel', updated) == 1
@@ -1,7 +1,14 @@
 """Test Ms. Ophelie Customer reports view."""
 from briefy.leica import models
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 
+import copy
+import json
+import os
 import pytest
+import uuid
 
 
 @pytest.mark.usefixtures('db_transaction', 'create_dependencies')
@@ -32,3 +39,106 @@ class TestCustomerReports:
         assert len(lines) == size
         assert column in lines[0]
         assert value in lines[1]
+
+
+def test_orders_by_project_query():
+    """Test the customer report query uses bound parameters and keyset pagination."""
+    from briefy.leica.models.reports.customer import orders_by_project
+
+    project_id = 'd466091b-98c3-4c2b-a0c4-b5c5a1b2f9c8'
+    principal_id = '669a99c2-9bb3-443f-8891-e600a15e3c10'
+    query = orders_by_project(project_id, principal_id)
+    sql = str(query)
+    params = query.compile().params
+    assert 'DISTINCT' not in sql
+    assert project_id not in sql
+    assert principal_id not in sql
+    assert project_id in params.values()
+    assert principal_id in params.values()
+    assert 'ORDER BY orders.sort_created_at, orders.id' in sql
+
+    after = (datetime(2017, 9, 1), 'b0de3ab3-6b3c-4f0a-ae1e-3d7f3a4e2c55')
+    query = orders_by_project(project_id, principal_id, after=after, limit=100)
+    sql = str(query)
+    params = query.compile().params
+    assert '(orders.sort_created_at, orders.id) >' in sql
+    assert 100 in params.values()
+
+
+@pytest.mark.usefixtures('db_transaction', 'create_dependencies')
+class TestOrdersByProject:
+    """Test paginating the orders of a project with orders_by_project."""
+
+    dependencies = [
+        (models.Professional, 'data/professionals.json'),
+        (models.Customer, 'data/customers.json'),
+        (models.Project, 'data/projects.json'),
+        (models.Order, 'data/orders.json'),
+    ]
+
+    project_id = '36d359f0-8e92-41bb-8d1c-fedfd60e7046'
+    principal_id = '669a99c2-9bb3-443f-8891-e600a15e3c10'
+
+    @pytest.fixture(scope='class')
+    def order_ids(self, session):
+        """Create orders on the project, two of them created at the same time."""
+        path = os.path.join(os.path.dirname(__file__), '..', '..', 'data/orders.json')
+        with open(path) as file:
+            template = json.load(file)[0]
+        start = datetime(2017, 9, 1, tzinfo=timezone.utc)
+        dates = [start + timedelta(hours=hours) for hours in (3, 1, 2, 2, 0)]
+        orders = []
+        for created_at in dates:
+            payload = copy.deepcopy(template)
+            payload['id'] = str(uuid.uuid4())
+            payload['location'].update(id=str(uuid.uuid4()), order_id=payload['id'])
+            order = models.Order.create(payload)
+            order.created_at = created_at
+            session.add(order)
+            orders.append(order)
+        session.add(
+            models.LocalRole(
+                item_id=self.project_id,
+                item_type='project',
+                principal_id=self.principal_id,
+                role_name='customer_user',
+            )
+        )
+        session.flush()
+        existing = models.Order.get(template['id'])
+        orders.append(existing)
+        ordered = sorted(orders, key=lambda order: (order.created_at, order.id))
+        return [order.id for order in ordered]
+
+    def test_sort_created_at(self, order_ids):
+        """The sort key of an order is a copy of its created_at."""
+        for order_id in order_ids:
+            order = models.Order.get(order_id)
+            assert order.sort_created_at == order.created_at
+
+    @pytest.mark.parametrize('limit', [1, 2, 4, 6])
+    def test_pages(self, session, order_ids, limit):
+        """Pages, by keyset, return every order of the project once and in order."""
+        from briefy.leica.models.reports.customer import orders_by_project
+
+        ids = []
+        after = None
+        while True:
+            query = orders_by_project(
+                self.project_id, self.principal_id, after=after, limit=limit
+            )
+            rows = session.execute(query).fetchall()
+            assert len(rows) <= limit
+            ids.extend(row.id for row in rows)
+            if len(rows) < limit:
+                break
+            last = rows[-1]
+            after = (last.created_at, last.id)
+        assert ids == order_ids
+
+    def test_no_role(self, session, order_ids):
+        """A principal without a local role on the project gets no orders."""
+        from briefy.leica.models.reports.customer import orders_by_project
+
+        query = orders_by_project(self.project_id, str(uuid.uuid4()), limit=10)
+        assert session.execute(query).fetchall() == []
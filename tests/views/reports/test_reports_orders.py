@@ -1,6 +1,7 @@
 """Test Ms. Ophelie Order reports view."""
 from briefy.leica import models
 
+import mock
 import pytest
 
 
@@ -35,3 +36,14 @@ class TestOrderReports:
         assert len(lines) == size
         assert column in lines[0]
         assert value in lines[1]
+
+    def test_get_report_error(self, app):
+        """Errors reading the first batch are raised by the view, before the 200 status."""
+        from briefy.leica.reports.orders import AllOrders
+
+        with mock.patch.object(AllOrders, 'transform', side_effect=ValueError('Boom')):
+            try:
+                request = app.get('/ms-ophelie/orders/all', expect_errors=True)
+            except ValueError:
+                return
+        assert request.status_code == 500
@@ -110,6 +110,38 @@ class TestAssetView(BaseVersionedTestView):
     def test_workflow(self):
         pass
 
+    def test_bulk_ingestion(self, obj_payload, app):
+        """Test creation of a batch of assets in a single request."""
+        ids = ['1b0f3a7e-5c4d-4e2a-9f61-3d8b2c7a9e01', '1b0f3a7e-5c4d-4e2a-9f61-3d8b2c7a9e02']
+        payload = []
+        for obj_id in ids:
+            item = dict(obj_payload)
+            item['id'] = obj_id
+            payload.append(item)
+        invalid = dict(obj_payload)
+        invalid.pop('title')
+        payload.append(invalid)
+
+        request = app.post_json(
+            f'{self.base_path}/bulk', payload, headers=self.headers, status=200
+        )
+        result = request.json
+
+        assert result['total'] == 3
+        assert result['created'] == 2
+        assert [item['id'] for item in result['data'][:2]] == ids
+        assert result['data'][2]['status'] == 'error'
+        assert result['data'][2]['errors'] == ['Missing field: title']
+        for item in result['data'][:2]:
+            db_obj = self.model.get(item['id'])
+            assert db_obj.state == item['state']
+            assert item['is_valid'] is True
+            assert item['invalid_checks'] == []
+
+    def test_bulk_ingestion_invalid_payload(self, app):
+        """Test bulk ingestion refuses empty payloads."""
+        app.post_json(f'{self.base_path}/bulk', [], headers=self.headers, status=400)
+
     def test_machine_validation_invalidating(self, session, obj_payload, app):
         """Test creation of a new asset ending on edit state."""
         from briefy.leica.models import Assignment
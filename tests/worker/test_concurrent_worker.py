@@ -0,0 +1,77 @@
+"""Test the concurrent worker using the local queue."""
+from briefy.leica.db import Session
+from briefy.leica.log import worker_logger
+from briefy.leica.worker import ConcurrentWorker
+from briefy.leica.worker.local import LocalQueue
+from threading import current_thread
+
+import mock
+import time
+
+
+def _fill_queue(queue: LocalQueue, assignments: int, per_assignment: int):
+    """Add per_assignment messages for each one of the assignments."""
+    for position in range(per_assignment):
+        for number in range(assignments):
+            queue.write_message({
+                'event_name': 'laure.assignment.validated',
+                'data': {'assignment': {'id': f'assignment-{number}'}, 'position': position},
+            })
+
+
+def test_concurrent_worker_keeps_order_per_assignment():
+    """Messages of the same assignment are processed in order, by the same thread."""
+    processed = {}
+
+    def action(laure_data, session):
+        time.sleep(0.001)
+        key = laure_data.assignment.id
+        processed.setdefault(key, []).append((laure_data.position, current_thread().name))
+        return True, {}
+
+    queue = LocalQueue()
+    _fill_queue(queue, assignments=5, per_assignment=4)
+    worker = ConcurrentWorker(logger_=worker_logger, input_queue=queue, max_workers=3)
+    worker.Session = Session
+
+    dispatch = {'laure.assignment.validated': {
+        'name': 'test',
+        'action': action,
+        'success_notification': None,
+        'failure_notification': None,
+    }}
+    with mock.patch('briefy.leica.worker.MESSAGE_DISPATCH', dispatch):
+        while len(queue):
+            worker.process_batch(worker.receive_messages())
+
+    assert queue.total_deleted == 20
+    assert queue.in_flight == 0
+    assert len(processed) == 5
+    for items in processed.values():
+        assert [position for position, _ in items] == [0, 1, 2, 3]
+        assert len({thread for _, thread in items}) == 1
+
+
+def test_concurrent_worker_keeps_failed_messages():
+    """Messages raising exceptions are not deleted from the queue."""
+    def action(laure_data, session):
+        raise ValueError('Boom')
+
+    queue = LocalQueue()
+    _fill_queue(queue, assignments=2, per_assignment=1)
+    worker = ConcurrentWorker(logger_=worker_logger, input_queue=queue, max_workers=2)
+    worker.Session = Session
+
+    dispatch = {'laure.assignment.validated': {
+        'name': 'test',
+        'action': action,
+        'success_notification': None,
+        'failure_notification': None,
+    }}
+    with mock.patch('briefy.leica.worker.MESSAGE_DISPATCH', dispatch):
+        total = worker.process_batch(worker.receive_messages())
+
+    assert total == 0
+    assert queue.in_flight == 2
+    assert queue.release_in_flight() == 2
+    assert len(queue) == 2
@@ -0,0 +1,71 @@
+"""Test processing of assets ingested in bulk by the worker."""
+from briefy.common.utils.data import Objectify
+from briefy.leica.worker import actions
+
+import mock
+
+
+def _message(*ids) -> Objectify:
+    """Return the data of an ingestion message for the given asset ids."""
+    return Objectify({
+        'assignment': {'id': 'assignment'},
+        'assets': [{'id': asset_id, 'source_path': f'files/{asset_id}.jpg'} for asset_id in ids]
+    })
+
+
+@mock.patch('briefy.leica.worker.actions.AssetCreatedEvent')
+@mock.patch('briefy.leica.worker.actions.safe_update_metadata')
+@mock.patch('briefy.leica.worker.actions.s3')
+@mock.patch('briefy.leica.worker.actions.Image')
+def test_process_ingested_assets(image, s3, update_metadata, created_event):
+    """Only existing assets are moved, a failed move skips only its asset."""
+    image.get.side_effect = lambda asset_id: None if asset_id == 'missing' else asset_id
+    s3.should_move.return_value = True
+    s3.move_asset_source_files.return_value = {'files/moved.jpg': True, 'files/failed.jpg': False}
+
+    status, payload = actions.process_ingested_assets(
+        _message('moved', 'missing', 'failed'), None
+    )
+
+    assert status is False
+    assert payload == {}
+    s3.move_asset_source_files.assert_called_once_with(['files/moved.jpg', 'files/failed.jpg'])
+    update_metadata.assert_called_once_with('moved')
+    assert created_event.call_count == 1
+
+
+@mock.patch('briefy.leica.worker.actions.AssetCreatedEvent')
+@mock.patch('briefy.leica.worker.actions.safe_update_metadata')
+@mock.patch('briefy.leica.worker.actions.s3')
+@mock.patch('briefy.leica.worker.actions.Image')
+def test_process_ingested_assets_move_error(image, s3, update_metadata, created_event):
+    """An error moving the source files does not raise, so the message is not retried."""
+    image.get.side_effect = lambda asset_id: asset_id
+    s3.should_move.return_value = True
+    s3.move_asset_source_files.side_effect = RuntimeError('Boom')
+
+    status, _ = actions.process_ingested_assets(_message('first', 'second'), None)
+
+    assert status is False
+    assert update_metadata.call_count == 0
+    assert created_event.call_count == 0
+
+
+@mock.patch('briefy.leica.worker.actions.safe_update_metadata')
+@mock.patch('briefy.leica.worker.actions.s3')
+@mock.patch('briefy.leica.worker.actions.Image')
+def test_process_source_changes(image, s3, update_metadata):
+    """Metadata of a changed asset is fetched only after its source file is moved."""
+    image.get.side_effect = lambda asset_id: asset_id
+    s3.should_move.return_value = True
+    s3.move_asset_source_files.return_value = {'files/changed.jpg': True}
+
+    data = _message('changed')
+    status, _ = actions.process_source_changes(data, None)
+    assert status is True
+    assert update_metadata.call_count == 0
+
+    data = Objectify(dict(data.dct, update_metadata=True))
+    status, _ = actions.process_source_changes(data, None)
+    assert status is True
+    update_metadata.assert_called_once_with('changed')